@@ -6,10 +6,16 @@ Every backend must provide:
   - An AbstractTheme subclass that parses the user's YAML theme source and
     can emit the CSS consumed by its renderer.
   - An AbstractBackend subclass that accepts a parsed Presentation document
-    model and returns the complete HTML string for index.html.
+    model and renders the HTML document for index.html (``_document``) and
+    its slides (``_body_fragments``).
 
 Shared utilities
 ----------------
+HtmlIndenter / indent_html / minify_html
+    Streaming and whole-document HTML indentation preserving ``<pre>``
+    blocks, and HTML minification.  ``AbstractBackend.write`` renders the document around
+    ``SLIDES_SLOT`` and writes it to a file-like sink slide by slide.
+
 DecoratorSpec
     Dataclass representing one parsed slide decorator (header, footer, or
     sidebar) in a backend-agnostic form.
@@ -23,18 +29,132 @@ parse_layout_decorators(layout)
 
 from __future__ import annotations
 
+import io
 import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
-from yattag import indent as _yattag_indent
+from ..build_cache import BuildCache
+from ..diagram import GRAPHVIZ_CDN_SCRIPTS, MERMAID_CDN_SCRIPT, Diagram
+from ..metadata import MetadataTemplate
+from .html_tokens import CLOSE, COMMENT, OPEN, TEXT, match_tags, tokenize
+from .parallel import render_fragments
 
 # ---------------------------------------------------------------------------
 # HTML helpers
 # ---------------------------------------------------------------------------
 
 
+# Comment marking where the slides go into the document rendered by AbstractBackend._document.
+SLIDES_SLOT = "<!--matisse-slides-->"
+# Comment marking where the markup depending on the slides rendered goes, see AbstractBackend._deferred.
+DEFERRED_SLOT = "<!--matisse-deferred-->"
+
+_PRE_BLOCK = re.compile(r"<pre>.*?</pre>", re.DOTALL)
+_PRE_MARKER = re.compile(r"\x00PRE(\d+)\x00")
+
+
+class HtmlIndenter(object):
+    """Streaming ``yattag.indent``, indenting a document chunk by chunk.
+
+    The indentation state (nesting level, same-line text nodes, last tag
+    opened) is carried from one chunk to the next, thus indenting the head
+    of a document, then each slide and then its tail gives the very same
+    output of ``yattag.indent`` on the whole document, provided that each
+    slide is balanced.  Whitespace inside ``<pre>`` blocks is preserved (see
+    :func:`indent_html`).
+    """
+
+    def __init__(self, indentation: str = "  ", newline: str = "\n") -> None:
+        self.indentation = indentation
+        self.newline = newline
+        self.level = 0
+        self.sameline = 0
+        self.was_just_opened = False
+        self.tag_appeared = False
+
+    def indent(self, html: str, part: str = None) -> str:
+        """Indent a chunk of a document.
+
+        Parameters
+        ----------
+        html:
+            Balanced HTML chunk, or whole document containing
+            :data:`SLIDES_SLOT`.
+        part:
+            ``"head"`` or ``"tail"`` to indent only the part of the document
+            preceding or following :data:`SLIDES_SLOT`, ``None`` for all.
+
+        Returns
+        -------
+        str
+            Indented chunk.
+        """
+        pre_blocks: list[str] = []
+
+        def _save(m: re.Match) -> str:
+            pre_blocks.append(m.group(0))
+            return f"\x00PRE{len(pre_blocks) - 1}\x00"
+
+        tokens = tokenize(_PRE_BLOCK.sub(_save, html))
+        start, stop = 0, len(tokens)
+        if part is not None:
+            slot = next(i for i, token in enumerate(tokens) if token.kind is COMMENT and token.content == SLIDES_SLOT)
+            start, stop = (0, slot) if part == "head" else (slot + 1, len(tokens))
+        indented = self._indent_tokens(tokens, *match_tags(tokens), start, stop)
+        if not pre_blocks:
+            return indented
+        return _PRE_MARKER.sub(lambda m: pre_blocks[int(m.group(1))], indented)
+
+    def _indent_tokens(self, tokens, matched, text_parents, start, stop) -> str:
+        """Indent tokens[start:stop], as the loop of ``yattag.indent`` does."""
+        result: list[str] = []
+        append = result.append
+
+        def _indent():
+            if self.tag_appeared:
+                append(self.newline)
+            append(self.indentation * self.level)
+
+        for i in range(start, stop):
+            token = tokens[i]
+            kind = token.kind
+            if kind is TEXT:
+                if not token.isblank:
+                    if not self.sameline:
+                        _indent()
+                    append(token.content)
+                    self.was_just_opened = False
+            elif kind is OPEN and i in matched:
+                self.was_just_opened = True
+                if self.sameline:
+                    self.sameline += 1
+                else:
+                    _indent()
+                if i in text_parents:
+                    self.sameline = self.sameline or 1
+                append(token.content)
+                self.level += 1
+                self.tag_appeared = True
+            elif kind is CLOSE and i in matched:
+                self.level -= 1
+                self.tag_appeared = True
+                if self.sameline:
+                    self.sameline -= 1
+                elif not self.was_just_opened:
+                    _indent()
+                append(token.content)
+                self.was_just_opened = False
+            else:
+                if not self.sameline:
+                    _indent()
+                append(token.content)
+                self.was_just_opened = False
+                self.tag_appeared = True
+        return "".join(result)
+
+
 def indent_html(html: str) -> str:
     """Indent HTML while preserving whitespace inside ``<pre>`` blocks.
 
@@ -46,17 +166,43 @@ def indent_html(html: str) -> str:
     This wrapper extracts all ``<pre>…</pre>`` subtrees before indenting and
     restores them verbatim afterwards.
     """
-    pre_blocks: list[str] = []
+    return HtmlIndenter().indent(html)
+
 
-    def _save(m: re.Match) -> str:
-        pre_blocks.append(m.group(0))
-        return f"\x00PRE{len(pre_blocks) - 1}\x00"
+# Elements whose content whitespace is significant: preformatted text, scripts, styles and Graphviz sources.
+_VERBATIM = re.compile(
+    r"<(pre|textarea|script|style)\b.*?</\1\s*>|<div class=\"graphviz\">.*?</div>", re.DOTALL | re.IGNORECASE
+)
+_NEWLINE_RUN = re.compile(r"[ \t\r\f\v]*\n[ \t\r\n\f\v]*")
+_BLANK_RUN = re.compile(r"[ \t\r\f\v]{2,}")
+# class and style attributes left empty, inside a tag
+_EMPTY_ATTRIBUTE = re.compile(r'\s(?:class|style)=""(?=[^<>]*>)')
 
-    protected = re.sub(r"<pre>.*?</pre>", _save, html, flags=re.DOTALL)
-    indented = _yattag_indent(protected)
-    for i, block in enumerate(pre_blocks):
-        indented = indented.replace(f"\x00PRE{i}\x00", block)
-    return indented
+
+def minify_html(html: str) -> str:
+    """Minify HTML collapsing redundant whitespace and dropping empty attributes.
+
+    Whitespace runs are collapsed to a single newline (if they contain one)
+    or space, thus inline spacing is kept.  The content of ``<pre>``,
+    ``<textarea>``, ``<script>`` and ``<style>`` elements and of Graphviz
+    diagrams is kept verbatim.  Empty ``class`` and ``style`` attributes,
+    which are equivalent to missing ones, are dropped.
+    """
+    pieces: list[str] = []
+    cursor = 0
+    for verbatim in _VERBATIM.finditer(html):
+        pieces.append(_minify_text(html[cursor : verbatim.start()]))
+        pieces.append(verbatim.group())
+        cursor = verbatim.end()
+    pieces.append(_minify_text(html[cursor:]))
+    return "".join(pieces)
+
+
+def _minify_text(html: str) -> str:
+    """Minify HTML not containing verbatim elements."""
+    html = _NEWLINE_RUN.sub("\n", html)
+    html = _BLANK_RUN.sub(" ", html)
+    return _EMPTY_ATTRIBUTE.sub("", html)
 
 
 # ---------------------------------------------------------------------------
@@ -255,7 +401,6 @@ class AbstractBackend(ABC):
     (``Presentation``) into a complete, self-contained HTML string.
     """
 
-    @abstractmethod
     def render(self, presentation: "Presentation") -> str:
         """Render *presentation* and return the full ``index.html`` content.
 
@@ -267,5 +412,185 @@ class AbstractBackend(ABC):
         Returns
         -------
         str
-            Complete HTML string ready to be written to ``index.html``.
+            Complete HTML string ready to be written to ``index.html``,
+            indented as a whole by :func:`indent_html`.
         """
+        sink = io.StringIO()
+        self.write(presentation, sink, indent=False)
+        return indent_html(sink.getvalue())
+
+    def write(self, presentation: "Presentation", sink, indent: bool = True, minify: bool = False) -> None:
+        """Write the full ``index.html`` content of *presentation* into *sink*, slide by slide.
+
+        The document head is written first, then each slide as soon as it is
+        rendered and finally the document tail, thus only one slide at a time
+        is held in memory (with one job; see :mod:`matisse.backends.parallel`).
+
+        Parameters
+        ----------
+        presentation:
+            The fully parsed ``Presentation`` document model.
+        sink:
+            File-like object the HTML is written to.
+        indent:
+            Indent the HTML incrementally, chunk by chunk, with an
+            :class:`HtmlIndenter`; if ``False`` the HTML is written as
+            rendered.  The indentation equals the one of :meth:`render` as
+            long as each slide markup is balanced; a slide with stray open or
+            close tags (e.g. raw HTML) is indented on its own instead of
+            having its tags matched against the other slides ones.
+        minify:
+            Write the HTML minified by :func:`minify_html` instead of
+            indented, *indent* being ignored.
+        """
+        self._prepare(presentation)
+        self._build_cache = None
+        if self.config.build_cache:
+            self._build_cache = BuildCache(self.config.build_cache)
+            self._build_cache.start(self, presentation)
+        indenter = HtmlIndenter()
+
+        def _format(html, part=None):
+            if indent and not minify:
+                return indenter.indent(html, part=part)
+            if part is not None:
+                html = html.split(SLIDES_SLOT)[0 if part == "head" else 1]
+            return minify_html(html) if minify else html
+
+        document = self._document(presentation)
+        sink.write(_format(document, part="head"))
+        for fragment in self._body_fragments(presentation):
+            sink.write(_format(fragment))
+        # the markup depending on the slides (e.g. diagram scripts) is known once they are rendered
+        sink.write(_format(document.replace(DEFERRED_SLOT, self._deferred(presentation)), part="tail"))
+        if self._build_cache is not None:
+            self._build_cache.prune()
+            if self.config.verbose:
+                print(f"Build cache: {self._build_cache.hits} hits, {self._build_cache.misses} misses")
+
+    def _prepare(self, presentation: "Presentation") -> None:
+        """Set up the rendering of *presentation*, called once by :meth:`write` before anything is rendered."""
+
+    @abstractmethod
+    def _document(self, presentation: "Presentation") -> str:
+        """Render the HTML document of *presentation* with :data:`SLIDES_SLOT` in place of the slides.
+
+        Parameters
+        ----------
+        presentation:
+            The fully parsed ``Presentation`` document model.
+
+        Returns
+        -------
+        str
+            HTML document, not indented, with :data:`DEFERRED_SLOT` after
+            :data:`SLIDES_SLOT` where the markup returned by
+            :meth:`_deferred` goes.
+        """
+
+    def _deferred(self, presentation: "Presentation") -> str:
+        """Return the markup depending on the slides rendered, going in place of :data:`DEFERRED_SLOT`.
+
+        Called once the slides are rendered: the diagram CDN scripts, injected
+        only if some slide contains a diagram.
+        """
+        scripts = []
+        if presentation.context.flag(Diagram, "has_mermaid"):
+            scripts.append(MERMAID_CDN_SCRIPT)
+        if presentation.context.flag(Diagram, "has_graphviz"):
+            scripts.append(GRAPHVIZ_CDN_SCRIPTS)
+        return "".join(scripts)
+
+    @abstractmethod
+    def _body_fragments(self, presentation: "Presentation"):
+        """Yield the HTML fragments going in place of :data:`SLIDES_SLOT`, in order.
+
+        Each fragment must be balanced (e.g. one slide element), since it is
+        indented on its own.
+
+        Parameters
+        ----------
+        presentation:
+            The fully parsed ``Presentation`` document model.
+        """
+
+    @abstractmethod
+    def _slide_fragment(self, presentation: "Presentation", item: tuple) -> str:
+        """Render the HTML fragment of one slide.
+
+        Fragments are rendered independently of each other (possibly in
+        other processes, see :mod:`matisse.backends.parallel`) and stitched
+        back in order by :meth:`render`.
+
+        Parameters
+        ----------
+        presentation:
+            The fully parsed ``Presentation`` document model.
+        item:
+            ``(chapter, section, subsection, slide, current)`` tuple, as
+            yielded by :meth:`_iter_slides`.
+
+        Returns
+        -------
+        str
+            HTML of the slide element.
+        """
+
+    def _fragment(self, presentation: "Presentation", item: tuple) -> str:
+        """Return the HTML fragment of one slide, from the build cache if ``config.build_cache`` is set.
+
+        See :class:`matisse.build_cache.BuildCache`; without a cache the slide
+        is rendered by :meth:`_slide_fragment`.
+        """
+        if getattr(self, "_build_cache", None) is None:
+            return self._slide_fragment(presentation, item)
+        return self._build_cache.fragment(self, presentation, item)
+
+    def _iter_slides(self, presentation: "Presentation"):
+        """Yield ``(chapter, section, subsection, slide, current)`` for every slide."""
+        current = [0, 0, 0, 0]
+        for chapter in presentation.chapters:
+            current[0] += 1
+            current[1] = 0
+            current[2] = 0
+            current[3] = 0
+            for section in chapter.sections:
+                current[1] += 1
+                current[2] = 0
+                current[3] = 0
+                for subsection in section.subsections:
+                    current[2] += 1
+                    current[3] = 0
+                    for slide in subsection.slides:
+                        current[3] += 1
+                        yield chapter, section, subsection, slide, list(current)
+
+    @staticmethod
+    def _update_metadata(presentation: "Presentation", chap, sec, subsec, slide) -> None:
+        """Update presentation metadata counters for the current slide."""
+        md = presentation.metadata
+        md["chaptertitle"].update_value(value=chap.title)
+        md["chapternumber"].update_value(value=chap.number)
+        md["sectiontitle"].update_value(value=sec.title)
+        md["sectionnumber"].update_value(value=sec.number)
+        md["subsectiontitle"].update_value(value=subsec.title)
+        md["subsectionnumber"].update_value(value=subsec.number)
+        md["slidetitle"].update_value(value=slide.title)
+        md["slidenumber"].update_value(value=slide.number)
+
+    def _metadata_template(self, presentation: "Presentation", source: str) -> MetadataTemplate:
+        """Return the template of a metadata placeholders source (e.g. a decorator content).
+
+        Templates are compiled at their first use and cached by source until the next :meth:`render`, the
+        placeholders of the metadata constant along the rendering being substituted once.
+        """
+        templates = self._metadata_templates
+        if source not in templates:
+            templates[source] = MetadataTemplate(
+                parser=presentation.parser, metadata=presentation.metadata, source=source
+            )
+        return templates[source]
+
+    def _render_fragments(self, presentation: "Presentation", items: list):
+        """Render the HTML fragments of *items*, in parallel when ``config.jobs`` > 1, lazily otherwise."""
+        return render_fragments(self, presentation, items, jobs=self.config.jobs)
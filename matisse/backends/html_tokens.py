@@ -0,0 +1,148 @@
+"""
+html_tokens.py, module definition of the HTML tokenizer of the streaming indenter.
+
+A small HTML tokenizer and tag matcher following the ones of yattag.indent (yattag 1.16), thus the HtmlIndenter of
+backends/base.py indents exactly as yattag.indent does without depending on the private yattag.indentation module.
+
+Tokens are text nodes, comments, open and close tags and anything else written as is (doctype, CDATA, XML declarations
+and processing instructions, self-closing tags and whole <script> and <style> elements).
+"""
+
+from __future__ import annotations
+
+import re
+
+TEXT = "text"
+COMMENT = "comment"
+OPEN = "open"
+CLOSE = "close"
+OTHER = "other"
+
+_OPEN_TAG_START = r"""
+    <\s*
+        (?P<{key}>{name})
+        (\s+[^/><"=\s]+     # attribute
+            (\s*=\s*
+                (
+                    [^/><"=\s]+ |    # unquoted attribute value
+                    ("[^"]*") |    # " quoted attribute value
+                    ('[^']*')      # ' quoted attribute value
+                )
+            )?  # the attribute value is optional
+        )*
+    \s*"""
+
+_TAG_NAME = r'[^?/><"\s]+'
+
+# (group, kind) in the order the alternatives are tried
+_KINDS = (
+    ("Text", TEXT),
+    ("Comment", COMMENT),
+    ("CData", OTHER),
+    ("Doctype", OTHER),
+    ("XMLDeclaration", OTHER),
+    ("Script", OTHER),
+    ("Style", OTHER),
+    ("OpenTag", OPEN),
+    ("SelfTag", OTHER),
+    ("CloseTag", CLOSE),
+    ("XMLProcessingInstruction", OTHER),
+)
+
+_REGEXS = {
+    "Text": r"[^<>]+",
+    "Comment": r"<!--((?!-->).)*.?-->",
+    "CData": r"<!\[CDATA\[(.*?)\]\]>",
+    "Doctype": r"""<!DOCTYPE(\s+([^<>"']+|"[^"]*"|'[^']*'))*>""",
+    "XMLDeclaration": _OPEN_TAG_START.format(key="xmldecl_ignore", name=r"\?\s*xml") + r"\?\s*>",
+    "Script": _OPEN_TAG_START.format(key="script_ignore", name="script")
+    + r">((?!(<\s*/\s*script\s*>)).)*.?<\s*/\s*script\s*>",
+    "Style": _OPEN_TAG_START.format(key="style_ignore", name="style")
+    + r">((?!(<\s*/\s*style\s*>)).)*.?<\s*/\s*style\s*>",
+    "OpenTag": _OPEN_TAG_START.format(key="tag_name_OpenTag", name=_TAG_NAME) + ">",
+    "SelfTag": _OPEN_TAG_START.format(key="tag_name_SelfTag", name=_TAG_NAME) + r"/\s*>",
+    "CloseTag": r"<\s*/(?P<tag_name_CloseTag>" + _TAG_NAME + r')(\s[^/><"]*)?>',
+    "XMLProcessingInstruction": r'<\?(?!xml\s)[^?/><"\s]+(\s[^?>]*)?\?>',
+}
+
+_TOKEN = re.compile("|".join(f"(?P<{name}>{_REGEXS[name]})" for name, _ in _KINDS), re.X | re.I | re.S).match
+
+
+class Token(object):
+    """
+    HTML token.
+
+    Attributes
+    ----------
+    kind: str
+      one of TEXT, COMMENT, OPEN, CLOSE, OTHER
+    content: str
+      markup of the token
+    tag_name: str
+      name of an open or close tag, None for the other tokens
+    """
+
+    __slots__ = ("kind", "content", "tag_name")
+
+    def __init__(self, kind: str, content: str, tag_name: str = None) -> None:
+        self.kind = kind
+        self.content = content
+        self.tag_name = tag_name
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.content!r})"
+
+    @property
+    def isblank(self) -> bool:
+        """Check if a text token is whitespace only."""
+        return not self.content.strip()
+
+
+def tokenize(html: str) -> list:
+    """Return the tokens of an HTML string.
+
+    Raises
+    ------
+    ValueError
+      if some markup is not recognized (e.g. a stray ``<``)
+    """
+    tokens = []
+    start = 0
+    while start < len(html):
+        match = _TOKEN(html, start)
+        if match is None:
+            raise ValueError(f"Unrecognized HTML token near {html[start : start + 100]!r}")
+        name, kind = next((name, kind) for name, kind in _KINDS if match.group(name))
+        tag_name = match.group("tag_name_" + name) if kind in (OPEN, CLOSE) else None
+        tokens.append(Token(kind, match.group(name), tag_name))
+        start = match.end()
+    return tokens
+
+
+def match_tags(tokens: list) -> tuple:
+    """Match the open and close tags of tokens, as ``yattag.indent`` does.
+
+    Returns
+    -------
+    tuple
+      (matched, text_parents): indexes of the matched open and close tags, indexes of the matched open tags
+      directly containing non-blank text
+    """
+    unmatched: dict = {}
+    matched = set()
+    for i, token in enumerate(tokens):
+        if token.kind is OPEN:
+            unmatched.setdefault(token.tag_name, []).append(i)
+        elif token.kind is CLOSE and unmatched.get(token.tag_name):
+            matched.add(unmatched[token.tag_name].pop())
+            matched.add(i)
+    text_parents = set()
+    nodes = []
+    for i, token in enumerate(tokens):
+        if token.kind is OPEN and i in matched:
+            nodes.append(i)
+        elif token.kind is CLOSE and i in matched:
+            nodes.pop()
+        elif token.kind is TEXT and nodes and not token.isblank:
+            text_parents.add(nodes[-1])
+    return matched, text_parents
@@ -10,8 +10,7 @@ from __future__ import annotations
 
 from yattag import Doc
 
-from ...diagram import GRAPHVIZ_CDN_SCRIPTS, MERMAID_CDN_SCRIPT, Diagram
-from ..base import AbstractBackend, indent_html
+from ..base import DEFERRED_SLOT, SLIDES_SLOT, AbstractBackend
 
 
 class ImpressBackend(AbstractBackend):
@@ -19,6 +18,9 @@ class ImpressBackend(AbstractBackend):
 
     def __init__(self, config):
         self.config = config
+        # decorators and metadata templates compiled for the presentation being rendered
+        self._decorators: dict = {}
+        self._metadata_templates: dict = {}
 
     # ------------------------------------------------------------------
     # Private helpers (moved from Presentation)
@@ -99,44 +101,52 @@ class ImpressBackend(AbstractBackend):
             with tag("script"):
                 doc.attr(src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js")
 
-    def _put_html_slide_decorators(
-        self, tag, doc, decorator, presentation, position=None, overtheme=None, current=None
-    ):
-        if overtheme is not None and overtheme.custom:
-            theme = overtheme
-        else:
-            theme = presentation.theme
+    def _slide_decorators(self, presentation, theme, decorator, position=None):
+        """Return the (name, template) pairs of the decorators of a kind put into the slides of a theme.
+
+        The active decorators (at the given position for sidebars) and the templates of their metadata placeholders
+        are compiled once per theme (or overtheme) and cached until the next render.
+        """
+        key = (id(theme), decorator, position)
+        if key in self._decorators:
+            return self._decorators[key][1]
         decorators = getattr(theme, "slide_" + decorator)
+        selected = []
         for decor in sorted(decorators):
             insert = True
             # position check for sidebars
             if decorator == "sidebar" and position is not None:
                 for css in decorators[decor]:
-                    for key in css:
-                        if "position" in key.lower():
-                            pos = css[key]
+                    for key_css in css:
+                        if "position" in key_css.lower():
+                            pos = css[key_css]
                             break
                 insert = pos.lower() == position.lower()
             # active check
             for css in decorators[decor]:
-                for key in css:
-                    if "active" in key.lower():
-                        insert = insert and css[key].lower() == "yes"
+                for key_css in css:
+                    if "active" in key_css.lower():
+                        insert = insert and css[key_css].lower() == "yes"
             if insert:
                 placeholders = theme.get_slide_decorators_metadata(decorator=decorator, name=decor)
-                for metadata in presentation.metadata:
-                    placeholders = presentation.metadata[metadata].parse(
-                        parser=presentation.parser,
-                        source=placeholders,
-                        toc_depth=presentation.metadata["toc_depth"].value,
-                        max_time=presentation.metadata["max_time"].value,
-                        current=current,
-                    )
-                if decorator != "sidebar":
-                    with doc.tag("div"):
-                        doc.attr(style="clear: both;")
-                with tag("div", klass="slide-" + decor):
-                    doc.asis(placeholders)
+                selected.append((decor, self._metadata_template(presentation, placeholders)))
+        # the theme is kept along its id, thus the id cannot be reused by another object
+        self._decorators[key] = (theme, selected)
+        return selected
+
+    def _put_html_slide_decorators(
+        self, tag, doc, decorator, presentation, position=None, overtheme=None, current=None
+    ):
+        if overtheme is not None and overtheme.custom:
+            theme = overtheme
+        else:
+            theme = presentation.theme
+        for decor, template in self._slide_decorators(presentation, theme, decorator, position):
+            if decorator != "sidebar":
+                with doc.tag("div"):
+                    doc.attr(style="clear: both;")
+            with tag("div", klass="slide-" + decor):
+                doc.asis(template.fill(current=current))
 
     @staticmethod
     def _put_impress_root_attributes(doc, theme):
@@ -271,12 +281,71 @@ class ImpressBackend(AbstractBackend):
             if overtheme.goto_next_list:
                 doc.attr(("data-goto-next-list", overtheme.goto_next_list))
 
+    def _slide_fragment(self, presentation, item) -> str:
+        """Render the ``<div class="step slide">`` of one slide."""
+        chapter, section, subsection, slide, current = item
+        self._update_metadata(presentation, chapter, section, subsection, slide)
+        doc, tag, _ = Doc().tagtext()
+        with doc.tag("div"):
+            chapter.put_html_attributes(doc=doc)
+            section.put_html_attributes(doc=doc)
+            subsection.put_html_attributes(doc=doc)
+            self._put_slide_attributes(doc, slide)
+            self._put_html_slide_decorators(
+                tag=tag,
+                doc=doc,
+                decorator="header",
+                presentation=presentation,
+                current=current,
+                overtheme=slide.overtheme,
+            )
+            self._put_html_slide_decorators(
+                tag=tag,
+                doc=doc,
+                decorator="sidebar",
+                presentation=presentation,
+                position="L",
+                current=current,
+                overtheme=slide.overtheme,
+            )
+            slide.to_html(
+                doc=doc,
+                parser=presentation.parser,
+                metadata=presentation.metadata,
+                theme=presentation.theme,
+                current=current,
+                label_registry=presentation.label_registry,
+                context=presentation.context,
+            )
+            self._put_html_slide_decorators(
+                tag=tag,
+                doc=doc,
+                decorator="sidebar",
+                presentation=presentation,
+                position="R",
+                current=current,
+                overtheme=slide.overtheme,
+            )
+            self._put_html_slide_decorators(
+                tag=tag,
+                doc=doc,
+                decorator="footer",
+                presentation=presentation,
+                current=current,
+                overtheme=slide.overtheme,
+            )
+        return doc.getvalue()
+
     # ------------------------------------------------------------------
     # AbstractBackend interface
     # ------------------------------------------------------------------
 
-    def render(self, presentation) -> str:
-        """Generate the complete impress.js HTML for *presentation*."""
+    def _prepare(self, presentation) -> None:
+        self._decorators = {}
+        self._metadata_templates = {}
+
+    def _document(self, presentation) -> str:
+        """Generate the impress.js HTML document for *presentation*, the slides being in place of SLIDES_SLOT."""
         doc, tag, text = Doc().tagtext()
         doc.asis("<!DOCTYPE html>")
         with tag("html"):
@@ -288,81 +357,13 @@ class ImpressBackend(AbstractBackend):
                 doc.attr(klass="impress-not-supported")
                 with tag("div", id="impress"):
                     self._put_impress_root_attributes(doc, presentation.theme)
-                    current = [0, 0, 0, 0]
-                    for chapter in presentation.chapters:
-                        current[0] += 1
-                        current[1] = 0
-                        current[2] = 0
-                        current[3] = 0
-                        presentation.metadata["chaptertitle"].update_value(value=chapter.title)
-                        presentation.metadata["chapternumber"].update_value(value=chapter.number)
-                        for section in chapter.sections:
-                            current[1] += 1
-                            current[2] = 0
-                            current[3] = 0
-                            presentation.metadata["sectiontitle"].update_value(value=section.title)
-                            presentation.metadata["sectionnumber"].update_value(value=section.number)
-                            for subsection in section.subsections:
-                                current[2] += 1
-                                current[3] = 0
-                                presentation.metadata["subsectiontitle"].update_value(value=subsection.title)
-                                presentation.metadata["subsectionnumber"].update_value(value=subsection.number)
-                                for slide in subsection.slides:
-                                    current[3] += 1
-                                    presentation.metadata["slidetitle"].update_value(value=slide.title)
-                                    presentation.metadata["slidenumber"].update_value(value=slide.number)
-                                    with doc.tag("div"):
-                                        chapter.put_html_attributes(doc=doc)
-                                        section.put_html_attributes(doc=doc)
-                                        subsection.put_html_attributes(doc=doc)
-                                        self._put_slide_attributes(doc, slide)
-                                        self._put_html_slide_decorators(
-                                            tag=tag,
-                                            doc=doc,
-                                            decorator="header",
-                                            presentation=presentation,
-                                            current=current,
-                                            overtheme=slide.overtheme,
-                                        )
-                                        self._put_html_slide_decorators(
-                                            tag=tag,
-                                            doc=doc,
-                                            decorator="sidebar",
-                                            presentation=presentation,
-                                            position="L",
-                                            current=current,
-                                            overtheme=slide.overtheme,
-                                        )
-                                        slide.to_html(
-                                            doc=doc,
-                                            parser=presentation.parser,
-                                            metadata=presentation.metadata,
-                                            theme=presentation.theme,
-                                            current=current,
-                                            label_registry=presentation.label_registry,
-                                        )
-                                        self._put_html_slide_decorators(
-                                            tag=tag,
-                                            doc=doc,
-                                            decorator="sidebar",
-                                            presentation=presentation,
-                                            position="R",
-                                            current=current,
-                                            overtheme=slide.overtheme,
-                                        )
-                                        self._put_html_slide_decorators(
-                                            tag=tag,
-                                            doc=doc,
-                                            decorator="footer",
-                                            presentation=presentation,
-                                            current=current,
-                                            overtheme=slide.overtheme,
-                                        )
+                    doc.asis(SLIDES_SLOT)
                 self._put_ui_elements(doc, tag, presentation.theme)
                 # Phase 2 — diagram CDN scripts (injected only when needed)
-                if Diagram.has_mermaid:
-                    doc.asis(MERMAID_CDN_SCRIPT)
-                if Diagram.has_graphviz:
-                    doc.asis(GRAPHVIZ_CDN_SCRIPTS)
+                doc.asis(DEFERRED_SLOT)
                 self._put_html_tags_scripts(doc, tag)
-        return indent_html(doc.getvalue())
+        return doc.getvalue()
+
+    def _body_fragments(self, presentation):
+        """Yield the ``<div class="step slide">`` of each slide."""
+        return self._render_fragments(presentation, list(self._iter_slides(presentation)))
@@ -444,12 +444,12 @@ class ImpressTheme(AbstractTheme):
         if not found:
             css_list.append({name: value})
 
-    def get(self, source, name="theme", div_id=""):
-        """Parse theme from source stream."""
+    def get(self, source, name="theme", div_id="", documents=None):
+        """Parse theme from source stream, or from its already parsed YAML documents if passed."""
         self.div_id = div_id
         if len(source) > 0:
             try:
-                for data in load_all(source, Loader=FullLoader):
+                for data in load_all(source, Loader=FullLoader) if documents is None else documents:
                     if not data or name not in data:
                         continue
                     theme_data = data[name]
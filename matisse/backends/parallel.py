@@ -0,0 +1,130 @@
+"""
+matisse.backends.parallel — parallel rendering of slide fragments.
+
+Backends render every slide into its own HTML fragment (see
+``AbstractBackend._slide_fragment``) and stitch the fragments back in order;
+``render_fragments`` either renders them in sequence or, with more than one
+job, in a pool of forked processes sharing the parsed presentation. Workers
+are only forked on Linux and from a single-threaded process (e.g. not from
+``matisse serve``, whose HTTP server runs in threads): elsewhere forking is
+unsafe and slides are rendered in sequence.
+
+Slides are not fully independent: environments (boxes, figures, theorems,
+diagrams...) are numbered by the counters of the presentation RenderContext,
+advancing from slide to slide. Parallel rendering thus runs in two rounds:
+
+1. every slide is rendered from an empty context, the counters it leaves
+   being its *delta*;
+2. the deltas are prefix-summed into the counters each slide starts from, and
+   only the slides advancing some counter not starting from zero are rendered
+   again with their actual starting counters.
+
+At the end the presentation context is left with the counters and the flags
+a sequential rendering would have left, and the markdown fragments converted
+by the workers are added to the ``MARKDOWN_CACHE`` of the parent (thus saved
+by ``--md-cache``).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import threading
+
+from ..markdown_utils import MARKDOWN_CACHE
+from ..render_context import add_states
+
+# State shared with the forked workers: the backend, the presentation and the slides items.
+_WORKER_STATE: dict = {}
+
+
+def parallel_available() -> bool:
+    """Check if slides can be rendered in parallel, i.e. if worker processes can be safely forked.
+
+    Forking is only used on Linux (macOS defaults to spawn because fork is unsafe there) and from a process running
+    no other thread, whose locks and state a forked child could inherit half updated.
+    """
+    return (
+        sys.platform.startswith("linux")
+        and "fork" in multiprocessing.get_all_start_methods()
+        and threading.active_count() == 1
+    )
+
+
+def _init_worker() -> None:
+    """Record the markdown fragments converted by a worker, sent back to the parent with the slides."""
+    MARKDOWN_CACHE.record()
+
+
+def _depends_on(delta: tuple, base: tuple) -> bool:
+    """Check if a slide advancing the counters by delta renders differently from base than from empty counters."""
+    numbers, keyed_numbers, _ = delta
+    if any(base[0].get(name, 0) for name, value in numbers.items() if value):
+        return True
+    return any(
+        base[1].get(name, {}).get(key, 0)
+        for name, keyed in keyed_numbers.items()
+        for key, value in keyed.items()
+        if value
+    )
+
+
+def _render_task(task: tuple) -> tuple:
+    """Render one slide from its starting context state.
+
+    Returns (index, html, context state left, markdown fragments newly cached by the worker).
+    """
+    index, state = task
+    presentation = _WORKER_STATE["presentation"]
+    presentation.context.restore(state)
+    html = _WORKER_STATE["backend"]._fragment(presentation, _WORKER_STATE["items"][index])
+    return index, html, presentation.context.snapshot(), MARKDOWN_CACHE.recorded()
+
+
+def render_fragments(backend, presentation, items: list, jobs: int = 1) -> list:
+    """Render the HTML fragments of slides, in order.
+
+    Parameters
+    ----------
+    backend : AbstractBackend
+        backend rendering each item by its ``_fragment`` method
+    presentation : Presentation
+    items : list
+        slides items, as yielded by ``AbstractBackend._iter_slides``
+    jobs : int
+        number of worker processes; slides are rendered in sequence if jobs <= 1 or if processes cannot be safely
+        forked (see ``parallel_available``)
+
+    Returns
+    -------
+    iterable[str]
+        HTML fragment of each item: a list if rendered in parallel, else a generator rendering them in sequence
+    """
+    if jobs <= 1 or len(items) < 2 or not parallel_available():
+        # rendered lazily, thus a streaming writer holds one slide at a time
+        return (backend._fragment(presentation, item) for item in items)
+    empty = ({}, {}, set())
+    _WORKER_STATE.update(backend=backend, presentation=presentation, items=items)
+    try:
+        with multiprocessing.get_context("fork").Pool(
+            processes=min(jobs, len(items)), initializer=_init_worker
+        ) as pool:
+            chunksize = max(1, len(items) // (jobs * 4))
+            first = pool.map(_render_task, [(i, empty) for i in range(len(items))], chunksize=chunksize)
+            fragments = []
+            bases = []
+            state = presentation.context.snapshot()
+            for _, html, delta, converted in first:
+                fragments.append(html)
+                MARKDOWN_CACHE.update(converted)
+                bases.append(state)
+                state = add_states(state, delta)
+            again = [(i, bases[i]) for i in range(len(items)) if _depends_on(first[i][2], bases[i])]
+            for index, html, _, converted in pool.map(_render_task, again, chunksize=max(1, len(again) // (jobs * 4))):
+                fragments[index] = html
+                MARKDOWN_CACHE.update(converted)
+    finally:
+        _WORKER_STATE.clear()
+    presentation.context.restore(state)
+    backend._update_metadata(presentation, *items[-1][:4])
+    return fragments
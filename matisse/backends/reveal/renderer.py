@@ -38,8 +38,7 @@ from __future__ import annotations
 
 from yattag import Doc
 
-from ...diagram import GRAPHVIZ_CDN_SCRIPTS, MERMAID_CDN_SCRIPT, Diagram
-from ..base import AbstractBackend, indent_html
+from ..base import DEFERRED_SLOT, SLIDES_SLOT, AbstractBackend
 from .theme import PLUGIN_CDN, PLUGIN_JS_NAME, RevealTheme
 
 # CDN base URL (kept in sync with theme.py)
@@ -74,6 +73,10 @@ class RevealBackend(AbstractBackend):
 
     def __init__(self, config):
         self.config = config
+        # theme of the presentation being rendered, set by _prepare()
+        self._theme = None
+        # metadata templates compiled for the presentation being rendered
+        self._metadata_templates: dict = {}
 
     # ------------------------------------------------------------------
     # Private helpers
@@ -83,7 +86,7 @@ class RevealBackend(AbstractBackend):
         """Parse and return the RevealTheme from the presentation YAML blocks."""
         theme = RevealTheme()
         if presentation.yaml_source:
-            theme.get(presentation.yaml_source)
+            theme.get(presentation.yaml_source, documents=presentation.yaml_documents)
         return theme
 
     def _slide_section_attrs(self, slide, theme: RevealTheme) -> dict:
@@ -95,7 +98,7 @@ class RevealBackend(AbstractBackend):
         When decorators are active the ``matisse-decorated`` class is added.
         """
         attrs: dict = {"id": f"slide-{slide.number}"}
-        overrides = theme.parse_slide_overrides(slide.raw_overtheme_yaml)
+        overrides = theme.parse_slide_overrides(slide.raw_overtheme_yaml, documents=slide.overtheme_documents)
         attrs.update(overrides)
         # Phase 5 — per-slide background via heading attributes
         attrs.update(slide.reveal_background_attrs())
@@ -114,7 +117,7 @@ class RevealBackend(AbstractBackend):
         """
         if not theme.has_decorators:
             return []
-        overrides = theme.parse_slide_decorator_overrides(slide.raw_overtheme_yaml)
+        overrides = theme.parse_slide_decorator_overrides(slide.raw_overtheme_yaml, documents=slide.overtheme_documents)
         if not overrides:
             return theme.decorators
         override_by_name = {s.name: s for s in overrides}
@@ -131,20 +134,12 @@ class RevealBackend(AbstractBackend):
     def _resolve_metadata(self, placeholder_str: str, presentation, current) -> str:
         """Substitute metadata placeholders in *placeholder_str*.
 
-        Iterates over all metadata objects in *presentation* and calls their
-        ``parse()`` method, exactly as the impress backend does for decorator
-        content.
+        The placeholder string is compiled once into a ``MetadataTemplate``
+        (shared by all the slides with the same decorator content) and then
+        filled for the current slide, exactly as the impress backend does for
+        decorator content.
         """
-        result = placeholder_str
-        for meta_name in presentation.metadata:
-            result = presentation.metadata[meta_name].parse(
-                parser=presentation.parser,
-                source=result,
-                toc_depth=presentation.metadata["toc_depth"].value,
-                max_time=presentation.metadata["max_time"].value,
-                current=current,
-            )
-        return result
+        return self._metadata_template(presentation, placeholder_str).fill(current=current)
 
     def _put_decorator_div(self, doc, tag, spec, presentation, current) -> None:
         """Emit one ``<div class="slide-{spec.name}">`` with resolved metadata."""
@@ -152,37 +147,6 @@ class RevealBackend(AbstractBackend):
         with tag("div", klass=f"slide-{spec.name}"):
             doc.asis(content)
 
-    def _iter_slides(self, presentation):
-        """Yield ``(chapter, section, subsection, slide, current)`` for every slide."""
-        current = [0, 0, 0, 0]
-        for chapter in presentation.chapters:
-            current[0] += 1
-            current[1] = 0
-            current[2] = 0
-            current[3] = 0
-            for section in chapter.sections:
-                current[1] += 1
-                current[2] = 0
-                current[3] = 0
-                for subsection in section.subsections:
-                    current[2] += 1
-                    current[3] = 0
-                    for slide in subsection.slides:
-                        current[3] += 1
-                        yield chapter, section, subsection, slide, list(current)
-
-    def _update_metadata(self, presentation, chap, sec, subsec, slide) -> None:
-        """Update presentation metadata counters for the current slide."""
-        md = presentation.metadata
-        md["chaptertitle"].update_value(value=chap.title)
-        md["chapternumber"].update_value(value=chap.number)
-        md["sectiontitle"].update_value(value=sec.title)
-        md["sectionnumber"].update_value(value=sec.number)
-        md["subsectiontitle"].update_value(value=subsec.title)
-        md["subsectionnumber"].update_value(value=subsec.number)
-        md["slidetitle"].update_value(value=slide.title)
-        md["slidenumber"].update_value(value=slide.number)
-
     def _render_slide(self, doc, tag, text, presentation, slide, chap, sec, subsec, current, theme):
         """Emit a single ``<section>`` for *slide*.
 
@@ -212,6 +176,7 @@ class RevealBackend(AbstractBackend):
                     current=current,
                     backend="reveal",
                     label_registry=presentation.label_registry,
+                    context=presentation.context,
                 )
                 return
 
@@ -237,6 +202,7 @@ class RevealBackend(AbstractBackend):
                         current=current,
                         backend="reveal",
                         label_registry=presentation.label_registry,
+                        context=presentation.context,
                     )
                     for spec in sidebars:
                         if spec.position != "L":
@@ -250,6 +216,7 @@ class RevealBackend(AbstractBackend):
                     current=current,
                     backend="reveal",
                     label_registry=presentation.label_registry,
+                    context=presentation.context,
                 )
 
             # --- Footers ---
@@ -257,54 +224,50 @@ class RevealBackend(AbstractBackend):
                 if spec.kind == "footer":
                     self._put_decorator_div(doc, tag, spec, presentation, current)
 
-    def _render_linear(self, doc, tag, text, presentation, theme) -> None:
-        """Flat linear sequence of ``<section>`` elements (default layout)."""
-        for chap, sec, subsec, slide, current in self._iter_slides(presentation):
-            self._update_metadata(presentation, chap, sec, subsec, slide)
-            self._render_slide(doc, tag, text, presentation, slide, chap, sec, subsec, current, theme)
+    def _slide_fragment(self, presentation, item) -> str:
+        """Render the ``<section>`` of one slide."""
+        chap, sec, subsec, slide, current = item
+        self._update_metadata(presentation, chap, sec, subsec, slide)
+        doc, tag, text = Doc().tagtext()
+        self._render_slide(doc, tag, text, presentation, slide, chap, sec, subsec, current, self._theme)
+        return doc.getvalue()
 
-    def _render_vertical(self, doc, tag, text, presentation, theme) -> None:
-        """Vertical layout: chapters as outer ``<section>`` groups.
+    def _body_fragments(self, presentation):
+        """Yield the ``<section>`` of each slide, or of each chapter with ``layout: vertical``.
 
-        Each chapter becomes a horizontal step; its slides stack vertically
-        inside a wrapping ``<section>``.  This exposes reveal.js 2D navigation
-        (left/right between chapters, up/down between slides within a chapter).
+        In the vertical layout each chapter becomes a horizontal step; its
+        slides stack vertically inside a wrapping ``<section>``.  This exposes
+        reveal.js 2D navigation (left/right between chapters, up/down between
+        slides within a chapter).
         """
-        current = [0, 0, 0, 0]
-        for chapter in presentation.chapters:
-            current[0] += 1
-            current[1] = 0
-            current[2] = 0
-            current[3] = 0
-            slides_in_chapter = [
-                (sec, subsec, slide)
-                for sec in chapter.sections
-                for subsec in sec.subsections
-                for slide in subsec.slides
-            ]
-            if not slides_in_chapter:
-                continue
-            if len(slides_in_chapter) == 1:
+        if self._theme.layout != "vertical":
+            yield from self._render_fragments(presentation, list(self._iter_slides(presentation)))
+            return
+        groups = []
+        for chapter_items in self._iter_chapters_slides(presentation):
+            if len(chapter_items) == 1:
                 # Single slide in chapter — no need for a wrapping outer section
-                sec, subsec, slide = slides_in_chapter[0]
-                current[1] = current[2] = current[3] = 1
-                self._update_metadata(presentation, chapter, sec, subsec, slide)
-                self._render_slide(doc, tag, text, presentation, slide, chapter, sec, subsec, current, theme)
+                chapter, sec, subsec, slide, current = chapter_items[0]
+                chapter_items = [(chapter, sec, subsec, slide, [current[0], 1, 1, 1])]
+            groups.append(chapter_items)
+        fragments = iter(self._render_fragments(presentation, [item for items in groups for item in items]))
+        for chapter_items in groups:
+            if len(chapter_items) == 1:
+                yield next(fragments)
             else:
-                with tag("section"):
-                    for sec in chapter.sections:
-                        current[1] += 1
-                        current[2] = 0
-                        current[3] = 0
-                        for subsec in sec.subsections:
-                            current[2] += 1
-                            current[3] = 0
-                            for slide in subsec.slides:
-                                current[3] += 1
-                                self._update_metadata(presentation, chapter, sec, subsec, slide)
-                                self._render_slide(
-                                    doc, tag, text, presentation, slide, chapter, sec, subsec, current, theme
-                                )
+                # the chapter group is one balanced fragment
+                yield "<section>" + "".join(next(fragments) for _ in chapter_items) + "</section>"
+
+    def _iter_chapters_slides(self, presentation):
+        """Yield the list of the ``_iter_slides`` items of each chapter having slides."""
+        chapter_items = []
+        for item in self._iter_slides(presentation):
+            if chapter_items and item[0] is not chapter_items[-1][0]:
+                yield chapter_items
+                chapter_items = []
+            chapter_items.append(item)
+        if chapter_items:
+            yield chapter_items
 
     def _put_head(self, doc, tag, text, presentation, theme: RevealTheme, config) -> None:
         with tag("head"):
@@ -329,12 +292,9 @@ class RevealBackend(AbstractBackend):
                 with tag("style"):
                     doc.text(theme.custom_css)
 
-    def _put_scripts(self, doc, tag, theme: RevealTheme, config) -> None:
+    def _put_scripts(self, doc, tag, presentation, theme: RevealTheme, config) -> None:
         # diagram CDN scripts (injected only when needed)
-        if Diagram.has_mermaid:
-            doc.asis(MERMAID_CDN_SCRIPT)
-        if Diagram.has_graphviz:
-            doc.asis(GRAPHVIZ_CDN_SCRIPTS)
+        doc.asis(DEFERRED_SLOT)
 
         # reveal.js core
         with tag("script"):
@@ -418,9 +378,13 @@ class RevealBackend(AbstractBackend):
     # AbstractBackend interface
     # ------------------------------------------------------------------
 
-    def render(self, presentation) -> str:
-        """Generate the complete reveal.js HTML for *presentation*."""
-        theme = self._build_theme(presentation)
+    def _prepare(self, presentation) -> None:
+        self._theme = self._build_theme(presentation)
+        self._metadata_templates = {}
+
+    def _document(self, presentation) -> str:
+        """Generate the reveal.js HTML document for *presentation*, the slides being in place of SLIDES_SLOT."""
+        theme = self._theme
         config = self.config
 
         doc, tag, text = Doc().tagtext()
@@ -430,9 +394,6 @@ class RevealBackend(AbstractBackend):
             with tag("body"):
                 with tag("div", klass="reveal"):
                     with tag("div", klass="slides"):
-                        if theme.layout == "vertical":
-                            self._render_vertical(doc, tag, text, presentation, theme)
-                        else:
-                            self._render_linear(doc, tag, text, presentation, theme)
-                self._put_scripts(doc, tag, theme, config)
-        return indent_html(doc.getvalue())
+                        doc.asis(SLIDES_SLOT)
+                self._put_scripts(doc, tag, presentation, theme, config)
+        return doc.getvalue()
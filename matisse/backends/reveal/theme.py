@@ -260,8 +260,8 @@ class RevealTheme(AbstractTheme):
     # AbstractTheme interface
     # ------------------------------------------------------------------
 
-    def get(self, source: str, name: str = "theme", div_id: str = "") -> None:
-        """Parse reveal theme settings and decorator specs from YAML *source*.
+    def get(self, source: str, name: str = "theme", div_id: str = "", documents: list = None) -> None:
+        """Parse reveal theme settings and decorator specs from YAML *source* (or its already parsed *documents*).
 
         Looks for two distinct YAML keys:
 
@@ -275,7 +275,7 @@ class RevealTheme(AbstractTheme):
             ``sidebar-*``) using the same schema as the impress backend.
         """
         try:
-            for data in load_all(source, Loader=FullLoader):
+            for data in load_all(source, Loader=FullLoader) if documents is None else documents:
                 if not data or not isinstance(data, dict):
                     continue
 
@@ -407,11 +407,12 @@ class RevealTheme(AbstractTheme):
     # Per-slide overrides
     # ------------------------------------------------------------------
 
-    def parse_slide_overrides(self, yaml_src: str) -> dict:
+    def parse_slide_overrides(self, yaml_src: str, documents: list = None) -> dict:
         """Extract reveal-specific per-slide ``<section>`` data-* attributes.
 
-        Reads ``overtheme.reveal`` from *yaml_src* and returns a dict of
-        HTML ``data-*`` attribute key→value pairs.
+        Reads ``overtheme.reveal`` from *yaml_src* (or from its already
+        parsed *documents*) and returns a dict of HTML ``data-*`` attribute
+        key→value pairs.
 
         Supported YAML keys and their ``<section>`` attribute mapping:
 
@@ -431,7 +432,7 @@ class RevealTheme(AbstractTheme):
             return {}
         overrides: dict = {}
         try:
-            for data in load_all(yaml_src, Loader=FullLoader):
+            for data in load_all(yaml_src, Loader=FullLoader) if documents is None else documents:
                 if not data or "overtheme" not in data:
                     continue
                 cfg = data["overtheme"]
@@ -458,11 +459,12 @@ class RevealTheme(AbstractTheme):
             pass
         return overrides
 
-    def parse_slide_decorator_overrides(self, yaml_src: str) -> list[DecoratorSpec]:
+    def parse_slide_decorator_overrides(self, yaml_src: str, documents: list = None) -> list[DecoratorSpec]:
         """Extract per-slide decorator overrides from ``overtheme.layout``.
 
         Returns a list of :class:`DecoratorSpec` objects parsed from
-        ``overtheme.layout.*`` in *yaml_src*.  Returns an empty list when no
+        ``overtheme.layout.*`` in *yaml_src* (or in its already parsed
+        *documents*).  Returns an empty list when no
         ``overtheme.layout`` block is present.
 
         The returned specs are meant to *replace* matching decorators in
@@ -471,7 +473,7 @@ class RevealTheme(AbstractTheme):
         if not yaml_src:
             return []
         try:
-            for data in load_all(yaml_src, Loader=FullLoader):
+            for data in load_all(yaml_src, Loader=FullLoader) if documents is None else documents:
                 if not data or "overtheme" not in data:
                     continue
                 ot = data["overtheme"]
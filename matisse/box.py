@@ -8,6 +8,7 @@ import re
 from yattag import Doc
 
 from .markdown_utils import markdown2html
+from .render_context import CLASS_CONTEXT
 
 
 class Box(object):
@@ -58,7 +59,7 @@ class Box(object):
     regexs: dict
       dictionary of regexs
     boxes_number : int
-      global number of boxes (equals to the number of Box instances)
+      global number of the boxes created without a context (builds number them into their RenderContext)
     """
 
     regexs = {
@@ -82,7 +83,7 @@ class Box(object):
         """Reset to default state."""
         cls.boxes_number = 0
 
-    def __init__(self, ctn_type="box", source=None):
+    def __init__(self, ctn_type="box", source=None, context=None):
         """
         Parameters
         ----------
@@ -90,6 +91,8 @@ class Box(object):
           box content type
         source : str, optional
           string (as single stream) containing the source
+        context : RenderContext, optional
+          build context numbering the box, CLASS_CONTEXT if not passed
 
         Attributes
         ----------
@@ -112,6 +115,7 @@ class Box(object):
         cap : str
           box caption
         """
+        self.context = CLASS_CONTEXT if context is None else context
         self.number = 0
         self.ctn_type = ctn_type
         self.style = None
@@ -122,8 +126,7 @@ class Box(object):
         self.ctn = None
         self.cap = None
         if self.ctn_type == "box":
-            Box.boxes_number += 1
-            self.number = Box.boxes_number
+            self.number = self.context.next_number(Box, "boxes_number")
         if source is not None:
             self.get(source=source)
 
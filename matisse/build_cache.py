@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+build_cache.py, module definition of BuildCache class.
+
+The build cache keeps the rendered HTML of each slide into a directory, thus a rebuild renders only the slides whose
+inputs changed and splices the cached fragments of the other ones. A slide fragment is keyed by a hash of all it is
+rendered from:
+
+* the MaTiSSe.py and Python-Markdown versions, the backend and the rendering options of the configuration;
+* the presentation YAML (theme, metadata; not the slides overthemes) and the metadata values not changing from slide
+  to slide;
+* the slide source, overtheme, heading attributes, position, title and number and the titles and numbers of its
+  chapter, section and subsection;
+* the numbers of the labels the slide references, so renumbered figures or theorems re-render their references.
+
+Two inputs are checked against each cached fragment instead: the counters the slide starts from, for the counters it
+advances (environments numbering), and the TOC, for the fragments containing one (a title change ripples into every
+slide showing the TOC). Each fragment entry stores the counters advanced and the flags set by its slide, restored on a
+hit as if the slide had been rendered.
+
+Entries are JSON files named after their key; the entries not used by a build are pruned at its end. Builds are
+numbered by a counter saved into the cache, each process of a build (parallel workers included) journaling the keys
+it uses into a file named after the build number and its pid, read back by the prune.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+from .markdown_utils import MarkdownCache
+from .metadata import SLIDE_METADATA
+from .render_context import add_states, subtract_states
+
+# bump whenever the entries format or the keys change
+_FORMAT = "2"
+
+# configuration fields changing the slides HTML
+_CONFIG_FIELDS = ("offline", "pdf", "code_highlight", "code_style", "theme")
+
+# marker of a rendered TOC, see Metadata.toc_skeleton
+_TOC_MARKER = '<div class="toc"'
+
+# file of the builds counter, prefix of the journals of the keys used by a build
+_GENERATION = "generation"
+_JOURNAL = "used-"
+
+# variants kept for each key, e.g. a slide rendered from empty and from actual counters by parallel builds
+_MAX_VARIANTS = 4
+
+
+def _digest(*pieces) -> str:
+    """Return the hex digest of pieces, str or bytes-like."""
+    digest = hashlib.blake2b(digest_size=16)
+    for piece in pieces:
+        if isinstance(piece, str):
+            piece = piece.encode("utf-8", "surrogatepass")
+        digest.update(piece)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _projection(state: tuple, delta: tuple) -> list:
+    """Return the values of state for the counters advanced by delta, as JSON-serializable lists."""
+    numbers = {name: state[0].get(name, 0) for name, value in delta[0].items() if value}
+    keyed_numbers = {
+        name: {key: state[1].get(name, {}).get(key, 0) for key, value in keyed.items() if value}
+        for name, keyed in delta[1].items()
+    }
+    return [numbers, {name: keyed for name, keyed in keyed_numbers.items() if keyed}]
+
+
+def _presentation_yaml(presentation) -> str:
+    """Return the YAML all the slides are rendered from: the presentation blocks and, of the blocks into the slides
+    contents, anything but the overthemes, which change the keys of their own slides only."""
+    index = presentation.document_index
+    if index is None:
+        return presentation.yaml_source or ""
+    pieces = []
+    for b, text in enumerate(index.yaml_texts):
+        documents, error = index.yaml_blocks[b] if b in presentation.slide_yaml_blocks else (None, None)
+        if documents is None or error is not None or not all(isinstance(data, dict) for data in documents):
+            pieces.append(text)
+        else:
+            # e.g. a slide block also defining metadata
+            pieces.append(repr([{key: data[key] for key in data if key != "overtheme"} for data in documents]))
+    return "\0".join(pieces)
+
+
+class BuildCache(object):
+    """
+    Persistent cache of rendered slides fragments.
+
+    Attributes
+    ----------
+    directory: str
+      directory the entries are saved into
+    generation: int
+      number of this build, counting the builds into directory
+    hits: int
+      number of slides served by the cache (in this process, parallel workers count their own)
+    misses: int
+      number of slides rendered
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Parameters
+        ----------
+        directory: str
+          directory the entries are saved into, created if missing
+        """
+        self.directory: str = directory
+        self.hits: int = 0
+        self.misses: int = 0
+        self._build_key = ""
+        self._toc_key = ""
+        self._total_slides = ""
+        self._journal = None
+        self._journal_pid = None
+        os.makedirs(directory, exist_ok=True)
+        self.generation: int = self._next_generation()
+
+    def __repr__(self):
+        return f"BuildCache({self.directory}, {self.hits} hits, {self.misses} misses)"
+
+    @staticmethod
+    def version() -> str:
+        """Return the signature of the versions producing the cached fragments."""
+        return f"{_FORMAT}/{MarkdownCache.version()}"
+
+    def start(self, backend, presentation) -> None:
+        """Compute the keys shared by all the slides of a build.
+
+        Parameters
+        ----------
+        backend: AbstractBackend
+        presentation: Presentation
+        """
+        config = backend.config
+        metadata = presentation.metadata
+        constant = [
+            (name, repr(metadata[name].value))
+            for name in sorted(metadata)
+            if name not in SLIDE_METADATA and name != "total_slides_number"
+        ]
+        self._total_slides = str(metadata["total_slides_number"].value)
+        yaml_source = _presentation_yaml(presentation)
+        self._build_key = _digest(
+            self.version(),
+            type(backend).__name__,
+            repr([getattr(config, name) for name in _CONFIG_FIELDS]),
+            yaml_source,
+            repr(constant),
+            # decorators showing the total slides number are defined into the YAML
+            self._total_slides if "total_slides_number" in yaml_source else "",
+        )
+        self._toc_key = _digest(repr(metadata["toc"].value))
+
+    def key(self, presentation, item: tuple) -> str:
+        """Return the cache key of a slide.
+
+        Parameters
+        ----------
+        presentation: Presentation
+        item: tuple
+          (chapter, section, subsection, slide, current), as yielded by AbstractBackend._iter_slides
+
+        Returns
+        -------
+        str
+        """
+        chapter, section, subsection, slide, current = item
+        contents = slide.raw_contents or ""
+        if not isinstance(contents, str):
+            contents = bytes(contents)
+        references = []
+        if ("@" if isinstance(contents, str) else b"@") in contents:
+            references = presentation.label_registry.references(slide.contents)
+        total = "total_slides_number" if isinstance(contents, str) else b"total_slides_number"
+        uses_total = total in contents or "total_slides_number" in slide.raw_overtheme_yaml
+        sectioning = [(part.number, part.title) for part in (chapter, section, subsection)]
+        return _digest(
+            self._build_key,
+            repr(sectioning),
+            repr((slide.number, slide.title, slide.heading_attrs, slide.position, list(current))),
+            slide.raw_overtheme_yaml,
+            repr(references),
+            self._total_slides if uses_total else "",
+            contents,
+        )
+
+    def _next_generation(self) -> int:
+        """Return the number of this build, saving it as the last one."""
+        path = os.path.join(self.directory, _GENERATION)
+        try:
+            with open(path) as stream:
+                generation = int(stream.read()) + 1
+        except (OSError, ValueError):
+            generation = 1
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as stream:
+            stream.write(str(generation))
+        os.replace(temporary, path)
+        return generation
+
+    def _use(self, key: str) -> None:
+        """Journal a key used by this build, into the journal of the current process."""
+        if self._journal_pid != os.getpid():
+            # the journal of the parent process is not shared by the forked workers
+            self._journal = open(os.path.join(self.directory, f"{_JOURNAL}{self.generation}-{os.getpid()}"), "a")
+            self._journal_pid = os.getpid()
+        self._journal.write(key + "\n")
+        self._journal.flush()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _load(self, key: str) -> list:
+        """Return the variants cached for a key, an empty list if there are none or they are unreadable."""
+        try:
+            with open(self._path(key)) as stream:
+                variants = json.load(stream)
+        except (OSError, ValueError):
+            return []
+        return variants if isinstance(variants, list) else []
+
+    def _save(self, key: str, variants: list) -> None:
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as stream:
+            json.dump(variants, stream)
+        os.replace(temporary, path)
+        self._use(key)
+
+    def fragment(self, backend, presentation, item: tuple) -> str:
+        """Return the HTML fragment of a slide, from the cache or rendered (and cached) by the backend.
+
+        Either way the presentation context is left as the slide rendering leaves it.
+
+        Parameters
+        ----------
+        backend: AbstractBackend
+        presentation: Presentation
+        item: tuple
+          (chapter, section, subsection, slide, current), as yielded by AbstractBackend._iter_slides
+
+        Returns
+        -------
+        str
+        """
+        key = self.key(presentation, item)
+        context = presentation.context
+        state = context.snapshot()
+        variants = self._load(key)
+        for variant in variants:
+            delta = (variant["delta"][0], variant["delta"][1], set(variant["delta"][2]))
+            if variant["base"] != _projection(state, delta):
+                continue
+            if variant["toc"] is not None and variant["toc"] != self._toc_key:
+                continue
+            self.hits += 1
+            backend._update_metadata(presentation, *item[:4])
+            context.restore(add_states(state, delta))
+            self._use(key)
+            return variant["html"]
+        self.misses += 1
+        # flags are cleared for the slide to tell the ones it sets even if they were already set
+        context.restore((state[0], state[1], set()))
+        html = backend._slide_fragment(presentation, item)
+        delta = subtract_states(context.snapshot(), (state[0], state[1], set()))
+        context.restore(add_states(state, delta))
+        base = _projection(state, delta)
+        variants = [variant for variant in variants if variant["base"] != base]
+        variants.insert(
+            0,
+            {
+                "base": base,
+                "delta": [delta[0], delta[1], sorted(delta[2])],
+                "toc": self._toc_key if _TOC_MARKER in html else None,
+                "html": html,
+            },
+        )
+        self._save(key, variants[:_MAX_VARIANTS])
+        return html
+
+    def prune(self) -> int:
+        """Remove the entries not used by the current build, and the journals.
+
+        Returns
+        -------
+        int
+          number of entries removed
+        """
+        if self._journal is not None and self._journal_pid == os.getpid():
+            self._journal.close()
+            self._journal = None
+        used = set()
+        names = os.listdir(self.directory)
+        for name in names:
+            if name.startswith(f"{_JOURNAL}{self.generation}-"):
+                with open(os.path.join(self.directory, name)) as stream:
+                    used.update(stream.read().split())
+        removed = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if name.startswith(_JOURNAL):
+                    # older journals are left by interrupted builds
+                    os.remove(path)
+                elif name.endswith(".json") and name[: -len(".json")] not in used:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
@@ -21,6 +21,7 @@ import re
 from yattag import Doc
 
 from .markdown_utils import markdown2html
+from .render_context import CLASS_CONTEXT
 
 # Left-border colours per callout type (applied inline as CSS variables).
 _CALLOUT_COLORS = {
@@ -73,9 +74,9 @@ class Callout:
         """Reset to default state."""
         cls.callouts_number = 0
 
-    def __init__(self, source=None):
-        Callout.callouts_number += 1
-        self.number = Callout.callouts_number
+    def __init__(self, source=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
+        self.number = self.context.next_number(Callout, "callouts_number")
         self.ctype = "note"
         self.title = None
         self.content = ""
@@ -5,6 +5,7 @@ chapter.py, module definition of Chapter class.
 
 from collections import OrderedDict
 
+from .render_context import CLASS_CONTEXT
 from .section import Section
 
 
@@ -25,7 +26,8 @@ class Chapter(object):
         cls.sections_number = 0
         Section.reset()
 
-    def __init__(self, number, title=None):
+    def __init__(self, number, title=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
         self.number = number
         self.title = title
         self.sections = []
@@ -49,7 +51,7 @@ class Chapter(object):
         ----------
         section: Section
         """
-        Chapter.sections_number += 1
+        self.context.next_number(Chapter, "sections_number")
         self.sections.append(section)
         self.update_toc()
 
@@ -5,7 +5,7 @@ matisse.cli — Typer-based command-line interface for MaTiSSe.py.
 import os
 import sys
 
-from . import _command  # noqa: F401 — registers @app.command() via side effect
+from . import _command, _serve  # noqa: F401 — registers @app.command() via side effect
 from ._app import app
 
 # ---------------------------------------------------------------------------
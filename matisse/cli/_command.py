@@ -11,11 +11,24 @@ import typer
 
 from ..matisse import __sample__, make_presentation
 from ..matisse_config import MatisseConfig
+from ..watcher import read_source, watch_presentation
 from ._app import _ns, app
 from ._options import (
+    AssetCheckOpt,
+    AssetLinkOpt,
     BackendOpt,
+    BuildCacheOpt,
     CodeStyleOpt,
     InputOpt,
+    JobsOpt,
+    MdCacheOpt,
+    MdCacheSizeOpt,
+    MinifyOpt,
+    MirrorDeleteOpt,
+    MirrorJobsOpt,
+    MirrorLinkOpt,
+    MmapOpt,
+    NoIndentOpt,
     OfflineOpt,
     OutputOpt,
     PdfOpt,
@@ -28,6 +41,7 @@ from ._options import (
     TocAtSecOpt,
     TocAtSubsecOpt,
     VerboseOpt,
+    WatchOpt,
 )
 
 
@@ -36,6 +50,8 @@ def build(
     # I/O group
     input: InputOpt = None,
     output: OutputOpt = None,
+    mmap_source: MmapOpt = False,
+    watch: WatchOpt = False,
     # Sample group
     sample: SampleOpt = None,
     theme: ThemeOpt = None,
@@ -44,6 +60,17 @@ def build(
     offline: OfflineOpt = False,
     pdf: PdfOpt = False,
     code_style: CodeStyleOpt = "default",
+    jobs: JobsOpt = 1,
+    no_indent: NoIndentOpt = False,
+    minify: MinifyOpt = False,
+    md_cache_size: MdCacheSizeOpt = 4096,
+    md_cache: MdCacheOpt = None,
+    build_cache: BuildCacheOpt = None,
+    asset_link: AssetLinkOpt = "copy",
+    asset_check: AssetCheckOpt = "mtime",
+    mirror_link: MirrorLinkOpt = "copy",
+    mirror_jobs: MirrorJobsOpt = 4,
+    mirror_delete: MirrorDeleteOpt = False,
     # TOC group
     toc_at_chap_beginning: TocAtChapOpt = None,
     toc_at_sec_beginning: TocAtSecOpt = None,
@@ -69,6 +96,18 @@ def build(
         toc_at_subsec_beginning=toc_at_subsec_beginning,
         pdf=pdf,
         print_parsed_source=print_parsed_source,
+        mmap_source=mmap_source,
+        jobs=jobs,
+        no_indent=no_indent,
+        minify=minify,
+        md_cache_size=md_cache_size,
+        md_cache=md_cache,
+        build_cache=build_cache,
+        asset_link=asset_link,
+        asset_check=asset_check,
+        mirror_link=mirror_link,
+        mirror_jobs=mirror_jobs,
+        mirror_delete=mirror_delete,
     )
     config = MatisseConfig(cliargs=cliargs)
 
@@ -98,8 +137,8 @@ def build(
         typer.echo(f'Error: input file "{input}" not found.', err=True)
         raise typer.Exit(1)
 
-    with open(input) as f:
-        source = f.read()
-
     out = os.path.normpath(output or os.path.splitext(os.path.basename(input))[0])
-    make_presentation(config=config, source=source, output=out)
+    if watch:
+        watch_presentation(config=config, source_path=input, output=out)
+        return
+    make_presentation(config=config, source=read_source(config, input), output=out, source_path=input)
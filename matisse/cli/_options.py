@@ -29,6 +29,47 @@ OutputOpt = Annotated[
     ),
 ]
 
+MmapOpt = Annotated[
+    bool,
+    typer.Option(
+        "--mmap",
+        help="Memory-map the input and included files and tokenize them as bytes; slide contents are decoded only "
+        "when rendered. Lowers memory use on very large sources.",
+    ),
+]
+
+WatchOpt = Annotated[
+    bool,
+    typer.Option(
+        "--watch",
+        "-w",
+        help="Keep running after the build, building again whenever the input, an included file, a css_overtheme "
+        "file or a dirs_to_copy directory changes. Uses inotify if the inotify_simple package is installed, "
+        "polling otherwise.",
+    ),
+]
+
+# ---------------------------------------------------------------------------
+# Serve group
+# ---------------------------------------------------------------------------
+
+HostOpt = Annotated[
+    str,
+    typer.Option("--host", metavar="HOST", help="Address the live-preview server listens on (default: 127.0.0.1)."),
+]
+
+PortOpt = Annotated[
+    int,
+    typer.Option(
+        "--port",
+        "-p",
+        metavar="PORT",
+        min=0,
+        max=65535,
+        help="Port the live-preview server listens on (default: 8000, 0 for any free port).",
+    ),
+]
+
 # ---------------------------------------------------------------------------
 # Sample group
 # ---------------------------------------------------------------------------
@@ -92,6 +133,110 @@ CodeStyleOpt = Annotated[
     ),
 ]
 
+JobsOpt = Annotated[
+    int,
+    typer.Option(
+        "--jobs",
+        "-j",
+        metavar="N",
+        min=1,
+        help="Render the slides in N worker processes (default: 1, sequential rendering). Linux only.",
+    ),
+]
+
+NoIndentOpt = Annotated[
+    bool,
+    typer.Option(
+        "--no-indent",
+        help="Write index.html as rendered, without indenting it.",
+    ),
+]
+
+MinifyOpt = Annotated[
+    bool,
+    typer.Option(
+        "--minify",
+        help="Write index.html minified (collapsed whitespace, no empty attributes) instead of indented.",
+    ),
+]
+
+MdCacheSizeOpt = Annotated[
+    int,
+    typer.Option(
+        "--md-cache-size",
+        metavar="N",
+        min=0,
+        help="Maximum number of converted Markdown fragments kept in memory (default: 4096). 0 disables the cache.",
+    ),
+]
+
+MdCacheOpt = Annotated[
+    str | None,
+    typer.Option(
+        "--md-cache",
+        metavar="FILE",
+        help="Load the converted Markdown fragments from FILE and save them back after the build, so unchanged "
+        "fragments are not converted again by the next build.",
+    ),
+]
+
+BuildCacheOpt = Annotated[
+    str | None,
+    typer.Option(
+        "--build-cache",
+        metavar="DIR",
+        help="Cache the rendered slides into DIR, so the next build renders only the slides that changed.",
+    ),
+]
+
+AssetLinkOpt = Annotated[
+    str,
+    typer.Option(
+        "--asset-link",
+        metavar="MODE",
+        help='How the MaTiSSe assets are brought into the output: "copy" (default), "hardlink", "symlink" or '
+        '"reflink". Links fall back to copies where the filesystem does not support them.',
+    ),
+]
+
+AssetCheckOpt = Annotated[
+    str,
+    typer.Option(
+        "--asset-check",
+        metavar="MODE",
+        help='How changed assets and dirs_to_copy files are detected: "mtime" (size and modification time, '
+        'default) or "hash" (contents).',
+    ),
+]
+
+MirrorLinkOpt = Annotated[
+    str,
+    typer.Option(
+        "--mirror-link",
+        metavar="MODE",
+        help='How the dirs_to_copy files are brought into the output: "copy" (default), "hardlink", "symlink" or '
+        '"reflink".',
+    ),
+]
+
+MirrorJobsOpt = Annotated[
+    int,
+    typer.Option(
+        "--mirror-jobs",
+        metavar="N",
+        min=1,
+        help="Check and transfer the dirs_to_copy files in N threads (default: 4).",
+    ),
+]
+
+MirrorDeleteOpt = Annotated[
+    bool,
+    typer.Option(
+        "--mirror-delete",
+        help="Remove from the output the dirs_to_copy files removed from their directories.",
+    ),
+]
+
 # ---------------------------------------------------------------------------
 # TOC group
 # ---------------------------------------------------------------------------
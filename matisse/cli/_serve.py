@@ -0,0 +1,88 @@
+"""
+_serve.py — MaTiSSe.py serve command.
+
+Registers the @app.command() building a presentation into memory and serving
+it with live reload (see matisse.server).
+"""
+
+import os
+
+import typer
+
+from ..matisse_config import MatisseConfig
+from ..server import serve_presentation
+from ._app import _ns, app
+from ._options import (
+    BackendOpt,
+    BuildCacheOpt,
+    CodeStyleOpt,
+    HostOpt,
+    InputOpt,
+    JobsOpt,
+    MdCacheOpt,
+    MdCacheSizeOpt,
+    MmapOpt,
+    OfflineOpt,
+    PortOpt,
+    ThemeOpt,
+    TocAtChapOpt,
+    TocAtSecOpt,
+    TocAtSubsecOpt,
+    VerboseOpt,
+)
+
+
+@app.command()
+def serve(
+    # I/O group
+    input: InputOpt = None,
+    mmap_source: MmapOpt = False,
+    # Serve group
+    host: HostOpt = "127.0.0.1",
+    port: PortOpt = 8000,
+    theme: ThemeOpt = None,
+    # Rendering group
+    backend: BackendOpt = "impress",
+    offline: OfflineOpt = False,
+    code_style: CodeStyleOpt = "default",
+    jobs: JobsOpt = 1,
+    md_cache_size: MdCacheSizeOpt = 4096,
+    md_cache: MdCacheOpt = None,
+    build_cache: BuildCacheOpt = None,
+    # TOC group
+    toc_at_chap_beginning: TocAtChapOpt = None,
+    toc_at_sec_beginning: TocAtSecOpt = None,
+    toc_at_subsec_beginning: TocAtSubsecOpt = None,
+    # Debug group
+    verbose: VerboseOpt = False,
+) -> None:
+    """Serve a live preview of a presentation, built into memory and reloaded in the browser on changes."""
+
+    cliargs = _ns(
+        backend=backend,
+        verbose=verbose,
+        offline=offline,
+        code_style=code_style,
+        theme=theme,
+        toc_at_chap_beginning=toc_at_chap_beginning,
+        toc_at_sec_beginning=toc_at_sec_beginning,
+        toc_at_subsec_beginning=toc_at_subsec_beginning,
+        pdf=False,
+        print_parsed_source=False,
+        mmap_source=mmap_source,
+        jobs=jobs,
+        md_cache_size=md_cache_size,
+        md_cache=md_cache,
+        build_cache=build_cache,
+    )
+    config = MatisseConfig(cliargs=cliargs)
+
+    if not input:
+        typer.echo("Error: --input is required for serving a presentation.", err=True)
+        raise typer.Exit(1)
+
+    if not os.path.exists(input):
+        typer.echo(f'Error: input file "{input}" not found.', err=True)
+        raise typer.Exit(1)
+
+    serve_presentation(config=config, source_path=input, host=host, port=port)
@@ -19,15 +19,17 @@ For Mermaid diagrams the presenter must include the Mermaid CDN script in the
 page (see ``ImpressBackend`` / ``RevealBackend`` for injection logic).  For
 Graphviz / dot diagrams, d3-graphviz is used.
 
-Set ``Diagram.has_mermaid`` or ``Diagram.has_graphviz`` to detect at render
-time whether the CDN scripts are needed (both are class-level flags reset by
-``Diagram.reset()``).
+The ``has_mermaid`` and ``has_graphviz`` flags of the build ``RenderContext``
+tell at render time whether the CDN scripts are needed (diagrams created
+without a context set the class-level flags, reset by ``Diagram.reset()``).
 """
 
 import re
 
 from yattag import Doc
 
+from .render_context import CLASS_CONTEXT
+
 # CDN script snippets (injected by renderers when the flags are set)
 MERMAID_CDN_SCRIPT = """\
 <script type="module">
@@ -55,9 +57,9 @@ class Diagram:
     ``{dot}``.  An optional ``%%| fig-cap:`` first-line annotation is stripped
     from the source before rendering.
 
-    Class-level flags ``has_mermaid`` and ``has_graphviz`` are set whenever a
-    diagram of the respective type is instantiated; they are checked by
-    renderers to decide whether to inject CDN scripts.
+    The ``has_mermaid`` and ``has_graphviz`` flags of the diagram context are
+    set whenever a diagram of the respective type is instantiated; they are
+    checked by renderers to decide whether to inject CDN scripts.
     """
 
     regexs = {
@@ -79,9 +81,9 @@ class Diagram:
         cls.has_mermaid = False
         cls.has_graphviz = False
 
-    def __init__(self, source=None):
-        Diagram.diagrams_number += 1
-        self.number = Diagram.diagrams_number
+    def __init__(self, source=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
+        self.number = self.context.next_number(Diagram, "diagrams_number")
         self.engine = "mermaid"
         self.caption = ""
         self.source = ""
@@ -96,11 +98,11 @@ class Diagram:
         self.engine = m.group("engine")
         self.caption = (m.group("caption") or "").strip()
         self.source = (m.group("source") or "").strip()
-        # Update class-level flags
+        # Update the engines flags
         if self.engine == "mermaid":
-            Diagram.has_mermaid = True
+            self.context.set_flag(Diagram, "has_mermaid")
         else:
-            Diagram.has_graphviz = True
+            self.context.set_flag(Diagram, "has_graphviz")
 
     def to_html(self, backend="impress"):
         """Return the diagram HTML fragment."""
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+document_index.py, module definition of DocumentIndex class.
+
+The index is computed once per build from the (include-expanded) source: a single Parser.scan collects codeblocks,
+YAML blocks, fenced divs and headings, and each YAML block is parsed once. Metadata, theme, slides overthemes and
+document tree parsing all read from it instead of tokenizing (and parsing the YAML of) the source on their own.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+
+from yaml import FullLoader, YAMLError, load_all
+
+# documents markers and merge keys: blocks containing them do not read as their own mapping once concatenated
+_NOT_MERGEABLE = re.compile(r"^(?:---|\.\.\.|\s*<<\s*:)", re.MULTILINE)
+
+
+def _is_mergeable(text: str) -> bool:
+    """Check if a YAML block, once concatenated to the others, reads as its own top-level block mapping.
+
+    It must start at column 0 with a plain key (not with a flow collection, an explicit key, an anchor, a tag, a
+    directive...) and must not contain documents markers or merge keys.
+    """
+    if _NOT_MERGEABLE.search(text):
+        return False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        return line[0] not in " \t{[?&!%*|>-"
+    return True
+
+
+class DocumentIndex(object):
+    """
+    Per-build index of a MaTiSSe.py source.
+
+    Attributes
+    ----------
+    tokens: dict
+      tokens lists as returned by Parser.scan (codeblocks, yamlblocks, fenceddivs, chapters, sections, subsections,
+      slides); the sectioning ones are completed by Parser.tokenize
+    yaml_texts: list
+      contents of each YAML block, without the '---' delimiters
+    yaml_source: str
+      concatenation of the YAML blocks contents
+    """
+
+    def __init__(self, parser, source) -> None:
+        """
+        Parameters
+        ----------
+        parser: Parser
+        source: str|bytes|mmap
+          include-expanded source
+        """
+        self.tokens: dict = parser.scan(source=source)
+        self.yaml_texts: list = [parser.decode(block.group()).strip("---") for block in self.tokens["yamlblocks"]]
+        self.yaml_source: str = "".join(self.yaml_texts)
+        self._yaml_starts = [block.start for block in self.tokens["yamlblocks"]]
+        self._yaml_blocks = None
+        self._yaml_documents = None
+
+    @property
+    def codeblocks(self) -> list:
+        """Codeblocks tokens."""
+        return self.tokens["codeblocks"]
+
+    @property
+    def yamlblocks(self) -> list:
+        """YAML blocks tokens."""
+        return self.tokens["yamlblocks"]
+
+    @property
+    def fenceddivs(self) -> list:
+        """Fenced divs tokens."""
+        return self.tokens["fenceddivs"]
+
+    def headings(self, kind: str) -> list:
+        """Return the headings tokens of a kind ('chapters', 'sections', 'subsections' or 'slides')."""
+        return self.tokens[kind]
+
+    @property
+    def yaml_blocks(self) -> list:
+        """Parsed YAML blocks: for each block the pair (documents, error), error being the YAMLError stopping it.
+
+        Each block is parsed (once, at the first access) on its own; documents preceding an error are kept.
+        """
+        if self._yaml_blocks is None:
+            self._yaml_blocks = []
+            for text in self.yaml_texts:
+                documents = []
+                error = None
+                try:
+                    for data in load_all(text, Loader=FullLoader):
+                        documents.append(data)
+                except YAMLError as exc:
+                    error = exc
+                self._yaml_blocks.append((documents, error))
+        return self._yaml_blocks
+
+    @property
+    def yaml_documents(self) -> list:
+        """Documents of yaml_source, i.e. of all the YAML blocks read as one stream.
+
+        Raises
+        ------
+        YAMLError
+          if yaml_source is not valid YAML
+        """
+        if self._yaml_documents is None:
+            self._yaml_documents = self.merged_documents(range(len(self.yaml_texts)))
+        return self._yaml_documents
+
+    def yaml_blocks_between(self, start: int, end: int) -> list:
+        """Return the indexes of the YAML blocks fully contained into [start, end].
+
+        Parameters
+        ----------
+        start: int
+        end: int
+
+        Returns
+        -------
+        list
+        """
+        first = bisect_left(self._yaml_starts, start)
+        last = bisect_right(self._yaml_starts, end)
+        return [b for b in range(first, last) if self.yamlblocks[b].end <= end]
+
+    def merged_documents(self, blocks) -> list:
+        """Documents of the concatenation of some YAML blocks contents.
+
+        Concatenated top-level block mappings read as the merge (later keys winning) of the blocks mappings, thus the
+        already parsed blocks are merged; the concatenation is parsed only if some block cannot be merged this way.
+
+        Parameters
+        ----------
+        blocks: iterable
+          indexes of the YAML blocks
+
+        Returns
+        -------
+        list
+
+        Raises
+        ------
+        YAMLError
+          if the concatenation is not valid YAML
+        """
+        blocks = list(blocks)
+        merged = {}
+        for b in blocks:
+            documents, error = self.yaml_blocks[b]
+            mergeable = error is None and len(documents) <= 1 and _is_mergeable(self.yaml_texts[b])
+            if mergeable and len(documents) == 1:
+                mergeable = isinstance(documents[0], dict)
+            if not mergeable:
+                return list(load_all("".join(self.yaml_texts[b] for b in blocks), Loader=FullLoader))
+            if len(documents) == 1:
+                merged.update(documents[0])
+        return [merged] if len(merged) > 0 else []
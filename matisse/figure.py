@@ -43,22 +43,23 @@ class Figure(Box):
         """Reset to default state."""
         cls.figures_number = 0
 
-    def __init__(self, source=None):
+    def __init__(self, source=None, context=None):
         """
         Parameters
         ----------
         source : str, optional
           string (as single stream) containing the source
+        context : RenderContext, optional
+          build context numbering the figure, CLASS_CONTEXT if not passed
 
         Attributes
         ----------
         number : int
           number of figure
         """
-        super(Figure, self).__init__(ctn_type="figure")
+        super(Figure, self).__init__(ctn_type="figure", context=context)
         self.cap_type = "Figure"
-        Figure.figures_number += 1
-        self.number = Figure.figures_number
+        self.number = self.context.next_number(Figure, "figures_number")
         if source:
             self.get(source=source)
 
@@ -32,6 +32,7 @@ import re
 from yattag import Doc
 
 from .figure import Figure
+from .render_context import CLASS_CONTEXT
 
 _SUBLABELS = "abcdefghijklmnopqrstuvwxyz"
 
@@ -54,9 +55,9 @@ class FigureGroup:
         """Reset to default state."""
         cls.groups_number = 0
 
-    def __init__(self, source=None):
-        FigureGroup.groups_number += 1
-        self.number = FigureGroup.groups_number
+    def __init__(self, source=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
+        self.number = self.context.next_number(FigureGroup, "groups_number")
         self.gid = ""
         self.ncol: int = 1
         self.layout: list | None = None  # [[60,40],[100]] style
@@ -101,7 +102,7 @@ class FigureGroup:
         self.group_caption = paras[-1] if paras else ""
         # Parse figures
         for fs in fig_sources:
-            self.figures.append(Figure(source=fs))
+            self.figures.append(Figure(source=fs, context=self.context))
 
     def _grid_css(self) -> str:
         """Return CSS ``grid-template-columns`` value."""
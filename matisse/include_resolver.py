@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+include_resolver.py, module definition of IncludeResolver class.
+
+The resolver expands the $include(path) statements of MaTiSSe.py sources: each included file is read once (its
+contents being cached by path and modification time), expanded once per resolution however many times it is
+included, and cyclic inclusions are detected instead of recursing forever.
+
+Sources may also be bytes-like (e.g. memory-mapped with map_file): included files are then memory-mapped too and
+the expansion is done on bytes, without decoding anything.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import sys
+from dataclasses import dataclass
+
+MAIN_SOURCE = "<source>"
+
+
+def map_file(path: str):
+    """Memory-map a file read-only.
+
+    Line endings are translated as reading the file in text mode does: a file containing carriage returns is not
+    mapped, its contents are read into bytes with their CRLF and CR line endings replaced by LF.
+
+    Parameters
+    ----------
+    path: str
+
+    Returns
+    -------
+    mmap|bytes
+      read-only memory map of the file, empty bytes for empty files (they cannot be mapped), bytes with translated
+      line endings for files containing carriage returns
+    """
+    with open(path, "rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            return b""
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped.find(b"\r") < 0:
+        return mapped
+    with mapped:
+        return mapped[:].replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+@dataclass
+class IncludeSegment:
+    """One run of the expanded source copied verbatim from a single file."""
+
+    start: int  # start offset into the expanded source
+    end: int  # end offset into the expanded source
+    path: str  # originating file, MAIN_SOURCE for the main source
+    offset: int  # start offset into the originating file
+
+
+class IncludeResolver(object):
+    """
+    Resolver of $include statements.
+
+    Attributes
+    ----------
+    graph: dict
+      include graph of the last resolution: for each including file the list of the files it includes
+    reads: int
+      number of files actually read from disk (cache misses)
+    sources: dict
+      contents of each file expanded by the last resolution (the main source included), keyed as into graph
+    """
+
+    def __init__(self, parser):
+        """
+        Parameters
+        ----------
+        parser: Parser
+          parser providing the codeblock and includeblock regexs
+        """
+        self.parser = parser
+        self.graph: dict = {}
+        self.reads = 0
+        self.sources: dict = {}
+        self._cache: dict = {}
+
+    def read(self, path: str, binary: bool = False):
+        """Read a file, reusing its cached contents if it has not been modified since the last read.
+
+        Parameters
+        ----------
+        path: str
+        binary: bool
+          memory-map the file instead of reading it as text
+
+        Returns
+        -------
+        str|mmap|bytes:
+          file contents
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size, binary)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if binary:
+            contents = map_file(key)
+        else:
+            with open(key, "r") as inc:
+                contents = inc.read()
+        self.reads += 1
+        self._cache[key] = (signature, contents)
+        return contents
+
+    def files(self) -> list:
+        """Return all the files included (directly or not) by the last resolution."""
+        files = []
+        for included in self.graph.values():
+            for path in included:
+                if path not in files:
+                    files.append(path)
+        return files
+
+    def resolve(self, source: str, origin: str = MAIN_SOURCE) -> tuple:
+        """Recursively expand the $include statements of source.
+
+        Parameters
+        ----------
+        source: str|bytes|mmap
+          input stream
+        origin: str
+          name of the input stream used into the include graph and into the offsets map
+
+        Returns
+        -------
+        str|bytes|mmap:
+          expanded source, of the same type of source (bytes if any inclusion has been expanded into a mmap)
+        list:
+          offsets map, sorted list of IncludeSegment covering the expanded source
+        """
+        self.graph = {}
+        self.sources = {origin: source}
+        return self._expand(source=source, origin=origin, stack=[os.path.abspath(origin)], expanded={})
+
+    def _expand_file(self, path, stack, expanded, binary):
+        """Expand an included file, at most once per resolution."""
+        key = os.path.abspath(path)
+        if key not in expanded:
+            self.sources[path] = self.read(path, binary=binary)
+            expanded[key] = self._expand(source=self.sources[path], origin=path, stack=stack + [key], expanded=expanded)
+        return expanded[key]
+
+    def _expand(self, source, origin, stack, expanded):
+        """Expand the $include statements of source, returning the expanded source and its offsets map."""
+        codeblocks = self.parser.tokenizer(source=source, re_search=self.parser.regexs["codeblock"])
+        includeblocks = self.parser.tokenizer(
+            source=source, re_search=self.parser.regexs["includeblock"], exclude=codeblocks, groups=("include",)
+        )
+        self.graph.setdefault(origin, [])
+        if len(includeblocks) == 0:
+            return source, [IncludeSegment(0, len(source), origin, 0)] if len(source) > 0 else []
+        binary = not isinstance(source, str)
+        pieces = []
+        segments = []
+        position = 0
+        cursor = 0
+        for includeblock in includeblocks:
+            if includeblock.start > cursor:
+                pieces.append(source[cursor : includeblock.start])
+                segments.append(IncludeSegment(position, position + len(pieces[-1]), origin, cursor))
+                position += len(pieces[-1])
+            include_file = self.parser.decode(includeblock.group("include"))
+            self.graph[origin].append(include_file)
+            if not os.path.exists(include_file):
+                sys.stderr.write(f'Error: cannot include "{include_file}"')
+                sys.exit(1)
+            if os.path.abspath(include_file) in stack:
+                sys.stderr.write(f'Error: cyclic include of "{include_file}" from "{origin}"')
+                sys.exit(1)
+            other_source, other_segments = self._expand_file(
+                path=include_file, stack=stack, expanded=expanded, binary=binary
+            )
+            pieces.append(other_source)
+            for segment in other_segments:
+                segments.append(
+                    IncludeSegment(segment.start + position, segment.end + position, segment.path, segment.offset)
+                )
+            position += len(other_source)
+            cursor = includeblock.end
+        if cursor < len(source):
+            pieces.append(source[cursor:])
+            segments.append(IncludeSegment(position, position + len(pieces[-1]), origin, cursor))
+        return (b"" if binary else "").join(pieces), segments
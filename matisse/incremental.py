@@ -22,6 +22,7 @@ import re
 from yattag import Doc
 
 from .markdown_utils import markdown2html
+from .render_context import CLASS_CONTEXT
 
 # A standalone ". . ." line (may have surrounding whitespace / blank lines).
 PAUSE_RE = re.compile(r"(?:^|\n)[ \t]*\. \. \.[ \t]*(?=\n|$)")
@@ -45,9 +46,9 @@ class IncrementalList:
         """Reset to default state."""
         cls.incremental_number = 0
 
-    def __init__(self, source=None):
-        IncrementalList.incremental_number += 1
-        self.number = IncrementalList.incremental_number
+    def __init__(self, source=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
+        self.number = self.context.next_number(IncrementalList, "incremental_number")
         self.items: list[str] = []
         if source:
             self.get(source=source)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+interval_index.py, module definition of IntervalIndex class.
+
+The index answers "is the span [start, end] fully contained into one of the indexed ranges?" in O(log n), it being
+used by Parser.tokenizer for excluding matches falling into codeblocks, inline codes, YAML blocks, etc...
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Iterable, Optional
+
+
+class IntervalIndex(object):
+    """
+    Sorted index of (possibly overlapping) [start, end] ranges.
+
+    Ranges are sorted by start and paired with the running maximum of their ends: the ranges starting at or before
+    a given position are a prefix of the sorted list, thus one of them contains [start, end] if and only if the
+    maximum end of that prefix reaches end.
+    """
+
+    def __init__(self, ranges: Optional[Iterable] = None) -> None:
+        """
+        Parameters
+        ----------
+        ranges: iterable
+          tokens (objects with start and end attributes), (start, end) tuples or other IntervalIndex
+
+        Attributes
+        ----------
+        ranges: list
+          sorted (start, end) ranges
+        starts: list
+          sorted ranges starts
+        max_ends: list
+          running maximum of ranges ends
+        """
+        self.ranges: list = []
+        self.starts: list = []
+        self.max_ends: list = []
+        if ranges is not None:
+            self.update(ranges)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        return f"IntervalIndex({len(self)} ranges)"
+
+    @staticmethod
+    def _spans(ranges):
+        """Yield the (start, end) spans of ranges."""
+        if isinstance(ranges, IntervalIndex):
+            yield from ranges.ranges
+            return
+        for item in ranges:
+            if isinstance(item, tuple):
+                yield item[0], item[1]
+            else:
+                yield item.start, item.end
+
+    def update(self, ranges: Iterable) -> IntervalIndex:
+        """Add ranges to the index.
+
+        Parameters
+        ----------
+        ranges: iterable
+          tokens (objects with start and end attributes), (start, end) tuples or other IntervalIndex
+
+        Returns
+        -------
+        IntervalIndex
+          self, for chaining
+        """
+        self.ranges = sorted(self.ranges + list(self._spans(ranges)))
+        self.starts = [start for start, _ in self.ranges]
+        self.max_ends = []
+        max_end = -1
+        for _, end in self.ranges:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+        return self
+
+    def union(self, *others: Iterable) -> IntervalIndex:
+        """Return a new index containing the ranges of self and of others."""
+        index = IntervalIndex(self)
+        for other in others:
+            index.update(other)
+        return index
+
+    def contains(self, start: int, end: int) -> bool:
+        """Check if [start, end] is fully contained into at least one indexed range.
+
+        Parameters
+        ----------
+        start: int
+        end: int
+
+        Returns
+        -------
+        bool
+        """
+        last = bisect_right(self.starts, start) - 1
+        return last >= 0 and self.max_ends[last] >= end
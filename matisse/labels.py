@@ -48,6 +48,7 @@ _ALL_PREFIXES = "|".join(sorted(_KIND_LABELS, key=len, reverse=True))
 
 # Regex that detects ``{#PREFIX-id}`` attribute blocks in raw Markdown source.
 _LABEL_RE = re.compile(rf"\{{#(?P<prefix>{_ALL_PREFIXES})-(?P<id>[^\s}}]+)[^}}]*\}}")
+_LABEL_RE_BYTES = re.compile(_LABEL_RE.pattern.encode("utf-8"))
 
 # Regex that detects ``@PREFIX-id`` reference tokens in HTML/Markdown.
 _REF_RE = re.compile(rf"@(?P<prefix>{_ALL_PREFIXES})-(?P<id>[^\s,;.!?\"')\]}}]+)")
@@ -111,10 +112,27 @@ class LabelRegistry:
         print(f"Warning: unresolved cross-reference '@{label}'")
         return "??"
 
+    def references(self, source: str) -> list:
+        """Return the ``(label, number)`` pairs of the references into *source*, in order, without warnings.
+
+        The number is None for labels not registered; the pairs are what the references render from, thus a build
+        cache can tell whether they render the same as in a previous build.
+        """
+        references = []
+        for m in _REF_RE.finditer(source):
+            full = f"{m.group('prefix')}-{m.group('id')}"
+            entry = self._entries.get(full)
+            references.append((full, entry.number if entry is not None else None))
+        return references
+
     def collect_from_source(self, source: str) -> None:
-        """Scan *source* for ``{#PREFIX-id}`` labels and register them."""
-        for m in _LABEL_RE.finditer(source):
-            self.register(m.group("prefix"), m.group("id"))
+        """Scan *source* (str or not yet decoded bytes) for ``{#PREFIX-id}`` labels and register them."""
+        if isinstance(source, str):
+            for m in _LABEL_RE.finditer(source):
+                self.register(m.group("prefix"), m.group("id"))
+            return
+        for m in _LABEL_RE_BYTES.finditer(source):
+            self.register(m.group("prefix").decode("utf-8"), m.group("id").decode("utf-8"))
 
     def substitute_refs(self, html: str) -> str:
         """Replace ``@PREFIX-id`` tokens in *html* with hyperlinks.
@@ -3,7 +3,14 @@
 markdown_utils.py, module definition of markdown utils functions.
 """
 
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
 import markdown
+import pygments
 from pygments.formatters import HtmlFormatter
 
 from .mdx_custom_span_class import CustomSpanClassExtension
@@ -25,23 +32,8 @@ def get_pygments_css(style: str = "default", css_class: str = "highlight") -> st
     return HtmlFormatter(style=style, cssclass=css_class).get_style_defs(f".{css_class}")
 
 
-def markdown2html(source, no_p=False, code_style="default"):
-    """Convert markdown source to html.
-
-    Parameters
-    ----------
-    source : str
-      string (as single stream) containing the source
-    no_p : bool, optional
-      if True the converted contents is not inserted into the <p></p> tags
-    code_style : str, optional
-      Pygments style name used by the codehilite extension (default: 'default')
-
-    Returns
-    -------
-    str
-      converted source
-    """
+def _new_converter(code_style, checklist):
+    """Return a new markdown.Markdown converter configured with the MaTiSSe.py extensions."""
     extensions = [
         "smarty",
         "fenced_code",
@@ -56,7 +48,7 @@ def markdown2html(source, no_p=False, code_style="default"):
         QuartoSpanExtension(),
         "codehilite",
     ]
-    if __mdx_checklist__:
+    if checklist:
         extensions.append(ChecklistExtension())
 
     extension_configs = {
@@ -68,12 +60,268 @@ def markdown2html(source, no_p=False, code_style="default"):
         }
     }
 
-    mkd = markdown.Markdown(
+    return markdown.Markdown(
         output_format="html5",
         extensions=extensions,
         extension_configs=extension_configs,
     )
-    markup = mkd.reset().convert(source)
+
+
+class ConverterPool(object):
+    """
+    Pool of reusable markdown converters.
+
+    Building a markdown.Markdown instance (and its extensions) is far more expensive than converting the few lines of
+    a slide, box or list item, thus converters are cached by configuration and reused through their reset method.
+    A converter is used by one thread at a time: a thread finding no idle converter of the configuration it needs
+    builds a new one, that joins the pool once released.
+
+    Attributes
+    ----------
+    conversions: dict
+      for each configuration (code_style, checklist) the number of conversions served by each of its converters, in
+      creation order
+    """
+
+    def __init__(self):
+        self.conversions: dict = {}
+        self._idle: dict = {}
+        self._index: dict = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Drop all the converters."""
+        with self._lock:
+            self.conversions = {}
+            self._idle = {}
+            self._index = {}
+
+    def convert(self, source, code_style="default"):
+        """Convert markdown source to html with a pooled converter.
+
+        Parameters
+        ----------
+        source : str
+        code_style : str, optional
+          Pygments style name used by the codehilite extension
+
+        Returns
+        -------
+        str
+          converted source
+        """
+        key = (code_style, __mdx_checklist__)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            mkd = idle.pop() if len(idle) > 0 else None
+        if mkd is None:
+            mkd = _new_converter(code_style=code_style, checklist=key[1])
+            with self._lock:
+                self._index[mkd] = len(self.conversions.setdefault(key, []))
+                self.conversions[key].append(0)
+        try:
+            return mkd.reset().convert(source)
+        finally:
+            with self._lock:
+                counts = self.conversions.get(key)
+                if counts is not None and self._index.get(mkd) is not None:
+                    counts[self._index[mkd]] += 1
+                    self._idle.setdefault(key, []).append(mkd)
+
+
+CONVERTERS = ConverterPool()
+
+
+class MarkdownCache(object):
+    """
+    LRU cache of converted markdown fragments.
+
+    Fragments are keyed by a hash of their source and of the converter configuration (code style, checklist
+    availability), thus the same caption, callout or included text is converted once. The cache can be saved to disk
+    and loaded by the next build; a saved cache is discarded if it has been written by other MaTiSSe.py,
+    Python-Markdown or Pygments versions.
+
+    Attributes
+    ----------
+    maxsize: int
+      maximum number of cached fragments, 0 disabling the cache
+    hits: int
+      number of lookups served by the cache
+    misses: int
+      number of lookups not served by the cache
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._recorded = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"MarkdownCache({len(self)}/{self.maxsize} fragments, {self.hits} hits, {self.misses} misses)"
+
+    @staticmethod
+    def version():
+        """Return the signature of the versions producing the cached fragments."""
+        from . import __version__
+
+        return f"{__version__}/{markdown.__version__}/{pygments.__version__}"
+
+    @staticmethod
+    def key(source, code_style="default", checklist=False):
+        """Return the cache key of a fragment.
+
+        Parameters
+        ----------
+        source : str
+        code_style : str, optional
+        checklist : bool, optional
+
+        Returns
+        -------
+        str
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{code_style}\0{int(checklist)}\0".encode("utf-8"))
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return a cached fragment marking it as the most recently used, None if it is not cached."""
+        with self._lock:
+            markup = self._entries.get(key)
+            if markup is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return markup
+
+    def put(self, key, markup):
+        """Cache a fragment, evicting the least recently used ones beyond maxsize."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = markup
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            if self._recorded is not None:
+                self._recorded.append((key, markup))
+
+    def record(self):
+        """Start recording the fragments cached from now on (e.g. by a worker process, to send them to its parent)."""
+        with self._lock:
+            self._recorded = []
+
+    def recorded(self):
+        """Return the fragments cached since the recording started or since the last call, forgetting them.
+
+        Returns
+        -------
+        list
+          (key, fragment) pairs, empty if nothing is being recorded
+        """
+        with self._lock:
+            fragments = self._recorded or []
+            if self._recorded is not None:
+                self._recorded = []
+            return fragments
+
+    def update(self, fragments):
+        """Cache the (key, fragment) pairs of fragments, e.g. the ones recorded by a worker process."""
+        for key, markup in fragments:
+            self.put(key, markup)
+
+    def resize(self, maxsize):
+        """Change the size limit, evicting the least recently used fragments beyond it."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all the fragments and reset the counters."""
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def load(self, path):
+        """Load the fragments saved by a previous build; missing, unreadable or outdated files are ignored.
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        int
+          number of fragments loaded
+        """
+        try:
+            with open(path) as stream:
+                saved = json.load(stream)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(saved, dict) or saved.get("version") != self.version():
+            return 0
+        loaded = 0
+        for key, markup in saved.get("fragments", []):
+            self.put(key, markup)
+            loaded += 1
+        return loaded
+
+    def save(self, path):
+        """Save the fragments, from the least to the most recently used.
+
+        Parameters
+        ----------
+        path : str
+        """
+        with self._lock:
+            fragments = list(self._entries.items())
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = path + ".tmp"
+        with open(temporary, "w") as stream:
+            json.dump({"version": self.version(), "fragments": fragments}, stream)
+        os.replace(temporary, path)
+
+
+MARKDOWN_CACHE = MarkdownCache()
+
+
+def markdown2html(source, no_p=False, code_style="default"):
+    """Convert markdown source to html.
+
+    Parameters
+    ----------
+    source : str
+      string (as single stream) containing the source
+    no_p : bool, optional
+      if True the converted contents is not inserted into the <p></p> tags
+    code_style : str, optional
+      Pygments style name used by the codehilite extension (default: 'default')
+
+    Returns
+    -------
+    str
+      converted source
+    """
+    key = None
+    if MARKDOWN_CACHE.maxsize > 0:
+        key = MARKDOWN_CACHE.key(source, code_style=code_style, checklist=__mdx_checklist__)
+        markup = MARKDOWN_CACHE.get(key)
+    if key is None or markup is None:
+        markup = CONVERTERS.convert(source, code_style=code_style)
+        if key is not None:
+            MARKDOWN_CACHE.put(key, markup)
     if no_p:
         p_start = "<p>"
         p_end = "</p>"
@@ -8,6 +8,7 @@ registered console-script "MaTiSSe.py = matisse.matisse:main" keeps working.
 
 import shutil
 
+from .markdown_utils import MARKDOWN_CACHE
 from .presentation import Presentation
 
 __sample__ = r"""
@@ -84,31 +85,91 @@ $endtable
 """
 
 
-def make_presentation(config, source, output):
+def make_presentation(config, source, output, source_path=None):
     """Build the presentation and write it to *output*.
 
     Parameters
     ----------
     config : MatisseConfig
-    source : str
-        Markdown source string.
+    source : str or bytes-like
+        Markdown source string, or its memory map (see ``MatisseConfig.mmap_source``).
     output : str
         Output directory path.
+    source_path : str, optional
+        Path of the Markdown source file, used for reporting locations.
 
     Returns
     -------
     str
         The parsed (include-resolved) source.
     """
+    return build_presentation(config=config, source=source, output=output, source_path=source_path)[0]
+
+
+def build_presentation(config, source, output, source_path=None, include_resolver=None):
+    """Build the presentation and write it to *output*, as make_presentation does, returning the presentation too.
+
+    Parameters
+    ----------
+    config : MatisseConfig
+    source : str or bytes-like
+        Markdown source string, or its memory map (see ``MatisseConfig.mmap_source``).
+    output : str
+        Output directory path.
+    source_path : str, optional
+        Path of the Markdown source file, used for reporting locations.
+    include_resolver : IncludeResolver, optional
+        Resolver of $include statements kept across builds, see ``Presentation.parse``.
+
+    Returns
+    -------
+    tuple
+        The parsed (include-resolved) source and the Presentation built.
+    """
     config.make_output_tree(output=output)
-    if config.theme is not None:
-        source = config.put_theme(source=source, output=output)
+    MARKDOWN_CACHE.resize(config.md_cache_size)
+    if config.md_cache:
+        MARKDOWN_CACHE.load(config.md_cache)
+    source, prelude_length = themed_source(config=config, source=source, output=output)
     presentation = Presentation()
-    presentation.parse(config=config, source=source)
+    presentation.parse(
+        config=config,
+        source=source,
+        source_path=source_path,
+        prelude_length=prelude_length,
+        include_resolver=include_resolver,
+    )
     presentation.save(config=config, output=output)
+    if config.md_cache:
+        MARKDOWN_CACHE.save(config.md_cache)
+    if config.verbose:
+        print(f"Markdown cache: {MARKDOWN_CACHE.hits} hits, {MARKDOWN_CACHE.misses} misses")
     if config.theme is not None:
         shutil.rmtree("theme-" + config.theme, ignore_errors=True)
-    return source
+    return source, presentation
+
+
+def themed_source(config, source, output):
+    """Prepend the includes of the builtin theme configured (if any) to the source.
+
+    Parameters
+    ----------
+    config : MatisseConfig
+    source : str or bytes-like
+    output : str
+        Output directory path.
+
+    Returns
+    -------
+    tuple
+        The source with the theme prelude and the prelude length.
+    """
+    if config.theme is None:
+        return source, 0
+    prelude = config.put_theme(source="", output=output)
+    if not isinstance(source, str):
+        prelude = prelude.encode("utf-8")
+    return prelude[:0].join([prelude, source]), len(prelude)
 
 
 def main():
@@ -7,10 +7,12 @@ from __future__ import annotations
 
 import os
 import sys
-from shutil import copyfile, copytree, rmtree
+from shutil import copytree
 
 from pygments.styles import get_all_styles
 
+from .tree_sync import CHECK_MODES, LINK_MODES, TreeSync
+
 
 class MatisseConfig(object):
     """
@@ -51,6 +53,33 @@ class MatisseConfig(object):
           insert a slide with TOC at the beginning of each section (default false)
         toc_at_subsec_beginning : bool
           insert a slide with TOC at the beginning of each subsection (default false)
+        mmap_source : bool
+          memory-map the input and included files, tokenizing bytes and decoding slides contents only when
+          rendered (default false)
+        jobs : int
+          number of worker processes rendering the slides, 1 for sequential rendering (default 1)
+        indent : bool
+          indent index.html, slide by slide while writing it (default true)
+        minify : bool
+          write index.html minified instead of indented (default false)
+        md_cache_size : int
+          maximum number of converted Markdown fragments kept in memory, 0 disabling the cache (default 4096)
+        md_cache : str
+          file the converted Markdown fragments are loaded from and saved to, None for no persistence (default)
+        build_cache : str
+          directory the rendered slides are cached into, thus a rebuild renders only the changed slides, None for no
+          cache (default)
+        asset_link : str
+          how the MaTiSSe assets are brought into the output tree: 'copy' (default), 'hardlink', 'symlink' or 'reflink'
+        asset_check : str
+          how the changed assets and dirs_to_copy files are detected: 'mtime' (size and modification time, default)
+          or 'hash'
+        mirror_link : str
+          how the dirs_to_copy files are brought into the output tree, as asset_link (default 'copy')
+        mirror_jobs : int
+          number of threads copying the dirs_to_copy files (default 4)
+        mirror_delete : bool
+          remove from the output tree the dirs_to_copy files removed from their directories (default false)
         """
         self.backend = "impress"
         self.verbose = False
@@ -63,6 +92,18 @@ class MatisseConfig(object):
         self.toc_at_subsec_beginning = None
         self.pdf = False
         self.print_parsed_source = False
+        self.mmap_source = False
+        self.jobs = 1
+        self.indent = True
+        self.minify = False
+        self.md_cache_size = 4096
+        self.md_cache = None
+        self.build_cache = None
+        self.asset_link = "copy"
+        self.asset_check = "mtime"
+        self.mirror_link = "copy"
+        self.mirror_jobs = 4
+        self.mirror_delete = False
         self.__check_code_style()
         self.__get_themes()
         self.__check_theme()
@@ -102,6 +143,25 @@ class MatisseConfig(object):
             sys.stderr.write("Falling back to 'impress'.\n")
             self.backend = "impress"
 
+    def __check_asset_sync(self):
+        """Validate the selected assets (and dirs_to_copy) link and check modes."""
+        if self.asset_link not in LINK_MODES:
+            sys.stderr.write(f"Error: unknown asset link mode '{self.asset_link}'. Valid values: {list(LINK_MODES)}\n")
+            sys.stderr.write("Falling back to 'copy'.\n")
+            self.asset_link = "copy"
+        if self.mirror_link not in LINK_MODES:
+            sys.stderr.write(
+                f"Error: unknown mirror link mode '{self.mirror_link}'. Valid values: {list(LINK_MODES)}\n"
+            )
+            sys.stderr.write("Falling back to 'copy'.\n")
+            self.mirror_link = "copy"
+        if self.asset_check not in CHECK_MODES:
+            sys.stderr.write(
+                f"Error: unknown asset check mode '{self.asset_check}'. Valid values: {list(CHECK_MODES)}\n"
+            )
+            sys.stderr.write("Falling back to 'mtime'.\n")
+            self.asset_check = "mtime"
+
     def __check_code_style(self):
         """Check if the selected Pygments style is available."""
         if self.code_style == "disable":
@@ -146,6 +206,12 @@ class MatisseConfig(object):
         self.theme = theme
         self.__check_theme()
 
+    def builtin_theme_dir(self):
+        """Return the path of the builtin theme configured, into the MaTiSSe package, None if no theme is configured."""
+        if self.theme is None:
+            return None
+        return os.path.join(os.path.dirname(__file__), "utils/builtin_themes", self.theme)
+
     def put_theme(self, source, output):
         """Put builtin theme into the source.
 
@@ -256,6 +322,19 @@ class MatisseConfig(object):
         self.toc_at_subsec_beginning = cliargs.toc_at_subsec_beginning
         self.pdf = cliargs.pdf
         self.print_parsed_source = cliargs.print_parsed_source
+        self.mmap_source = getattr(cliargs, "mmap_source", False)
+        self.jobs = getattr(cliargs, "jobs", 1)
+        self.indent = not getattr(cliargs, "no_indent", False)
+        self.minify = getattr(cliargs, "minify", False)
+        self.md_cache_size = getattr(cliargs, "md_cache_size", 4096)
+        self.md_cache = getattr(cliargs, "md_cache", None)
+        self.build_cache = getattr(cliargs, "build_cache", None)
+        self.asset_link = getattr(cliargs, "asset_link", "copy")
+        self.asset_check = getattr(cliargs, "asset_check", "mtime")
+        self.mirror_link = getattr(cliargs, "mirror_link", "copy")
+        self.mirror_jobs = getattr(cliargs, "mirror_jobs", 4)
+        self.mirror_delete = getattr(cliargs, "mirror_delete", False)
+        self.__check_asset_sync()
 
     def printf(self):
         """Print config data with verbosity check."""
@@ -285,47 +364,74 @@ class MatisseConfig(object):
         output: str
           output path
         """
-        # ensure output directory exists
-        if not os.path.exists(output):
-            os.makedirs(output)
-        # always create css/ and js/ subdirectories
-        if not os.path.exists(os.path.join(output, "css")):
-            os.makedirs(os.path.join(output, "css"))
-        if not os.path.exists(os.path.join(output, "js")):
-            os.makedirs(os.path.join(output, "js"))
+        sync = TreeSync(output, link=self.asset_link, check=self.asset_check)
+        os.makedirs(os.path.join(output, "css"), exist_ok=True)
+        os.makedirs(os.path.join(output, "js"), exist_ok=True)
 
         # always write pygments.css (build-time, no CDN, works offline automatically)
         if self.code_highlight:
             from .markdown_utils import get_pygments_css
 
-            css_path = os.path.join(output, "css", "pygments.css")
-            with open(css_path, "w") as fh:
-                fh.write(get_pygments_css(style=self.code_style))
+            sync.write_text(os.path.join("css", "pygments.css"), get_pygments_css(style=self.code_style))
 
-        if self.backend == "reveal":
-            if self.offline:
-                sys.stderr.write(
-                    "Warning: --offline is not yet supported for --backend reveal. Assets will be loaded from CDN.\n"
-                )
-            # No local bundles for reveal — all CSS/JS comes from CDN
-            return
+        if self.backend == "reveal" and self.offline:
+            sys.stderr.write(
+                "Warning: --offline is not yet supported for --backend reveal. Assets will be loaded from CDN.\n"
+            )
+        sync.sync(self.output_assets())
+        if self.verbose:
+            print(f"Assets: {sync.transferred} transferred, {sync.skipped} up to date, {sync.removed} removed")
+
+    def mirror_dirs(self, output: str, dirs) -> TreeSync:
+        """Mirror the dirs_to_copy directories into the output tree, transferring only their missing or changed files.
+
+        Parameters
+        ----------
+        output: str
+          output path
+        dirs: iterable
+          directories to mirror, by their path as given into dirs_to_copy (and into the output tree)
+
+        Returns
+        -------
+        TreeSync
+          the sync done, with its counters
+        """
+        mirror = TreeSync(
+            output,
+            manifest=".matisse-mirror.json",
+            link=self.mirror_link,
+            check=self.asset_check,
+            jobs=self.mirror_jobs,
+            delete=self.mirror_delete,
+        )
+        mirror.sync((data, data) for data in dirs)
+        if self.verbose:
+            print(
+                f"dirs_to_copy: {mirror.transferred} transferred, {mirror.skipped} up to date, {mirror.removed} removed"
+            )
+        return mirror
 
-        # --- impress backend assets ---
-        css = os.path.join(os.path.dirname(__file__), "utils/css/normalize.css")
-        copyfile(css, os.path.join(output, "css/normalize.css"))
-        css = os.path.join(os.path.dirname(__file__), "utils/css/matisse_defaults.css")
-        copyfile(css, os.path.join(output, "css/matisse_defaults.css"))
-        css = os.path.join(os.path.dirname(__file__), "utils/css/matisse_defaults_printing.css")
-        copyfile(css, os.path.join(output, "css/matisse_defaults_printing.css"))
+    def output_assets(self) -> list:
+        """Return the MaTiSSe assets of the output tree, for the backend and the offline mode configured.
+
+        Returns
+        -------
+        list
+          (target, asset) pairs: path into the output tree and path of the bundled file or directory
+        """
+        if self.backend == "reveal":
+            return []
+        utils = os.path.join(os.path.dirname(__file__), "utils")
+        assets = [
+            ("css/normalize.css", os.path.join(utils, "css/normalize.css")),
+            ("css/matisse_defaults.css", os.path.join(utils, "css/matisse_defaults.css")),
+            ("css/matisse_defaults_printing.css", os.path.join(utils, "css/matisse_defaults_printing.css")),
+        ]
         if self.offline:
-            # MathJax engine (local bundle — MathJax 2.x)
-            if os.path.exists(os.path.join(output, "js/MathJax")):
-                rmtree(os.path.join(output, "js/MathJax"))
-            jscript = os.path.join(os.path.dirname(__file__), "utils/js/MathJax")
-            copytree(jscript, os.path.join(output, "js/MathJax"))
-            # impress.js (local bundle)
-            jscript = os.path.join(os.path.dirname(__file__), "utils/js/impress/impress.js")
-            copyfile(jscript, os.path.join(output, "js/impress.js"))
+            # MathJax engine (local bundle — MathJax 2.x) and impress.js (local bundle)
+            assets.append(("js/MathJax", os.path.join(utils, "js/MathJax")))
+            assets.append(("js/impress.js", os.path.join(utils, "js/impress/impress.js")))
         # countDown.js is always local (impress backend only)
-        jscript = os.path.join(os.path.dirname(__file__), "utils/js/countDown.js")
-        copyfile(jscript, os.path.join(output, "js/countDown.js"))
+        assets.append(("js/countDown.js", os.path.join(utils, "js/countDown.js")))
+        return assets
@@ -7,10 +7,36 @@ from __future__ import annotations
 
 import re
 import sys
+from functools import lru_cache
 from typing import Union
 
 from yattag import Doc
 
+# slot of a TOC element into the TOC skeleton html
+_TOC_SLOT = "\x00"
+
+# metadata varying from slide to slide: updated by the backends before rendering each slide or, for the toc,
+# emphasizing the current slide; all the others are constant along the rendering of a presentation
+SLIDE_METADATA = frozenset(
+    {
+        "chaptertitle",
+        "chapternumber",
+        "sectiontitle",
+        "sectionnumber",
+        "subsectiontitle",
+        "subsectionnumber",
+        "slidetitle",
+        "slidenumber",
+        "toc",
+    }
+)
+
+
+@lru_cache(maxsize=None)
+def _placeholders_regex(names: tuple):
+    """Return the alternation of the placeholders of some metadata, names being tried in order."""
+    return re.compile(r"\$(?P<name>" + "|".join(names) + r")(\[(?P<style>.*?)\])*", re.DOTALL)
+
 
 class Metadata(object):
     """
@@ -31,6 +57,7 @@ class Metadata(object):
         self.name = name
         self.value = value
         self.regex = re.compile(r"\$" + self.name + r"(\[(?P<style>.*?)\])*", re.DOTALL)
+        self._toc_skeletons: dict = {}
 
     def update_value(self, value: Union[str, list]) -> None:
         """Update metadata value.
@@ -45,6 +72,7 @@ class Metadata(object):
                 self.value.append(str(val))
         else:
             self.value = str(value)
+        self.clear_toc_skeletons()
 
     def parse(self, parser, source: str, toc_depth=None, max_time=None, current=None) -> str:
         """Parse source for metadata placeholder substituting occurences with its value and its eventula css style.
@@ -57,27 +85,116 @@ class Metadata(object):
           max time for presentation
         """
         codeblocks = parser.tokenizer(source=source, re_search=parser.regexs["codeblock"])
-        metadatablocks = parser.tokenizer(source=source, re_search=self.regex, exclude=codeblocks)
+        metadatablocks = parser.tokenizer(source=source, re_search=self.regex, exclude=codeblocks, groups=("style",))
         if len(metadatablocks) > 0:
-            parsed_source = source[: metadatablocks[0]["start"]]
+            parsed_source = source[: metadatablocks[0].start]
             for m, metadatablock in enumerate(metadatablocks[:-1]):
                 parsed_source += (
-                    self.to_html(match=metadatablock["match"], toc_depth=toc_depth, max_time=max_time, current=current)
-                    + source[metadatablock["end"] : metadatablocks[m + 1]["start"]]
+                    self.to_html(match=metadatablock, toc_depth=toc_depth, max_time=max_time, current=current)
+                    + source[metadatablock.end : metadatablocks[m + 1].start]
                 )
             parsed_source += (
-                self.to_html(match=metadatablocks[-1]["match"], toc_depth=toc_depth, max_time=max_time, current=current)
-                + source[metadatablocks[-1]["end"] :]
+                self.to_html(match=metadatablocks[-1], toc_depth=toc_depth, max_time=max_time, current=current)
+                + source[metadatablocks[-1].end :]
             )
             return parsed_source
         return source
 
+    @staticmethod
+    def parse_all(parser, metadata: dict, source: str, current=None, exclude=None) -> str:
+        """Substitute the placeholders of all metadata in one pass over source.
+
+        The placeholders are found by a single alternation of the metadata names (in the metadata order, thus at a
+        given offset the name parsed first by the one-metadata-at-a-time parse wins, e.g. $authors over
+        $authors_short) and dispatched to their metadata. As with chained parse calls, the placeholders of the
+        following metadata contained into a substituted value are substituted too.
+
+        Parameters
+        ----------
+        parser: Parser
+        metadata: dict
+          presentation metadata
+        source: str
+        current: list
+        exclude: IntervalIndex|list
+          codeblocks of source, computed if not passed
+
+        Returns
+        -------
+        str
+          source with placeholders substituted, source itself if it contains none
+        """
+        if "$" not in source:
+            return source
+        return Metadata._substitute(
+            parser=parser,
+            metadata=metadata,
+            names=tuple(metadata),
+            source=source,
+            current=current,
+            exclude=exclude,
+        )
+
+    @staticmethod
+    def _placeholders(parser, metadata, names, source, exclude):
+        """Return the placeholders of the names metadata into source as (index of the metadata into names, Token)."""
+        if exclude is None:
+            exclude = parser.tokenizer(source=source, re_search=parser.regexs["codeblock"])
+        re_search = _placeholders_regex(tuple(metadata[name].name for name in names))
+        placeholders = parser.tokenizer(source=source, re_search=re_search, exclude=exclude, groups=("name", "style"))
+        literal = {metadata[name].name: n for n, name in enumerate(names)}
+        found = []
+        for placeholder in placeholders:
+            n = literal.get(placeholder.group("name"))
+            if n is None:
+                n = next(
+                    n for n, name in enumerate(names) if re.fullmatch(metadata[name].name, placeholder.group("name"))
+                )
+            found.append((n, placeholder))
+        return found
+
+    @staticmethod
+    def _placeholder_to_html(parser, metadata, names, n, placeholder, current):
+        """Convert the placeholder of the n-th names metadata, substituting the following ones into its value."""
+        html = metadata[names[n]].to_html(
+            match=placeholder,
+            toc_depth=metadata["toc_depth"].value,
+            max_time=metadata["max_time"].value,
+            current=current,
+        )
+        if "$" in html and n + 1 < len(names):
+            html = Metadata._substitute(
+                parser=parser, metadata=metadata, names=names[n + 1 :], source=html, current=current, exclude=None
+            )
+        return html
+
+    @staticmethod
+    def _substitute(parser, metadata, names, source, current, exclude):
+        """Substitute the placeholders of the names metadata into source."""
+        placeholders = Metadata._placeholders(
+            parser=parser, metadata=metadata, names=names, source=source, exclude=exclude
+        )
+        if len(placeholders) == 0:
+            return source
+        pieces = []
+        cursor = 0
+        for n, placeholder in placeholders:
+            pieces.append(source[cursor : placeholder.start])
+            pieces.append(
+                Metadata._placeholder_to_html(
+                    parser=parser, metadata=metadata, names=names, n=n, placeholder=placeholder, current=current
+                )
+            )
+            cursor = placeholder.end
+        pieces.append(source[cursor:])
+        return "".join(pieces)
+
     def logo_to_html(self, match):
         """Convert logo metadata to html stream.
 
         Parameters
         ----------
-        match: re.match object
+        match: Token
 
         Returns
         -------
@@ -99,7 +216,7 @@ class Metadata(object):
 
         Parameters
         ----------
-        match: re.match object
+        match: Token
         max_time: str
 
         Returns
@@ -151,7 +268,32 @@ class Metadata(object):
                 doc.text("  " * (len(current) - 1) + ".".join(str(c) for c in current) + " " + text)
 
     @staticmethod
-    def toc_put_slides(doc, subsection, depth, actual_current, current, numbering_start):
+    def toc_put_entry(doc, entries, klass, key, current, text):
+        """Put the slot of a TOC element, its html being collected into entries both plain and emphasized.
+
+        Parameters
+        ----------
+        doc: Doc()
+        entries: list
+          (key, plain html, emphasized html) of the TOC elements put
+        klass: str
+          plain class, the emphasized one being klass-emph
+        key: tuple
+          chapter[, section[, subsection[, slide]]] numbers of the element
+        current: list
+          numbering of the element text
+        text: str
+        """
+        if text != "":
+            plain = Doc()
+            Metadata.toc_put_text(doc=plain, klass=klass, current=current, text=text)
+            emph = Doc()
+            Metadata.toc_put_text(doc=emph, klass=klass + "-emph", current=current, text=text)
+            doc.asis(_TOC_SLOT)
+            entries.append((key, plain.getvalue(), emph.getvalue()))
+
+    @staticmethod
+    def toc_put_slides(doc, subsection, depth, actual_current, entries, numbering_start):
         """Put slides list into TOC.
 
         Parameters
@@ -161,25 +303,25 @@ class Metadata(object):
           dictionary of slides contained into the subsection
         depth: int
         actual_current: list
-        current: list
+        entries: list
         numbering_start: int
         """
         for slide in subsection:
             actual_current[3] += 1
             if depth >= 4:
                 with doc.tag("a", href="#slide-" + str(actual_current[4])):
-                    if current is not None and current[0:4] == actual_current[0:4]:
-                        Metadata.toc_put_text(
-                            doc=doc, klass="toc-slide-emph", current=actual_current[numbering_start:4], text=slide
-                        )
-                    else:
-                        Metadata.toc_put_text(
-                            doc=doc, klass="toc-slide", current=actual_current[numbering_start:4], text=slide
-                        )
+                    Metadata.toc_put_entry(
+                        doc=doc,
+                        entries=entries,
+                        klass="toc-slide",
+                        key=tuple(actual_current[0:4]),
+                        current=actual_current[numbering_start:4],
+                        text=slide,
+                    )
             actual_current[4] += 1
 
     @staticmethod
-    def toc_put_subsections(doc, section, depth, actual_current, current, numbering_start):
+    def toc_put_subsections(doc, section, depth, actual_current, entries, numbering_start):
         """Put subsections list into TOC.
 
         Parameters
@@ -189,7 +331,7 @@ class Metadata(object):
           dictionary of subsections contained into the section
         depth: int
         actual_current: list
-        current: list
+        entries: list
         numbering_start: int
         """
         for subsection in section:
@@ -197,17 +339,14 @@ class Metadata(object):
             actual_current[3] = 0
             if depth >= 3:
                 with doc.tag("a", href="#slide-" + str(actual_current[4])):
-                    if current is not None and current[0:3] == actual_current[0:3]:
-                        Metadata.toc_put_text(
-                            doc=doc,
-                            klass="toc-subsection-emph",
-                            current=actual_current[numbering_start:3],
-                            text=subsection,
-                        )
-                    else:
-                        Metadata.toc_put_text(
-                            doc=doc, klass="toc-subsection", current=actual_current[numbering_start:3], text=subsection
-                        )
+                    Metadata.toc_put_entry(
+                        doc=doc,
+                        entries=entries,
+                        klass="toc-subsection",
+                        key=tuple(actual_current[0:3]),
+                        current=actual_current[numbering_start:3],
+                        text=subsection,
+                    )
             if subsection == "" and len(section) == 1:
                 next_numbering_start = numbering_start + 1
             else:
@@ -217,12 +356,12 @@ class Metadata(object):
                 subsection=section[subsection],
                 depth=depth,
                 actual_current=actual_current,
-                current=current,
+                entries=entries,
                 numbering_start=next_numbering_start,
             )
 
     @staticmethod
-    def toc_put_sections(doc, chapter, depth, actual_current, current, numbering_start):
+    def toc_put_sections(doc, chapter, depth, actual_current, entries, numbering_start):
         """Put sections list into TOC.
 
         Parameters
@@ -232,7 +371,7 @@ class Metadata(object):
           dictionary of sections contained into the chapter
         depth: int
         actual_current: list
-        current: list
+        entries: list
         numbering_start: int
         """
         for section in chapter:
@@ -241,14 +380,14 @@ class Metadata(object):
             actual_current[3] = 0
             if depth >= 2:
                 with doc.tag("a", href="#slide-" + str(actual_current[4])):
-                    if current is not None and current[0:2] == actual_current[0:2]:
-                        Metadata.toc_put_text(
-                            doc=doc, klass="toc-section-emph", current=actual_current[numbering_start:2], text=section
-                        )
-                    else:
-                        Metadata.toc_put_text(
-                            doc=doc, klass="toc-section", current=actual_current[numbering_start:2], text=section
-                        )
+                    Metadata.toc_put_entry(
+                        doc=doc,
+                        entries=entries,
+                        klass="toc-section",
+                        key=tuple(actual_current[0:2]),
+                        current=actual_current[numbering_start:2],
+                        text=section,
+                    )
             if section == "" and len(chapter) == 1:
                 next_numbering_start = numbering_start + 1
             else:
@@ -258,11 +397,11 @@ class Metadata(object):
                 section=chapter[section],
                 depth=depth,
                 actual_current=actual_current,
-                current=current,
+                entries=entries,
                 numbering_start=next_numbering_start,
             )
 
-    def toc_put_chapters(self, doc, depth, actual_current, current):
+    def toc_put_chapters(self, doc, depth, actual_current, entries):
         """Put chapters list into TOC.
 
         Parameters
@@ -270,7 +409,7 @@ class Metadata(object):
         doc: Doc()
         depth: int
         actual_current: list
-        current: list
+        entries: list
         """
         for chapter in self.value:
             actual_current[0] += 1
@@ -278,10 +417,14 @@ class Metadata(object):
             actual_current[2] = 0
             actual_current[3] = 0
             with doc.tag("a", href="#slide-" + str(actual_current[4])):
-                if current is not None and current[0] == actual_current[0]:
-                    self.toc_put_text(doc=doc, klass="toc-chapter-emph", current=actual_current[0:1], text=chapter)
-                else:
-                    self.toc_put_text(doc=doc, klass="toc-chapter", current=actual_current[0:1], text=chapter)
+                self.toc_put_entry(
+                    doc=doc,
+                    entries=entries,
+                    klass="toc-chapter",
+                    key=tuple(actual_current[0:1]),
+                    current=actual_current[0:1],
+                    text=chapter,
+                )
             if chapter == "" and len(self.value) == 1:
                 numbering_start = 1
             else:
@@ -291,10 +434,39 @@ class Metadata(object):
                 chapter=self.value[chapter],
                 depth=depth,
                 actual_current=actual_current,
-                current=current,
+                entries=entries,
                 numbering_start=numbering_start,
             )
 
+    def toc_skeleton(self, style, depth):
+        """Return the (cached) TOC skeleton of a style and a depth.
+
+        Parameters
+        ----------
+        style: str
+        depth: int
+
+        Returns
+        -------
+        TocSkeleton
+        """
+        key = (style, depth)
+        if key not in self._toc_skeletons:
+            doc = Doc()
+            entries = []
+            # numbering: [local_chap, local_sec, local_subsec, local_slide, global_slide]
+            actual_current = [0, 0, 0, 0, 1]
+            with doc.tag("div", klass="toc"):
+                if style is not None:
+                    doc.attr(style=style)
+                self.toc_put_chapters(doc=doc, depth=depth, actual_current=actual_current, entries=entries)
+            self._toc_skeletons[key] = TocSkeleton(html="\n" + doc.getvalue(), entries=entries)
+        return self._toc_skeletons[key]
+
+    def clear_toc_skeletons(self):
+        """Discard the TOC skeletons, to be called whenever the TOC changes."""
+        self._toc_skeletons = {}
+
     def toc_to_html(self, match, current=None, depth=1):
         """Convert TOC to a plain string.
 
@@ -353,21 +525,14 @@ class Metadata(object):
 
         style = get_style(match=match)
         actual_depth = get_actual_depth(style=style, depth=depth)
-        doc = Doc()
-        # numbering: [local_chap, local_sec, local_subsec, local_slide, global_slide]
-        actual_current = [0, 0, 0, 0, 1]
-        with doc.tag("div", klass="toc"):
-            if style is not None:
-                doc.attr(style=style)
-            self.toc_put_chapters(doc=doc, depth=actual_depth, actual_current=actual_current, current=current)
-        return "\n" + doc.getvalue()
+        return self.toc_skeleton(style=style, depth=actual_depth).fill(current=current)
 
     def custom_to_html(self, match):
         """Convert custom metadata to html stream.
 
         Parameters
         ----------
-        match: re.match object
+        match: Token
 
         Returns
         -------
@@ -391,7 +556,7 @@ class Metadata(object):
 
         Parameters
         ----------
-        match: re.match object
+        match: Token
         max_time: str
           max time for presentation
 
@@ -421,3 +586,160 @@ class Metadata(object):
                 else:
                     doc.asis(str(self.value))
         return doc.getvalue()
+
+
+class MetadataTemplate(object):
+    """
+    Metadata placeholders source compiled once and filled for each slide, e.g. the content of a slide decorator.
+
+    At compile time the placeholders of the metadata constant along the rendering are substituted, while the ones of
+    the SLIDE_METADATA (and the ones whose value contains further placeholders) become slots; filling the template
+    thus converts only the slots and joins the pieces. The result is the one of Metadata.parse_all on the source.
+
+    Attributes
+    ----------
+    pieces: list
+      static html (str) and slots, i.e. (index of the metadata into names, placeholder Token) pairs
+    """
+
+    def __init__(self, parser, metadata: dict, source: str) -> None:
+        """
+        Parameters
+        ----------
+        parser: Parser
+        metadata: dict
+          presentation metadata
+        source: str
+        """
+        self.parser = parser
+        self.metadata: dict = metadata
+        self.names: tuple = tuple(metadata)
+        self.pieces: list = []
+        placeholders = []
+        if "$" in source:
+            placeholders = Metadata._placeholders(
+                parser=parser, metadata=metadata, names=self.names, source=source, exclude=None
+            )
+        cursor = 0
+        for n, placeholder in placeholders:
+            self._put_static(source[cursor : placeholder.start])
+            html = None
+            if self.names[n] not in SLIDE_METADATA:
+                html = metadata[self.names[n]].to_html(
+                    match=placeholder, toc_depth=metadata["toc_depth"].value, max_time=metadata["max_time"].value
+                )
+            if html is None or "$" in html:
+                # values containing placeholders are rescanned for the following metadata, maybe varying ones
+                self.pieces.append((n, placeholder))
+            else:
+                self._put_static(html)
+            cursor = placeholder.end
+        self._put_static(source[cursor:])
+
+    def __repr__(self):
+        return f"MetadataTemplate({len(self.slots)} slots)"
+
+    @property
+    def slots(self) -> list:
+        """Slots of the template."""
+        return [piece for piece in self.pieces if not isinstance(piece, str)]
+
+    def _put_static(self, html: str) -> None:
+        """Append static html, merging it into the previous static piece."""
+        if html == "":
+            return
+        if len(self.pieces) > 0 and isinstance(self.pieces[-1], str):
+            self.pieces[-1] += html
+        else:
+            self.pieces.append(html)
+
+    def fill(self, current=None) -> str:
+        """Return the source with all the placeholders substituted for the slide being rendered.
+
+        Parameters
+        ----------
+        current: list
+          current chapter, section, subsection and slide numbers
+
+        Returns
+        -------
+        str
+        """
+        pieces = []
+        for piece in self.pieces:
+            if isinstance(piece, str):
+                pieces.append(piece)
+            else:
+                pieces.append(
+                    Metadata._placeholder_to_html(
+                        parser=self.parser,
+                        metadata=self.metadata,
+                        names=self.names,
+                        n=piece[0],
+                        placeholder=piece[1],
+                        current=current,
+                    )
+                )
+        return "".join(pieces)
+
+
+class TocSkeleton(object):
+    """
+    TOC rendered once, the emphasis of the elements of the current slide being switched on each occurrence.
+
+    Attributes
+    ----------
+    pieces: list
+      static html alternated with the plain html of the TOC elements
+    emph: dict
+      emphasized html of each TOC element, by its index into pieces
+    index: dict
+      index into pieces of each TOC element, by its chapter[, section[, subsection[, slide]]] numbers
+    """
+
+    def __init__(self, html: str, entries: list) -> None:
+        """
+        Parameters
+        ----------
+        html: str
+          TOC html with a _TOC_SLOT for each element
+        entries: list
+          (key, plain html, emphasized html) of each TOC element, in order
+        """
+        self.pieces: list = []
+        self.emph: dict = {}
+        self.index: dict = {}
+        static = html.split(_TOC_SLOT)
+        for (key, plain, emph), text in zip(entries, static):
+            self.pieces.append(text)
+            self.index[key] = len(self.pieces)
+            self.emph[len(self.pieces)] = emph
+            self.pieces.append(plain)
+        self.pieces.append(static[-1])
+        self.plain: str = "".join(self.pieces)
+
+    def __repr__(self):
+        return f"TocSkeleton({len(self.index)} elements)"
+
+    def fill(self, current=None) -> str:
+        """Return the TOC html, the elements of the current chapter, section, subsection and slide being emphasized.
+
+        Parameters
+        ----------
+        current: list
+          current chapter, section, subsection and slide numbers
+
+        Returns
+        -------
+        str
+        """
+        if current is None:
+            return self.plain
+        pieces = None
+        for level in range(1, min(len(current), 4) + 1):
+            index = self.index.get(tuple(current[0:level]))
+            if index is not None:
+                if pieces is None:
+                    pieces = list(self.pieces)
+                pieces[index] = self.emph[index]
+        return self.plain if pieces is None else "".join(pieces)
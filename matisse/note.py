@@ -42,22 +42,23 @@ class Note(Box):
         """Reset to default state."""
         cls.notes_number = 0
 
-    def __init__(self, source=None):
+    def __init__(self, source=None, context=None):
         """
         Parameters
         ----------
         source : str, optional
           string (as single stream) containing the source
+        context : RenderContext, optional
+          build context numbering the note, CLASS_CONTEXT if not passed
 
         Attributes
         ----------
         number : int
           note number
         """
-        super(Note, self).__init__(ctn_type="note")
+        super(Note, self).__init__(ctn_type="note", context=context)
         self.cap_type = "Note"
-        Note.notes_number += 1
-        self.number = Note.notes_number
+        self.number = self.context.next_number(Note, "notes_number")
         if source:
             self.get(source=source)
 
@@ -6,10 +6,13 @@ This defines the MaTiSSe.py Parser.
 
 from __future__ import annotations
 
-import os
+import heapq
 import re
-import sys
-from typing import Optional
+from typing import Optional, Union
+
+from .include_resolver import IncludeResolver
+from .interval_index import IntervalIndex
+from .tokens import Token
 
 
 class Parser(object):
@@ -18,6 +21,7 @@ class Parser(object):
     """
 
     regexs = {"all": re.compile(r"(.*(?P<expr>))", re.DOTALL)}
+    _bytes_regexs: dict = {}  # bytes twins of the str regexs, used for tokenizing memory-mapped sources
 
     def __init__(self):
         """
@@ -28,6 +32,8 @@ class Parser(object):
         ----------
         regexs: dict
           dictionary filled with compiled objects of MaTiSSe.py regexs
+        include_resolver: IncludeResolver
+          resolver of $include statements, caching the included files contents
         """
         self.regexs = {
             "chapter": re.compile(r"([^#]#|^#)\s+" + r"(?P<expr>.*)"),
@@ -39,41 +45,96 @@ class Parser(object):
             "yamlblock": re.compile(r"(?P<block>[-]{3}\n.*?\n[-]{3})", re.DOTALL),
             "fenceddiv": re.compile(r"(?P<block>:::[^\n]*\n.*?:::)", re.DOTALL),
             "includeblock": re.compile(r"\$include\((?P<include>.*?)\)"),
+            # single-pass document scanner: blocks are tried before headings so that everything inside a codeblock,
+            # YAML block or fenced div is consumed without ever being considered as a heading
+            "scanner": re.compile(
+                r"(?s:(?P<codeblock>[`]{3}.*?[`]{3}))"
+                r"|(?s:(?P<yamlblock>[-]{3}\n.*?\n[-]{3}))"
+                r"|(?s:(?P<fenceddiv>:::[^\n]*\n.*?:::))"
+                r"|(?P<heading>(?:[^#]|^)(?P<level>#{1,4})\s+(?P<expr>.*))"
+            ),
         }
+        self.include_resolver = IncludeResolver(parser=self)
+
+    @staticmethod
+    def compiled_for(re_search, source):
+        """Return re_search compiled for the type of source.
+
+        Sources may be str or bytes-like (e.g. memory-mapped files): for the latter the bytes twin of a str regex is
+        compiled once and reused.
+
+        Parameters
+        ----------
+        re_search: compiled regex
+        source: str|bytes|mmap|memoryview
+
+        Returns
+        -------
+        compiled regex
+        """
+        if isinstance(source, str) or not isinstance(re_search.pattern, str):
+            return re_search
+        twin = Parser._bytes_regexs.get(re_search)
+        if twin is None:
+            twin = re.compile(re_search.pattern.encode("utf-8"), re_search.flags & ~re.UNICODE)
+            Parser._bytes_regexs[re_search] = twin
+        return twin
+
+    @staticmethod
+    def decode(value):
+        """Return value as str, decoding (UTF-8) bytes-like values.
+
+        Parameters
+        ----------
+        value: str|bytes|mmap|memoryview|None
+
+        Returns
+        -------
+        str
+        """
+        if value is None or isinstance(value, str):
+            return value
+        return str(value, "utf-8")
 
     @staticmethod
-    def tokenizer(source: str, re_search, exclude: Optional[list] = None, force_all: bool = False) -> list:
+    def tokenizer(
+        source: str,
+        re_search,
+        exclude: Optional[Union[list, IntervalIndex]] = None,
+        force_all: bool = False,
+        groups: tuple = (),
+    ) -> list:
         """Tokenize accordingly to re_search (and exlude if passed).
 
         Parameters
         ----------
-        source: str
+        source: str|bytes|mmap|memoryview
           input stream
         re_search: compiled regex
-        exclude: list
-          list of start/end index of source lines
+        exclude: list|IntervalIndex
+          list of tokens (or their already built index) whose start/end ranges must be excluded
+        groups: tuple
+          names of the groups whose values are kept into the tokens, 0 being the whole match
 
         Returns
         -------
         tokens: list
-          list of token
+          list of Token
         """
 
-        def __tokenizer(source, re_search, exclude=None):
+        def __tokenizer(source, re_search, exclude=None, groups=()):
             tokens = []
-            for match in re.finditer(re_search, source):
-                safe = True
-                if exclude is not None:
-                    for exc in exclude:
-                        if match.start() >= exc["start"] and match.end() <= exc["end"]:
-                            safe = False
-                if safe:
-                    tokens.append({"match": match, "start": match.start(), "end": match.end()})
+            for match in Parser.compiled_for(re_search, source).finditer(source):
+                start, end = match.span()
+                if exclude is None or not exclude.contains(start, end):
+                    tokens.append(Token(start, end, {name: match.group(name) for name in groups} if groups else None))
             return tokens
 
-        tokens = __tokenizer(source=source, re_search=re_search, exclude=exclude)
+        if exclude is not None and not isinstance(exclude, IntervalIndex):
+            exclude = IntervalIndex(exclude)
+        tokens = __tokenizer(source=source, re_search=re_search, exclude=exclude, groups=groups)
         if len(tokens) == 0 and force_all:
-            tokens = __tokenizer(source=source, re_search=Parser.regexs["all"], exclude=exclude)
+            tokens = __tokenizer(source=source, re_search=Parser.regexs["all"], exclude=exclude, groups=("expr",))
             return tokens[:-1]
         return tokens
 
@@ -91,9 +152,89 @@ class Parser(object):
         """
         if len(tokens) > 0:
             for k, tok in enumerate(tokens[:-1]):
-                tok["end_next"] = tokens[k + 1]["start"]
+                tok.end_next = tokens[k + 1].start
             if end is not None:
-                tokens[-1]["end_next"] = end
+                tokens[-1].end_next = end
+        return tokens
+
+    @staticmethod
+    def heading_start(token: Token) -> int:
+        """Return the offset of the first '#' of a heading token, its match possibly including the preceding char.
+
+        Parameters
+        ----------
+        token: Token
+          heading token, keeping the whole match
+
+        Returns
+        -------
+        int
+        """
+        group = token.group()
+        return token.start + max(group.find("#" if isinstance(group, str) else b"#"), 0)
+
+    @staticmethod
+    def group_tokens(parents: list, children: list) -> list:
+        """Group children tokens by their parent token walking the two (sorted) lists once.
+
+        The parent of a child is the last parent starting at or before it, provided that the child starts before
+        the parent end; children preceding the first parent are not assigned.
+
+        Parameters
+        ----------
+        parents: list
+          tokens sorted by start, with end_next computed
+        children: list
+          tokens sorted by start
+
+        Returns
+        -------
+        groups: list
+          for each parent the list of the indexes of its children
+        """
+        groups = [[] for _ in parents]
+        p = -1
+        for c, child in enumerate(children):
+            while p + 1 < len(parents) and parents[p + 1].start <= child.start:
+                p += 1
+            if p >= 0 and child.start <= parents[p].end_next:
+                groups[p].append(c)
+        return groups
+
+    @staticmethod
+    def resolve_boundaries(tokens: list, boundaries: list, end: Optional[int] = None) -> list:
+        """Update the end of tokens accordingly to the start of the first boundary token following them.
+
+        All lists being sorted by start, the boundaries starts are merged into one stream that is swept once
+        together with the tokens. The end of a token is only shrunk: an already computed end_next (or end if passed)
+        is kept when no boundary precedes it.
+
+        Parameters
+        ----------
+        tokens: list
+        boundaries: list
+          list of tokens lists (tokens itself can be one of them)
+        end: int
+          end of the tokens not followed by any boundary
+
+        Returns
+        -------
+        tokens: list
+        """
+        starts = list(heapq.merge(*[[boundary.start for boundary in bounds] for bounds in boundaries]))
+        b = 0
+        for tok in tokens:
+            while b < len(starts) and starts[b] <= tok.start:
+                b += 1
+            limits = []
+            if tok.end_next is not None:
+                limits.append(tok.end_next)
+            if end is not None:
+                limits.append(end)
+            if b < len(starts):
+                limits.append(starts[b])
+            if len(limits) > 0:
+                tok.end_next = min(limits)
         return tokens
 
     @staticmethod
@@ -109,11 +250,7 @@ class Parser(object):
         -------
         slides: list
         """
-        for slide in slides:
-            for other in others:
-                if slide["start"] < other["start"] and slide["end_next"] >= other["start"]:
-                    slide["end_next"] = other["start"]
-        return slides
+        return Parser.resolve_boundaries(tokens=slides, boundaries=[others])
 
     def includes(self, source: str) -> str:
         """
@@ -129,67 +266,69 @@ class Parser(object):
         str:
           included sources stream
         """
-        codeblocks = self.tokenizer(source=source, re_search=self.regexs["codeblock"])
-        includeblocks = self.tokenizer(source=source, re_search=self.regexs["includeblock"], exclude=codeblocks)
-        if len(includeblocks) > 0:
-            complete_source = source[: includeblocks[0]["start"]]
-            for block, includeblock in enumerate(includeblocks[:-1]):
-                include_file = includeblock["match"].group("include")
-                if not os.path.exists(include_file):
-                    sys.stderr.write(f'Error: cannot include "{include_file}"')
-                    sys.exit(1)
-                else:
-                    with open(include_file, "r") as inc:
-                        other_source = inc.read()
-                    complete_source += other_source + source[includeblock["end"] : includeblocks[block + 1]["start"]]
-            include_file = includeblocks[-1]["match"].group("include")
-            if not os.path.exists(include_file):
-                sys.stderr.write(f'Error: cannot include "{include_file}"')
-                sys.exit(1)
+        return self.include_resolver.resolve(source=source)[0]
+
+    def scan(self, source: str) -> dict:
+        """Scan input source once collecting blocks and headings tokens.
+
+        Parameters
+        ----------
+        source: str|bytes|mmap|memoryview
+          input stream, bytes-like sources being scanned without decoding them
+
+        Returns
+        -------
+        tokens: dict
+          dictionary of tokens lists, each one sorted by start position; headings tokens keep the whole match and
+          the 'expr' group, YAML blocks tokens the whole match
+        """
+        kinds = {1: "chapters", 2: "sections", 3: "subsections", 4: "slides"}
+        tokens = {
+            "codeblocks": [],
+            "yamlblocks": [],
+            "fenceddivs": [],
+            "chapters": [],
+            "sections": [],
+            "subsections": [],
+            "slides": [],
+        }
+        for match in self.compiled_for(self.regexs["scanner"], source).finditer(source):
+            kind = match.lastgroup
+            if kind == "heading":
+                tokens[kinds[len(match.group("level"))]].append(Token.from_match(match, (0, "expr")))
+            elif kind == "yamlblock":
+                tokens["yamlblocks"].append(Token.from_match(match, (0,)))
             else:
-                with open(include_file, "r") as inc:
-                    other_source = inc.read()
-            complete_source += other_source + source[includeblocks[-1]["end"] :]
-            source = complete_source
-            source = self.includes(source=source)
-        return source
-
-    def tokenize(self, source):
+                tokens[kind + "s"].append(Token(match.start(), match.end()))
+        return tokens
+
+    def tokenize(self, source, tokens: Optional[dict] = None):
         """Tokenize input source returning tagged tokens.
 
         Parameters
         ----------
         source: str
           input stream
+        tokens: dict
+          tokens already collected by scan (e.g. by a DocumentIndex), completed in place; source is scanned if None
 
         Returns
         -------
         tokens: dict
-          dictionary of tokens; each element is a list of type [token, start_char, end_char]
+          dictionary of tokens lists (see scan), sectioning ones having end_next computed
         """
-        codeblocks = self.tokenizer(source=source, re_search=self.regexs["codeblock"])
-        yamlblocks = self.tokenizer(source=source, re_search=self.regexs["yamlblock"], exclude=codeblocks)
-        fenceddivs = self.tokenizer(source=source, re_search=self.regexs["fenceddiv"], exclude=codeblocks)
-        exclude_all = codeblocks + yamlblocks + fenceddivs
-        chapters = self.tokenizer(source=source, re_search=self.regexs["chapter"], exclude=exclude_all, force_all=True)
-        chapters = self.tokens_end_update(tokens=chapters, end=len(source))
-        sections = self.tokenizer(source=source, re_search=self.regexs["section"], exclude=exclude_all, force_all=True)
-        sections = self.tokens_end_update(tokens=sections, end=len(source))
-        subsections = self.tokenizer(
-            source=source, re_search=self.regexs["subsection"], exclude=exclude_all, force_all=True
+        if tokens is None:
+            tokens = self.scan(source=source)
+        for kind in ("chapters", "sections", "subsections"):
+            if len(tokens[kind]) == 0:
+                exclude_all = IntervalIndex(tokens["codeblocks"] + tokens["yamlblocks"] + tokens["fenceddivs"])
+                tokens[kind] = self.tokenizer(
+                    source=source, re_search=Parser.regexs["all"], exclude=exclude_all, groups=("expr",)
+                )[:-1]
+            tokens[kind] = self.tokens_end_update(tokens=tokens[kind], end=len(source))
+        self.resolve_boundaries(
+            tokens=tokens["slides"],
+            boundaries=[tokens["slides"], tokens["chapters"], tokens["sections"], tokens["subsections"]],
+            end=len(source),
         )
-        subsections = self.tokens_end_update(tokens=subsections, end=len(source))
-        slides = self.tokenizer(source=source, re_search=self.regexs["slide"], exclude=exclude_all)
-        slides = self.tokens_end_update(tokens=slides, end=len(source))
-        slides = self.slides_end_update(slides=slides, others=chapters)
-        slides = self.slides_end_update(slides=slides, others=sections)
-        slides = self.slides_end_update(slides=slides, others=subsections)
-        tokens = {
-            "codeblocks": codeblocks,
-            "yamlblocks": yamlblocks,
-            "chapters": chapters,
-            "sections": sections,
-            "subsections": subsections,
-            "slides": slides,
-        }
         return tokens
@@ -6,19 +6,23 @@ presentation.py, module definition of Presentation class.
 from __future__ import annotations
 
 import os
+from bisect import bisect_right
 from collections import OrderedDict
-from shutil import copytree
 
-from yaml import FullLoader, YAMLError, load_all
+from yaml import YAMLError
 
 from .chapter import Chapter
 from .diagram import Diagram
+from .document_index import DocumentIndex
+from .include_resolver import MAIN_SOURCE
 from .labels import LabelRegistry
 from .metadata import Metadata
 from .parser import Parser
 from .position import Position
+from .render_context import RenderContext
 from .section import Section
 from .slide import Slide
+from .source_map import SourceMap
 from .subsection import Subsection
 from .theme import Theme
 from .theorem import Theorem
@@ -37,7 +41,11 @@ class Presentation(object):
 
     @classmethod
     def reset(cls):
-        """Reset to default state."""
+        """Reset the class-level state used by the objects created without a build context (see CLASS_CONTEXT).
+
+        Presentations number their contents into their own RenderContext, thus neither creating nor building one
+        resets (or advances) this state.
+        """
         cls.chapters_number = 0
         Theme.reset()
         Chapter.reset()
@@ -52,7 +60,6 @@ class Presentation(object):
           presentation metadata; each element of the dictionary if a dict with ['value', 'user'] items: value contains
           the metadata value and user indicates if the value comes from user (if True) or from defaults (if False).
         """
-        self.reset()
         self.metadata = {
             "title": Metadata(name="title", value=""),
             "subtitle": Metadata(name="subtitle", value=""),
@@ -90,8 +97,14 @@ class Presentation(object):
         self.parser = Parser()
         self.chapters = []
         self.position = Position()
-        self.source: str = ""  # fully expanded source (after $include)
+        self.context = RenderContext()  # numbering and feature flags of this build
+        self.source: str = ""  # fully expanded source (after $include), bytes-like if memory-mapped
+        self.include_segments: list = []  # IncludeSegment offsets map of the expanded source
+        self.source_map = SourceMap()  # expanded source offsets -> original file:line:column
         self.yaml_source: str = ""  # concatenated YAML block content (used by reveal backend)
+        self.yaml_documents = None  # parsed documents of yaml_source, None if not valid YAML
+        self.document_index = None  # DocumentIndex of the last parsed source
+        self.slide_yaml_blocks: set = set()  # indexes (into document_index) of the YAML blocks into slides contents
         # Phase 7 — label registry for cross-references
         self.label_registry: LabelRegistry = LabelRegistry()
         # Phase 7b — bibliography (optional)
@@ -99,10 +112,10 @@ class Presentation(object):
         self.csl: str = ""  # path to .csl file
 
     def __str__(self):
-        strings = [f"Chapters number {Presentation.chapters_number}"]
-        strings.append(f"Sections number {Chapter.sections_number}")
-        strings.append(f"Subsections number {Section.subsections_number}")
-        strings.append(f"Slides number {Subsection.slides_number}")
+        strings = [f"Chapters number {self.context.number(Presentation, 'chapters_number')}"]
+        strings.append(f"Sections number {self.context.number(Chapter, 'sections_number')}")
+        strings.append(f"Subsections number {self.context.number(Section, 'subsections_number')}")
+        strings.append(f"Slides number {self.context.number(Subsection, 'slides_number')}")
         for chapter in self.chapters:
             strings.append(str(chapter))
         return "\n".join(strings)
@@ -110,40 +123,41 @@ class Presentation(object):
     def __update_toc(self):
         """Update TOC after a new chapter (the last one) has been added."""
         self.metadata["toc"].value[self.chapters[-1].title] = self.chapters[-1].toc
+        self.metadata["toc"].clear_toc_skeletons()
 
-    def __get_metadata(self, source):
+    def __get_metadata(self, index):
         """
-        Get metadata from source stream.
+        Get metadata from the YAML blocks of the document index.
 
         Parameters
         ----------
-        source: str
+        index: DocumentIndex
         """
-        codeblocks = self.parser.tokenizer(source=source, re_search=self.parser.regexs["codeblock"])
-        yamlblocks = self.parser.tokenizer(source=source, re_search=self.parser.regexs["yamlblock"], exclude=codeblocks)
-        try:
-            for block in yamlblocks:
-                for data in load_all(block["match"].group().strip("---"), Loader=FullLoader):
-                    if "metadata" in data:
-                        for element in data["metadata"]:
-                            for key in element:
-                                if key in self.metadata:
-                                    self.metadata[key].update_value(value=element[key])
-        except YAMLError:
-            print("No valid definition of metadata has been found")
-
-    def __get_theme(self, source):
+        for documents, error in index.yaml_blocks:
+            for data in documents:
+                if "metadata" in data:
+                    for element in data["metadata"]:
+                        for key in element:
+                            if key in self.metadata:
+                                self.metadata[key].update_value(value=element[key])
+            if error is not None:
+                print("No valid definition of metadata has been found")
+                break
+
+    def __get_theme(self, index):
         """
-        Get theme from source stream.
+        Get theme from the YAML blocks of the document index.
 
         Parameters
         ----------
-        source: str
+        index: DocumentIndex
         """
-        codeblocks = self.parser.tokenizer(source=source, re_search=self.parser.regexs["codeblock"])
-        yamlblocks = self.parser.tokenizer(source=source, re_search=self.parser.regexs["yamlblock"], exclude=codeblocks)
-        self.yaml_source = "".join([block["match"].group().strip("---") for block in yamlblocks])
-        self.theme.get(self.yaml_source)
+        self.yaml_source = index.yaml_source
+        try:
+            self.yaml_documents = index.yaml_documents
+        except YAMLError:
+            self.yaml_documents = None  # the theme parsing reports the invalid definition
+        self.theme.get(self.yaml_source, documents=self.yaml_documents)
 
     def __add_chapter(self, chapter):
         """
@@ -153,7 +167,7 @@ class Presentation(object):
         ----------
         chapter: Chapter
         """
-        Presentation.chapters_number += 1
+        self.context.next_number(Presentation, "chapters_number")
         self.chapters.append(chapter)
         self.__update_toc()
 
@@ -163,17 +177,18 @@ class Presentation(object):
         Parameters
         ----------
         tokens: Parser.tokens
-        source: str
         """
-        if "$titlepage" not in tokens["slides"][0]["match"].group().lower():
+        if "$titlepage" not in self.parser.decode(tokens["slides"][0].group()).lower():
             if (
-                tokens["slides"][0]["start"] < tokens["subsections"][0]["start"]
-                or tokens["slides"][0]["start"] < tokens["sections"][0]["start"]
-                or tokens["slides"][0]["start"] < tokens["chapters"][0]["start"]
+                tokens["slides"][0].start < tokens["subsections"][0].start
+                or tokens["slides"][0].start < tokens["sections"][0].start
+                or tokens["slides"][0].start < tokens["chapters"][0].start
             ):
                 print("Warning: found bad presentation sectioning!")
-                print("The slide definition:")
-                print(tokens["slides"][0]["match"].group() + "\n")
+                print(
+                    f"The slide definition at {self.source_map.locate(self.parser.heading_start(tokens['slides'][0]))}:"
+                )
+                print(self.parser.decode(tokens["slides"][0].group()) + "\n")
                 print("is placed before the first defined chapter/section/subsection.")
                 print("All contents before the first defined chapter/section/subsection is omitted!")
                 print()
@@ -200,47 +215,71 @@ class Presentation(object):
             contents=f"$toc[depth:{depth}]",
         )
 
+    def __get_slide_overtheme(self, slide, token, complete_source):
+        """Set the slide overtheme from the YAML blocks the document index places into the slide contents.
+
+        Slides without YAML blocks skip any work, the others reuse the YAML documents already parsed by the index.
+
+        Parameters
+        ----------
+        slide : Slide
+        token : Token
+          slide heading token
+        complete_source : str|memoryview
+        """
+        index = self.document_index
+        blocks = index.yaml_blocks_between(token.end, token.end_next)
+        if len(blocks) == 0:
+            return
+        self.slide_yaml_blocks.update(blocks)
+        try:
+            documents = index.merged_documents(blocks)
+        except YAMLError:
+            documents = None  # the overtheme parsing reports the invalid definition
+        pieces = []
+        cursor = token.end
+        for b in blocks:
+            pieces.append(complete_source[cursor : index.yamlblocks[b].start])
+            cursor = index.yamlblocks[b].end
+        pieces.append(complete_source[cursor : token.end_next])
+        slide.set_overtheme(
+            yaml="".join([index.yaml_texts[b] for b in blocks]),
+            contents=("" if isinstance(complete_source, str) else b"").join(pieces),
+            documents=documents,
+        )
+
     def __build_slides(
-        self,
-        tokens,
-        subsec,
-        subsection,
-        slides_number,
-        slide_local_numbers,
-        titlepage_inserted,
-        complete_source,
-        config,
+        self, slides, titlepage, subsection, slides_number, slide_local_numbers, complete_source, config
     ):
-        """Build slides for one subsection token, inserting TOC slides as configured.
+        """Build slides for one subsection, inserting TOC slides as configured.
 
         Parameters
         ----------
-        tokens : dict
-        subsec : dict
-          subsection token
+        slides : list
+          slide tokens of the subsection, sorted by start
+        titlepage : Token
+          the titlepage slide token if it is contained into slides, None otherwise
         subsection : Subsection
         slides_number : int
         slide_local_numbers : list
-        titlepage_inserted : bool
         complete_source : str
         config : MatisseConfig
 
         Returns
         -------
         slides_number : int
-        titlepage_inserted : bool
         """
-        for sld in tokens["slides"]:
-            if "$titlepage" in sld["match"].group().lower() and not titlepage_inserted:
-                slide = Slide(number=0, title="titlepage", contents=complete_source[sld["end"] : sld["end_next"]])
-                slide.get_overtheme(parser=self.parser)
+        for sld in slides:
+            if sld is titlepage:
+                slide = Slide(number=0, title="titlepage", contents=complete_source[sld.end : sld.end_next])
+                slide.source_span = (self.parser.heading_start(sld), sld.end_next)
+                self.__get_slide_overtheme(slide=slide, token=sld, complete_source=complete_source)
                 if slide.overtheme.copy_from_theme is not None and slide.overtheme.copy_from_theme:
                     slide.overtheme.copy_from(other=self.theme)
                 self.position.update_position(presentation_theme=self.theme, overtheme=slide.overtheme)
                 slide.set_position(position=self.position.position)
                 subsection.add_slide(slide=slide)
-                titlepage_inserted = True
-            elif sld["start"] >= subsec["start"] and sld["start"] <= subsec["end_next"]:
+            else:
                 slide_local_numbers[0] += 1
                 slide_local_numbers[1] += 1
                 slide_local_numbers[2] += 1
@@ -256,19 +295,24 @@ class Presentation(object):
                 slides_number += 1
                 slide = Slide(
                     number=slides_number,
-                    title=sld["match"].group("expr"),
-                    contents=complete_source[sld["end"] : sld["end_next"]],
+                    title=self.parser.decode(sld.group("expr")),
+                    contents=complete_source[sld.end : sld.end_next],
                 )
-                slide.get_overtheme(parser=self.parser)
+                slide.source_span = (self.parser.heading_start(sld), sld.end_next)
+                self.__get_slide_overtheme(slide=slide, token=sld, complete_source=complete_source)
                 if slide.overtheme.copy_from_theme is not None and slide.overtheme.copy_from_theme:
                     slide.overtheme.copy_from(other=self.theme)
                 self.position.update_position(presentation_theme=self.theme, overtheme=slide.overtheme)
                 slide.set_position(position=self.position.position)
                 subsection.add_slide(slide=slide)
-        return slides_number, titlepage_inserted
+        return slides_number
 
     def __parse_chapters(self, tokens, complete_source, config):
-        """Iterate over chapter/section/subsection/slide tokens to build the document tree.
+        """Build the document tree attaching each sectioning/slide token to its parent.
+
+        The (sorted) tokens lists are grouped by their parents in a single walk for each level, thus the tree is
+        built in linear time. The titlepage slide (the first one whose heading contains $titlepage) is placed into
+        the first subsection of the presentation, wherever it is defined.
 
         Parameters
         ----------
@@ -276,61 +320,101 @@ class Presentation(object):
         complete_source : str
         config : MatisseConfig
         """
+        sections_of = self.parser.group_tokens(parents=tokens["chapters"], children=tokens["sections"])
+        subsections_of = self.parser.group_tokens(parents=tokens["sections"], children=tokens["subsections"])
+        slides_of = self.parser.group_tokens(parents=tokens["subsections"], children=tokens["slides"])
+        titlepage = None
+        for sld in tokens["slides"]:
+            if "$titlepage" in self.parser.decode(sld.group()).lower():
+                titlepage = sld
+                break
         chapters_number = 0
         sections_number = 0
         subsections_number = 0
         slides_number = 0
-        titlepage_inserted = False
-        for chap in tokens["chapters"]:
+        for c, chap in enumerate(tokens["chapters"]):
             chapters_number += 1
             slide_local_numbers = [0, 0, 0]
-            title = chap["match"].group("expr") or ""
-            chapter = Chapter(number=chapters_number, title=title)
-            for sec in tokens["sections"]:
-                if sec["start"] >= chap["start"] and sec["start"] <= chap["end_next"]:
-                    sections_number += 1
-                    slide_local_numbers[1] = 0
+            title = self.parser.decode(chap.group("expr")) or ""
+            chapter = Chapter(number=chapters_number, title=title, context=self.context)
+            for s in sections_of[c]:
+                sec = tokens["sections"][s]
+                sections_number += 1
+                slide_local_numbers[1] = 0
+                slide_local_numbers[2] = 0
+                section = Section(
+                    number=sections_number, title=self.parser.decode(sec.group("expr")), context=self.context
+                )
+                for ss in subsections_of[s]:
+                    subsec = tokens["subsections"][ss]
+                    subsections_number += 1
                     slide_local_numbers[2] = 0
-                    section = Section(number=sections_number, title=sec["match"].group("expr"))
-                    for subsec in tokens["subsections"]:
-                        if subsec["start"] >= sec["start"] and subsec["start"] <= sec["end_next"]:
-                            subsections_number += 1
-                            slide_local_numbers[2] = 0
-                            subsection = Subsection(number=subsections_number, title=subsec["match"].group("expr"))
-                            slides_number, titlepage_inserted = self.__build_slides(
-                                tokens=tokens,
-                                subsec=subsec,
-                                subsection=subsection,
-                                slides_number=slides_number,
-                                slide_local_numbers=slide_local_numbers,
-                                titlepage_inserted=titlepage_inserted,
-                                complete_source=complete_source,
-                                config=config,
-                            )
-                            section.add_subsection(subsection=subsection)
-                    chapter.add_section(section=section)
+                    subsection = Subsection(
+                        number=subsections_number,
+                        title=self.parser.decode(subsec.group("expr")),
+                        context=self.context,
+                    )
+                    slides = [tokens["slides"][k] for k in slides_of[ss]]
+                    if titlepage is not None and not any(sld is titlepage for sld in slides):
+                        position = bisect_right([sld.start for sld in slides], titlepage.start)
+                        slides.insert(position, titlepage)
+                    slides_number = self.__build_slides(
+                        slides=slides,
+                        titlepage=titlepage,
+                        subsection=subsection,
+                        slides_number=slides_number,
+                        slide_local_numbers=slide_local_numbers,
+                        complete_source=complete_source,
+                        config=config,
+                    )
+                    titlepage = None
+                    section.add_subsection(subsection=subsection)
+                chapter.add_section(section=section)
             self.__add_chapter(chapter=chapter)
-            self.metadata["total_slides_number"].update_value(value=str(Subsection.slides_number))
+            self.metadata["total_slides_number"].update_value(
+                value=str(self.context.number(Subsection, "slides_number"))
+            )
 
-    def parse(self, config, source: str) -> None:
+    def parse(
+        self, config, source: str, source_path: str = None, prelude_length: int = 0, include_resolver=None
+    ) -> None:
         """Parse presentation from source stream.
 
         Parameters
         ----------
         config : MatisseConfig
           MaTiSSe configuration
-        source: str
+        source: str|bytes|mmap
+          bytes-like sources (see MatisseConfig.mmap_source) are tokenized without decoding them, slides contents
+          being decoded only when rendered
+        source_path: str
+          path of the file source has been read from, used for reporting locations
+        prelude_length: int
+          length of the text prepended to the file contents (e.g. builtin theme includes)
+        include_resolver: IncludeResolver
+          resolver of $include statements kept across builds (e.g. by the watch and serve loops), thus the included
+          files not modified since the previous build are not read again; by default the parser one
         """
-        complete_source = self.parser.includes(source=source)
+        resolver = self.parser.include_resolver if include_resolver is None else include_resolver
+        if source_path is None:
+            complete_source, self.include_segments = resolver.resolve(source=source)
+        else:
+            complete_source, self.include_segments = resolver.resolve(source=source, origin=source_path)
+        self.source_map = SourceMap(segments=self.include_segments, sources=resolver.sources)
+        self.source_map.strip_prelude(path=source_path or MAIN_SOURCE, length=prelude_length)
         self.source = complete_source
         if config.print_parsed_source:
-            print(complete_source)
-        self.__get_metadata(source=complete_source)
-        self.__get_theme(source=complete_source)
+            print(self.parser.decode(complete_source))
+        self.document_index = DocumentIndex(parser=self.parser, source=complete_source)
+        self.slide_yaml_blocks = set()
+        self.__get_metadata(index=self.document_index)
+        self.__get_theme(index=self.document_index)
         new_theme = Theme()
         new_theme.set_from(other=self.theme)
-        tokens = self.parser.tokenize(source=complete_source)
+        tokens = self.parser.tokenize(source=complete_source, tokens=self.document_index.tokens)
         self.__check_bad_sectioning(tokens=tokens)
+        if not isinstance(complete_source, str):
+            complete_source = memoryview(complete_source)  # slides contents are zero-copy views until decoded
         self.__parse_chapters(tokens=tokens, complete_source=complete_source, config=config)
         # Phase 7 — collect labels for cross-reference resolution
         self._collect_labels()
@@ -346,7 +430,7 @@ class Presentation(object):
             for section in chapter.sections:
                 for subsection in section.subsections:
                     for slide in subsection.slides:
-                        self.label_registry.collect_from_source(slide.contents or "")
+                        self.label_registry.collect_from_source(slide.raw_contents or "")
                         # Also scan heading attrs for labeled figures, etc.
                         for key, val in slide.heading_attrs.items():
                             pass  # heading attrs don't carry #{} labels directly
@@ -363,56 +447,78 @@ class Presentation(object):
 
         return ImpressBackend(config).render(self)
 
-    def save(self, config, output):
-        """Save the html form of presentation into external file.
+    def make_backend(self, config):
+        """Return the rendering backend configured.
 
         Parameters
         ----------
         config : MatisseConfig
           MaTiSSe configuration
-        output : str
-          output path
-        """
-        if not os.path.exists(output):
-            os.makedirs(output)
 
+        Returns
+        -------
+        AbstractBackend
+        """
         if config.backend == "reveal":
             from .backends.reveal.renderer import RevealBackend
 
-            backend = RevealBackend(config)
-        else:
-            from .backends.impress.renderer import ImpressBackend
+            return RevealBackend(config)
+        from .backends.impress.renderer import ImpressBackend
 
-            backend = ImpressBackend(config)
+        return ImpressBackend(config)
 
-        with open(os.path.join(output, "index.html"), "w") as html:
-            html.write(backend.render(self))
+    def output_css(self, config):
+        """Yield the CSS files generated for the presentation, written into the output tree by save.
 
-        # copy user defined directories if set
-        if len(self.metadata["dirs_to_copy"].value) > 0:
-            for data in self.metadata["dirs_to_copy"].value:
-                copytree(data, os.path.join(output, data), dirs_exist_ok=True)
+        Parameters
+        ----------
+        config : MatisseConfig
+          MaTiSSe configuration
 
+        Yields
+        ------
+        tuple
+          (path into the output tree, CSS contents)
+        """
         # regenerate pygments.css if the theme specifies a code style override
         if config.code_highlight:
             effective_style = self.theme.code_style if self.theme.code_style else config.code_style
             if effective_style != config.code_style:
                 from .markdown_utils import get_pygments_css
 
-                with open(os.path.join(output, "css", "pygments.css"), "w") as fh:
-                    fh.write(get_pygments_css(style=effective_style))
+                yield os.path.join("css", "pygments.css"), get_pygments_css(style=effective_style)
 
         # impress.js-specific CSS assets (theme.css + per-slide overtheme CSS)
         if config.backend != "reveal":
-            with open(os.path.join(output, "css/theme.css"), "w") as css_theme:
-                css_theme.writelines(self.theme.css)
+            yield "css/theme.css", self.theme.css
             for chapter in self.chapters:
                 for section in chapter.sections:
                     for subsection in section.subsections:
                         for slide in subsection.slides:
                             if slide.overtheme.custom:
-                                with open(
-                                    os.path.join(output, f"css/slide-{slide.number}-overtheme.css"),
-                                    "w",
-                                ) as css_theme:
-                                    css_theme.writelines(slide.overtheme.css)
+                                yield f"css/slide-{slide.number}-overtheme.css", slide.overtheme.css
+
+    def save(self, config, output):
+        """Save the html form of presentation into external file.
+
+        Parameters
+        ----------
+        config : MatisseConfig
+          MaTiSSe configuration
+        output : str
+          output path
+        """
+        if not os.path.exists(output):
+            os.makedirs(output)
+
+        backend = self.make_backend(config)
+        with open(os.path.join(output, "index.html"), "w") as html:
+            backend.write(self, html, indent=config.indent, minify=config.minify)
+
+        # mirror user defined directories if set
+        if len(self.metadata["dirs_to_copy"].value) > 0:
+            config.mirror_dirs(output, self.metadata["dirs_to_copy"].value)
+
+        for path, css in self.output_css(config):
+            with open(os.path.join(output, path), "w") as css_file:
+                css_file.write(css)
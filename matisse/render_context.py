@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+render_context.py, module definition of RenderContext class.
+
+The state a build advances while parsing and rendering (sectioning and environments numbering, theorem-like
+counters per kind, diagram engines used) is held by one RenderContext per presentation and threaded through parsing
+and rendering, thus many presentations can be built concurrently (threads, asyncio tasks) in one process.
+
+Objects created without a context (e.g. a standalone Box) use CLASS_CONTEXT, which keeps the state into the class
+attributes of their classes (Box.boxes_number, Theorem._counters, Diagram.has_mermaid...) as before.
+"""
+
+from __future__ import annotations
+
+
+class RenderContext(object):
+    """
+    Per-build numbering and feature flags.
+
+    Each counter or flag is named after the class attribute it replaces, its owner class being passed along for
+    CLASS_CONTEXT.
+
+    Attributes
+    ----------
+    numbers: dict
+      value of each counter, e.g. {'boxes_number': 3}
+    keyed_numbers: dict
+      value of each counter of keyed counters families, e.g. {'_counters': {'thm': 2, 'lem': 1}}
+    flags: set
+      names of the flags set, e.g. {'has_mermaid'}
+    """
+
+    def __init__(self) -> None:
+        self.numbers: dict = {}
+        self.keyed_numbers: dict = {}
+        self.flags: set = set()
+
+    def __repr__(self):
+        return f"RenderContext(numbers={self.numbers}, keyed_numbers={self.keyed_numbers}, flags={self.flags})"
+
+    def number(self, owner, name: str) -> int:
+        """Return the current value of a counter."""
+        return self.numbers.get(name, 0)
+
+    def next_number(self, owner, name: str) -> int:
+        """Advance a counter returning its new value.
+
+        Parameters
+        ----------
+        owner: class
+          class the counter belongs to
+        name: str
+          counter name
+
+        Returns
+        -------
+        int
+        """
+        self.numbers[name] = self.numbers.get(name, 0) + 1
+        return self.numbers[name]
+
+    def next_keyed_number(self, owner, name: str, key) -> int:
+        """Advance the counter of a key into a keyed counters family returning its new value.
+
+        Parameters
+        ----------
+        owner: class
+          class the counters family belongs to
+        name: str
+          counters family name
+        key: hashable
+          counter key, e.g. the theorem-like environment prefix
+
+        Returns
+        -------
+        int
+        """
+        counters = self.keyed_numbers.setdefault(name, {})
+        counters[key] = counters.get(key, 0) + 1
+        return counters[key]
+
+    def flag(self, owner, name: str) -> bool:
+        """Check if a flag is set."""
+        return name in self.flags
+
+    def set_flag(self, owner, name: str) -> None:
+        """Set a flag."""
+        self.flags.add(name)
+
+    def snapshot(self) -> tuple:
+        """Return a copy of the state, that restore can bring back."""
+        return dict(self.numbers), {name: dict(keyed) for name, keyed in self.keyed_numbers.items()}, set(self.flags)
+
+    def restore(self, state: tuple) -> None:
+        """Bring back a state returned by snapshot."""
+        numbers, keyed_numbers, flags = state
+        self.numbers = dict(numbers)
+        self.keyed_numbers = {name: dict(keyed) for name, keyed in keyed_numbers.items()}
+        self.flags = set(flags)
+
+
+def add_states(first: tuple, second: tuple) -> tuple:
+    """Return the sum of two RenderContext states, flags being or-ed."""
+    numbers = dict(first[0])
+    for name, value in second[0].items():
+        numbers[name] = numbers.get(name, 0) + value
+    keyed_numbers = {name: dict(keyed) for name, keyed in first[1].items()}
+    for name, keyed in second[1].items():
+        counters = keyed_numbers.setdefault(name, {})
+        for key, value in keyed.items():
+            counters[key] = counters.get(key, 0) + value
+    return numbers, keyed_numbers, first[2] | second[2]
+
+
+def subtract_states(last: tuple, first: tuple) -> tuple:
+    """Return the counters advanced from the state first to the state last, with the flags of last not set in first."""
+    numbers = {name: value - first[0].get(name, 0) for name, value in last[0].items()}
+    keyed_numbers = {
+        name: {key: value - first[1].get(name, {}).get(key, 0) for key, value in keyed.items()}
+        for name, keyed in last[1].items()
+    }
+    return numbers, keyed_numbers, last[2] - first[2]
+
+
+class ClassContext(RenderContext):
+    """
+    Context keeping the state into the class attributes of the owners, used by objects created without a context.
+    """
+
+    def __repr__(self):
+        return "ClassContext()"
+
+    def number(self, owner, name: str) -> int:
+        return getattr(owner, name)
+
+    def next_number(self, owner, name: str) -> int:
+        setattr(owner, name, getattr(owner, name) + 1)
+        return getattr(owner, name)
+
+    def next_keyed_number(self, owner, name: str, key) -> int:
+        counters = getattr(owner, name)
+        counters[key] = counters.get(key, 0) + 1
+        return counters[key]
+
+    def flag(self, owner, name: str) -> bool:
+        return getattr(owner, name)
+
+    def set_flag(self, owner, name: str) -> None:
+        setattr(owner, name, True)
+
+
+CLASS_CONTEXT = ClassContext()
@@ -5,6 +5,7 @@ section.py, module definition of Section class.
 
 from collections import OrderedDict
 
+from .render_context import CLASS_CONTEXT
 from .subsection import Subsection
 
 
@@ -25,7 +26,8 @@ class Section(object):
         cls.subsections_number = 0
         Subsection.reset()
 
-    def __init__(self, number, title=None):
+    def __init__(self, number, title=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
         self.number = number
         self.title = title
         self.subsections = []
@@ -49,7 +51,7 @@ class Section(object):
         ----------
         subsection: Subsection
         """
-        Section.subsections_number += 1
+        self.context.next_number(Section, "subsections_number")
         self.subsections.append(subsection)
         self.update_toc()
 
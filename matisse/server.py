@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+server.py, module definition of MemoryBuild class.
+
+The live-preview server builds a presentation into memory and serves it over http.server: index.html and the
+generated CSS are held in memory, the MaTiSSe assets and the dirs_to_copy trees are served from where they are, thus
+nothing is written into an output tree. Whenever the sources change the presentation is built again, through a build
+cache (see BuildCache) rendering only the slides changed, and the pages served are told to reload by Server-Sent
+Events. Each page keeps its position across reloads: impress.js and reveal.js keep the current step or slide into the
+URL hash, reveal.js fragments are saved into the session storage.
+"""
+
+from __future__ import annotations
+
+import io
+import mimetypes
+import os
+import posixpath
+import shutil
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from .include_resolver import IncludeResolver
+from .markdown_utils import MARKDOWN_CACHE, get_pygments_css
+from .parser import Parser
+from .presentation import Presentation
+from .watcher import dependencies, make_watcher, read_source, temporary_build_cache, trees_only
+
+EVENTS_PATH = "/__matisse__/events"
+
+# seconds between two keep-alive comments of the events streams, closed streams being detected by failing writes
+_KEEP_ALIVE = 15.0
+
+RELOAD_SCRIPT = f"""<script>
+(function () {{
+  var key = "matisse-serve-indices";
+  var saved = sessionStorage.getItem(key);
+  sessionStorage.removeItem(key);
+  if (saved && window.Reveal) {{
+    var restore = function () {{
+      var indices = JSON.parse(saved);
+      Reveal.slide(indices.h, indices.v, indices.f);
+    }};
+    if (Reveal.isReady()) {{ restore(); }} else {{ Reveal.on("ready", restore); }}
+  }}
+  new EventSource("{EVENTS_PATH}").addEventListener("reload", function () {{
+    if (window.Reveal && Reveal.isReady()) {{
+      sessionStorage.setItem(key, JSON.stringify(Reveal.getIndices()));
+    }}
+    location.reload();
+  }});
+}})();
+</script>
+"""
+
+
+class MemoryBuild(object):
+    """
+    Presentation built into memory.
+
+    Attributes
+    ----------
+    config: MatisseConfig
+    source_path: str
+      path of the presentation input file
+    files: dict
+      contents (bytes) of the generated files, by path into the output tree
+    assets: dict
+      files and directories served from where they are, by path into the output tree
+    presentation: Presentation
+      last presentation built, None if no build succeeded
+    version: int
+      number of the builds (and of the dirs_to_copy changes), the pages reloading whenever it changes
+    changed: threading.Condition
+      notified whenever version changes
+    include_resolver: IncludeResolver
+      resolver of $include statements kept across the builds, thus only the modified included files are read again
+    """
+
+    def __init__(self, config, source_path: str) -> None:
+        self.config = config
+        self.source_path: str = source_path
+        self.files: dict = {}
+        self.assets: dict = {}
+        self.presentation = None
+        self.version: int = 0
+        self.changed = threading.Condition()
+        self.include_resolver = IncludeResolver(parser=Parser())
+
+    def __repr__(self):
+        return f"MemoryBuild({self.source_path}, version {self.version}, {len(self.files)} files)"
+
+    def build(self) -> None:
+        """Build the presentation into memory, the pages served being reloaded.
+
+        Raises
+        ------
+        Exception, SystemExit
+          if the presentation cannot be built; the previous build is kept
+        """
+        from .matisse import themed_source
+
+        config = self.config
+        MARKDOWN_CACHE.resize(config.md_cache_size)
+        if config.md_cache:
+            MARKDOWN_CACHE.load(config.md_cache)
+        try:
+            source, prelude_length = themed_source(
+                config=config, source=read_source(config, self.source_path), output=None
+            )
+            presentation = Presentation()
+            presentation.parse(
+                config=config,
+                source=source,
+                source_path=self.source_path,
+                prelude_length=prelude_length,
+                include_resolver=self.include_resolver,
+            )
+            html = io.StringIO()
+            presentation.make_backend(config).write(presentation, html, indent=config.indent, minify=config.minify)
+        finally:
+            if config.theme is not None:
+                shutil.rmtree("theme-" + config.theme, ignore_errors=True)
+        if config.md_cache:
+            MARKDOWN_CACHE.save(config.md_cache)
+        index = html.getvalue()
+        # the reload script goes last, after the impress.js or reveal.js initialization
+        at = index.rfind("</body>")
+        files = {"index.html": (index[:at] + RELOAD_SCRIPT + index[at:]) if at >= 0 else index + RELOAD_SCRIPT}
+        if config.code_highlight:
+            files["css/pygments.css"] = get_pygments_css(style=config.code_style)
+        for path, css in presentation.output_css(config):
+            files[path.replace(os.sep, "/")] = css
+        assets = dict(config.output_assets())
+        for tree in presentation.metadata["dirs_to_copy"].value:
+            assets[posixpath.normpath(tree.replace(os.sep, "/"))] = tree
+        if config.theme is not None:
+            # the theme copy is removed once the sources are parsed, its files are served from the package
+            assets["theme-" + config.theme] = config.builtin_theme_dir()
+        self.files = {path: contents.encode("utf-8") for path, contents in files.items()}
+        self.assets = assets
+        self.presentation = presentation
+        self.reload()
+
+    def reload(self) -> None:
+        """Tell the pages served to reload."""
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def lookup(self, path: str):
+        """Return what is served at a path of the output tree.
+
+        Parameters
+        ----------
+        path: str
+          URL path, e.g. '/css/theme.css'
+
+        Returns
+        -------
+        bytes|str|None
+          contents of a generated file, path of a file served from where it is, None if there is nothing
+        """
+        path = posixpath.normpath(unquote(path)).lstrip("/")
+        if path in ("", "."):
+            path = "index.html"
+        if path in self.files:
+            return self.files[path]
+        for target, asset in self.assets.items():
+            if path == target and os.path.isfile(asset):
+                return asset
+            if path.startswith(target + "/") and os.path.isdir(asset):
+                root = os.path.realpath(asset)
+                candidate = os.path.realpath(os.path.join(root, *path[len(target) + 1 :].split("/")))
+                # no way out of the directory served (e.g. by symbolic links)
+                if candidate.startswith(root + os.sep) and os.path.isfile(candidate):
+                    return candidate
+        return None
+
+
+def make_server(build: MemoryBuild, host: str = "127.0.0.1", port: int = 8000, verbose: bool = False):
+    """Return an HTTP server (not started yet) serving a MemoryBuild and its reload events.
+
+    Parameters
+    ----------
+    build: MemoryBuild
+    host: str
+    port: int
+      0 for any free port
+    verbose: bool
+      log the requests
+
+    Returns
+    -------
+    ThreadingHTTPServer
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == EVENTS_PATH:
+                self._events()
+                return
+            found = build.lookup(path)
+            if found is None:
+                self.send_error(404)
+                return
+            if isinstance(found, bytes):
+                contents = found
+                # generated files are UTF-8 text
+                kind = mimetypes.guess_type(posixpath.basename(path) or "index.html")[0] + "; charset=utf-8"
+            else:
+                with open(found, "rb") as stream:
+                    contents = stream.read()
+                kind = mimetypes.guess_type(found)[0] or "application/octet-stream"
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(contents)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(contents)
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            version = build.version
+            try:
+                self.wfile.write(b"retry: 1000\n\n")
+                self.wfile.flush()
+                while not getattr(self.server, "closing", False):
+                    with build.changed:
+                        build.changed.wait_for(lambda: build.version != version, timeout=_KEEP_ALIVE)
+                    if build.version != version:
+                        version = build.version
+                        self.wfile.write(f"event: reload\ndata: {version}\n\n".encode("utf-8"))
+                    else:
+                        self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_presentation(config, source_path: str, host: str = "127.0.0.1", port: int = 8000, watcher=None) -> None:
+    """Serve a presentation built into memory, building it again whenever its sources change, until interrupted.
+
+    Parameters
+    ----------
+    config : MatisseConfig
+      MaTiSSe configuration; without config.build_cache the rendered slides are cached into a temporary directory
+    source_path : str
+      path of the presentation input file
+    host : str
+    port : int
+    watcher : PollingWatcher, optional
+      watcher to use, by default the one returned by make_watcher
+    """
+    build = MemoryBuild(config=config, source_path=source_path)
+    watcher = make_watcher() if watcher is None else watcher
+    server = None
+    try:
+        with temporary_build_cache(config):
+            server = make_server(build, host=host, port=port, verbose=config.verbose)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            print(f"Serving {source_path} at http://{host}:{server.server_address[1]}/ (Ctrl-C to stop)")
+            trees = []
+            changed = set()
+            while True:
+                start = time.perf_counter()
+                if changed and trees_only(changed, watcher, trees):
+                    # dirs_to_copy files are served from where they are
+                    build.reload()
+                else:
+                    try:
+                        build.build()
+                    except (Exception, SystemExit) as error:
+                        # the last good build is still served, an edit can fix the error
+                        sys.stderr.write(
+                            f"Error: build failed ({type(error).__name__}: {error}), waiting for changes\n"
+                        )
+                        if not watcher.files:
+                            watcher.watch(files=[source_path])
+                    else:
+                        files, trees = dependencies(build.presentation, source_path)
+                        watcher.watch(files=files, trees=trees)
+                        print(f"Built {source_path} in {time.perf_counter() - start:.2f}s")
+                changed = watcher.changes()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if server is not None:
+            server.closing = True
+            with build.changed:
+                build.changed.notify_all()
+            server.shutdown()
+            server.server_close()
@@ -12,7 +12,9 @@ from .diagram import Diagram
 from .figure import Figure
 from .figure_group import FigureGroup
 from .incremental import PAUSE_RE, IncrementalList
+from .interval_index import IntervalIndex
 from .markdown_utils import markdown2html
+from .metadata import Metadata
 from .note import Note
 from .substep import Substep
 from .table import Table
@@ -37,6 +39,25 @@ _BACKGROUND_KEYS = frozenset(
     ]
 )
 
+# Environments expanded by Slide.to_html, in their processing order: subfigure groups MUST run before Figure so the
+# inner $figure...$endfigure blocks are still in raw form when FigureGroup extracts them. Each environment is paired
+# with the opener that must be present into the source for the environment to be expanded.
+_ENVIRONMENTS = (
+    (FigureGroup, FigureGroup.regexs["figure_group"], ":::"),
+    (Box, Box.regexs["box"], "$box"),
+    (Note, Note.regexs["note"], "$note"),
+    (Figure, Figure.regexs["figure"], "$figure"),
+    (Table, Table.regexs["table"], "$table"),
+    (Video, Video.regexs["video"], "$video"),
+    (Columns, Columns.regexs["columns"], "$columns"),
+    (Substep, Substep.regexs["substep"], "$substep"),
+    (Callout, Callout.regexs["callout"], ":::"),
+    (Theorem, Theorem.regexs["theorem"], ":::"),
+    (IncrementalList, IncrementalList.regexs["incremental"], ":::"),
+)
+# Single-pass scanner of the environments openers.
+_ENV_OPENERS = re.compile(r"\$(?:box|note|figure|table|video|columns|substep)|:::")
+
 
 def _parse_attr_block(attrs_str: str) -> dict:
     """Parse a ``key=value`` attribute string into a dict.
@@ -73,7 +94,8 @@ class Slide(object):
           position dictionary containing {'x': posx, 'y': posy, 'z': posz,
           'rotx': rotx, 'roty': roty, 'rotz': rotz, 'scale': scaling}
         title: str
-        contents: str
+        contents: str|bytes|memoryview
+          bytes-like contents (of memory-mapped sources) are decoded lazily, at their first access
         """
         self.number = number
         self.position = None
@@ -81,6 +103,8 @@ class Slide(object):
         self.contents = contents
         self.overtheme = Theme()
         self.raw_overtheme_yaml: str = ""  # preserved for backend-specific parsing
+        self.overtheme_documents = None  # parsed documents of raw_overtheme_yaml, if already available
+        self.source_span = None  # (start, end) offsets into the expanded source, see Presentation.source_map
 
         # Phase 5 — heading attribute parsing
         raw_title = title or ""
@@ -92,6 +116,30 @@ class Slide(object):
             self.heading_attrs = {}
             self.title = raw_title
 
+    @property
+    def contents(self):
+        """Slide contents, decoding them at the first access if they have been given as bytes."""
+        if self._raw_contents is not None:
+            self._contents = str(self._raw_contents, "utf-8")
+            self._raw_contents = None
+        return self._contents
+
+    @contents.setter
+    def contents(self, value):
+        if value is None or isinstance(value, str):
+            self._contents = value
+            self._raw_contents = None
+        else:
+            self._contents = None
+            self._raw_contents = value
+
+    @property
+    def raw_contents(self):
+        """Slide contents as stored: str or, if they have not been decoded yet, bytes-like."""
+        if self._raw_contents is not None:
+            return self._raw_contents
+        return self._contents
+
     def __str__(self):
         strings = [str(self.title)]
         strings.append(str(self.contents))
@@ -136,21 +184,41 @@ class Slide(object):
         ----------
         parser: Parser
         """
-        codeblocks = parser.tokenizer(source=self.contents, re_search=parser.regexs["codeblock"])
-        yamlblocks = parser.tokenizer(source=self.contents, re_search=parser.regexs["yamlblock"], exclude=codeblocks)
+        codeblocks = parser.tokenizer(source=self.raw_contents, re_search=parser.regexs["codeblock"])
+        yamlblocks = parser.tokenizer(
+            source=self.raw_contents, re_search=parser.regexs["yamlblock"], exclude=codeblocks, groups=(0,)
+        )
         if len(yamlblocks) > 0:
-            combined_yaml = "".join([block["match"].group().strip("---") for block in yamlblocks])
-            self.raw_overtheme_yaml = combined_yaml
-            self.overtheme.get(
-                source=combined_yaml,
-                name="overtheme",
-                div_id=f"slide-{self.number}",
-            )
-            purged_contents = self.contents[: yamlblocks[0]["start"]]
+            if self._raw_contents is not None:
+                # decoded contents offsets differ from bytes ones
+                codeblocks = parser.tokenizer(source=self.contents, re_search=parser.regexs["codeblock"])
+                yamlblocks = parser.tokenizer(
+                    source=self.contents, re_search=parser.regexs["yamlblock"], exclude=codeblocks, groups=(0,)
+                )
+            pieces = [self.contents[: yamlblocks[0].start]]
             for b, yamlblock in enumerate(yamlblocks[:-1]):
-                purged_contents += self.contents[yamlblock["end"] : yamlblocks[b + 1]["start"]]
-            purged_contents += self.contents[yamlblocks[-1]["end"] :]
-            self.contents = purged_contents
+                pieces.append(self.contents[yamlblock.end : yamlblocks[b + 1].start])
+            pieces.append(self.contents[yamlblocks[-1].end :])
+            self.set_overtheme(
+                yaml="".join([block.group().strip("---") for block in yamlblocks]), contents="".join(pieces)
+            )
+
+    def set_overtheme(self, yaml, contents, documents=None):
+        """Set an overtheme definition already extracted from the slide contents.
+
+        Parameters
+        ----------
+        yaml: str
+          overtheme YAML blocks contents
+        contents: str|bytes
+          slide contents purged of the YAML blocks
+        documents: list
+          already parsed documents of yaml, None for parsing them
+        """
+        self.raw_overtheme_yaml = yaml
+        self.overtheme_documents = documents
+        self.overtheme.get(source=yaml, name="overtheme", div_id=f"slide-{self.number}", documents=documents)
+        self.contents = contents
 
     def set_position(self, position):
         """Set slide position.
@@ -169,7 +237,15 @@ class Slide(object):
     # Environment parsing helpers
     # ------------------------------------------------------------------
 
-    def _parse_env(self, parser, theme, Env, re_search, source, backend="impress"):
+    @staticmethod
+    def _env_exclusions(parser, source):
+        """Return the index of the source ranges (codeblocks, inline codes and YAML blocks) environments skip."""
+        exclude = IntervalIndex(parser.tokenizer(source=source, re_search=parser.regexs["codeblock"]))
+        exclude.update(parser.tokenizer(source=source, re_search=parser.regexs["code"], exclude=exclude))
+        exclude.update(parser.tokenizer(source=source, re_search=parser.regexs["yamlblock"], exclude=exclude))
+        return exclude
+
+    def _parse_env(self, parser, theme, Env, re_search, source, backend="impress", exclude=None, context=None):
         """Parse an environment block from source, replacing it with its HTML.
 
         Parameters
@@ -184,32 +260,79 @@ class Slide(object):
         backend: str
           rendering backend; passed to Note/IncrementalList/Callout/Theorem
           to select backend-specific rendering.
+        exclude: IntervalIndex
+          ranges of source to skip, as returned by _env_exclusions; computed if not passed
+        context: RenderContext
+          build context numbering the environments
 
         Returns
         -------
         str
-          source with environment blocks replaced by HTML
+          source with environment blocks replaced by HTML, source itself if it contains no such block
         """
-        codeblocks = parser.tokenizer(source=source, re_search=parser.regexs["codeblock"])
-        codes = parser.tokenizer(source=source, re_search=parser.regexs["code"], exclude=codeblocks)
-        yamlblocks = parser.tokenizer(source=source, re_search=parser.regexs["yamlblock"], exclude=codeblocks + codes)
-        envs = parser.tokenizer(source=source, re_search=re_search, exclude=codeblocks + yamlblocks + codes)
+        if exclude is None:
+            exclude = self._env_exclusions(parser=parser, source=source)
+        envs = parser.tokenizer(source=source, re_search=re_search, exclude=exclude, groups=(0,))
         if len(envs) > 0:
-            parsed_source = source[: envs[0]["start"]]
+            pieces = [source[: envs[0].start]]
             for e, env in enumerate(envs[:-1]):
-                html_fragment = self._env_to_html(Env, env["match"].group(), theme, backend)
-                parsed_source += html_fragment + source[env["end"] : envs[e + 1]["start"]]
-            html_fragment = self._env_to_html(Env, envs[-1]["match"].group(), theme, backend)
-            parsed_source += html_fragment + source[envs[-1]["end"] :]
-            return parsed_source
+                pieces.append(self._env_to_html(Env, env.group(), theme, backend, context))
+                pieces.append(source[env.end : envs[e + 1].start])
+            pieces.append(self._env_to_html(Env, envs[-1].group(), theme, backend, context))
+            pieces.append(source[envs[-1].end :])
+            return "".join(pieces)
         return source
 
-    def _env_to_html(self, Env, source, theme, backend):
-        """Instantiate *Env* from *source* and return its HTML string."""
+    def _parse_envs(self, parser, theme, source, backend="impress", context=None):
+        """Expand all the environments of source, in the _ENVIRONMENTS order.
+
+        The openers are found by one scan of the source, thus only the environments actually used are expanded;
+        the source is rescanned (and its exclusions recomputed) only after an expansion has changed it.
+
+        Parameters
+        ----------
+        parser: Parser
+        theme: Theme()
+          presentation theme
+        source: str
+        backend: str
+        context: RenderContext
+
+        Returns
+        -------
+        str
+        """
+        openers = {match.group() for match in _ENV_OPENERS.finditer(source)}
+        exclude = None
+        for Env, re_search, opener in _ENVIRONMENTS:
+            if opener not in openers:
+                continue
+            if exclude is None:
+                exclude = self._env_exclusions(parser=parser, source=source)
+            parsed = self._parse_env(
+                parser=parser,
+                theme=theme,
+                Env=Env,
+                re_search=re_search,
+                source=source,
+                backend=backend,
+                exclude=exclude,
+                context=context,
+            )
+            if parsed is not source:
+                source = parsed
+                openers = {match.group() for match in _ENV_OPENERS.finditer(source)}
+                exclude = None
+        return source
+
+    def _env_to_html(self, Env, source, theme, backend, context=None):
+        """Instantiate *Env* from *source* (numbered by *context*) and return its HTML string."""
         if Env is Video:
-            obj = Env(source=source, theme=self.overtheme if self.overtheme.custom else theme)
-        else:
+            obj = Env(source=source, theme=self.overtheme if self.overtheme.custom else theme, context=context)
+        elif Env is Columns:
             obj = Env(source=source)
+        else:
+            obj = Env(source=source, context=context)
 
         if Env is Note:
             notes_style = getattr(self.overtheme if self.overtheme.custom else theme, "notes_style", "console")
@@ -225,7 +348,7 @@ class Slide(object):
     # Phase 2 — diagram processing (pre-markdown, before other envs)
     # ------------------------------------------------------------------
 
-    def _process_diagrams(self, source, backend="impress"):
+    def _process_diagrams(self, source, backend="impress", context=None):
         """Replace ``{mermaid}`` / ``{dot}`` fenced blocks with HTML fragments.
 
         Diagram blocks are code blocks and therefore excluded from the standard
@@ -234,7 +357,7 @@ class Slide(object):
         """
 
         def _replace(m):
-            d = Diagram(source=m.group(0))
+            d = Diagram(source=m.group(0), context=context)
             return d.to_html(backend=backend)
 
         return Diagram.regexs["diagram"].sub(_replace, source)
@@ -268,7 +391,7 @@ class Slide(object):
     # Main HTML generation
     # ------------------------------------------------------------------
 
-    def to_html(self, doc, parser, metadata, theme, current, backend="impress", label_registry=None):
+    def to_html(self, doc, parser, metadata, theme, current, backend="impress", label_registry=None, context=None):
         """Generate html from self.
 
         Parameters
@@ -286,73 +409,20 @@ class Slide(object):
           default visible note boxes.
         label_registry: LabelRegistry | None
           optional registry for cross-reference resolution (Phase 7).
+        context: RenderContext | None
+          build context numbering the environments; CLASS_CONTEXT if None.
         """
         html = self.contents
 
         # Metadata substitution
-        for meta in metadata:
-            html = metadata[meta].parse(
-                parser=parser,
-                source=html,
-                toc_depth=metadata["toc_depth"].value,
-                max_time=metadata["max_time"].value,
-                current=current,
-            )
+        html = Metadata.parse_all(parser=parser, metadata=metadata, source=html, current=current)
 
         # Phase 2: diagrams first (code-block contexts, processed before markdown)
-        html = self._process_diagrams(html, backend=backend)
-
-        # Phase 6: subfigure groups MUST run before Figure so the inner
-        # $figure...$endfigure blocks are still in raw form when FigureGroup
-        # extracts them.
-        html = self._parse_env(
-            parser=parser,
-            theme=theme,
-            Env=FigureGroup,
-            re_search=FigureGroup.regexs["figure_group"],
-            source=html,
-            backend=backend,
-        )
-
-        # Standard environments
-        html = self._parse_env(parser=parser, theme=theme, Env=Box, re_search=Box.regexs["box"], source=html)
-        html = self._parse_env(
-            parser=parser, theme=theme, Env=Note, re_search=Note.regexs["note"], source=html, backend=backend
-        )
-        html = self._parse_env(parser=parser, theme=theme, Env=Figure, re_search=Figure.regexs["figure"], source=html)
-        html = self._parse_env(parser=parser, theme=theme, Env=Table, re_search=Table.regexs["table"], source=html)
-        html = self._parse_env(parser=parser, theme=theme, Env=Video, re_search=Video.regexs["video"], source=html)
-        html = self._parse_env(
-            parser=parser, theme=theme, Env=Columns, re_search=Columns.regexs["columns"], source=html
-        )
-        html = self._parse_env(
-            parser=parser, theme=theme, Env=Substep, re_search=Substep.regexs["substep"], source=html
-        )
+        html = self._process_diagrams(html, backend=backend, context=context)
 
-        # Phase 1: callout blocks
-        html = self._parse_env(
-            parser=parser, theme=theme, Env=Callout, re_search=Callout.regexs["callout"], source=html, backend=backend
-        )
-
-        # Phase 3: theorem/lemma/proof environments
-        html = self._parse_env(
-            parser=parser,
-            theme=theme,
-            Env=Theorem,
-            re_search=Theorem.regexs["theorem"],
-            source=html,
-            backend=backend,
-        )
-
-        # Phase 4: incremental lists
-        html = self._parse_env(
-            parser=parser,
-            theme=theme,
-            Env=IncrementalList,
-            re_search=IncrementalList.regexs["incremental"],
-            source=html,
-            backend=backend,
-        )
+        # Environments: subfigure groups, standard environments, callouts (phase 1), theorems (phase 3) and
+        # incremental lists (phase 4), see _ENVIRONMENTS for their ordering
+        html = self._parse_envs(parser=parser, theme=theme, source=html, backend=backend, context=context)
 
         # Phase 4: pause markers + markdown conversion
         content_html = self._process_pause_markers(html, parser, theme, current, backend)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+source_map.py, module definition of SourceMap class.
+
+The source map links any offset of the expanded source (after $include resolution) back to the file, line and
+column it comes from. It is built from the offsets map returned by IncludeResolver.resolve: lookups bisect the
+sorted runs of the expanded source and then the line starts of the originating file, thus they are O(log n).
+For bytes-like (memory-mapped) sources offsets and columns are counted in bytes.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from .include_resolver import IncludeSegment
+from .tokens import Token
+
+PRELUDE_SOURCE = "<prelude>"
+
+
+@dataclass(frozen=True)
+class SourceLocation:
+    """Location into an original file, line and column being 1-based."""
+
+    path: str
+    line: int
+    column: int
+
+    def __str__(self):
+        return f"{self.path}:{self.line}:{self.column}"
+
+
+class SourceMap(object):
+    """
+    Map from the expanded source offsets to original files locations.
+
+    Attributes
+    ----------
+    segments: list
+      sorted IncludeSegment runs covering the expanded source
+    sources: dict
+      contents of each originating file
+    """
+
+    def __init__(self, segments: list = None, sources: dict = None) -> None:
+        """
+        Parameters
+        ----------
+        segments: list
+          offsets map as returned by IncludeResolver.resolve
+        sources: dict
+          contents of each originating file, as collected by IncludeResolver.resolve
+        """
+        self.segments: list = list(segments or [])
+        self.sources: dict = dict(sources or {})
+        self._starts = [segment.start for segment in self.segments]
+        self._line_starts: dict = {}
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __repr__(self):
+        return f"SourceMap({len(self)} runs, {len(self.sources)} files)"
+
+    def strip_prelude(self, path: str, length: int) -> SourceMap:
+        """Detach the first length characters of a file, they having been prepended to it (e.g. theme includes).
+
+        The prelude runs are attributed to PRELUDE_SOURCE and the offsets of the remaining runs of path are shifted
+        back, thus lines and columns refer to the file as it is on disk.
+
+        Parameters
+        ----------
+        path: str
+        length: int
+          length of the prelude
+
+        Returns
+        -------
+        SourceMap
+          self, for chaining
+        """
+        if length <= 0 or path not in self.sources:
+            return self
+        segments = []
+        for segment in self.segments:
+            if segment.path != path:
+                segments.append(segment)
+                continue
+            if segment.offset < length:
+                split = min(segment.end, segment.start + length - segment.offset)
+                segments.append(IncludeSegment(segment.start, split, PRELUDE_SOURCE, segment.offset))
+                if split < segment.end:
+                    segments.append(IncludeSegment(split, segment.end, path, 0))
+            else:
+                segments.append(IncludeSegment(segment.start, segment.end, path, segment.offset - length))
+        self.sources[PRELUDE_SOURCE] = self.sources[path][:length]
+        self.sources[path] = self.sources[path][length:]
+        self.segments = segments
+        self._starts = [segment.start for segment in self.segments]
+        self._line_starts = {}
+        return self
+
+    def _lines_of(self, path):
+        """Return the (cached) line start offsets of a file."""
+        if path not in self._line_starts:
+            starts = [0]
+            text = self.sources.get(path, "")
+            newline = "\n" if isinstance(text, str) else b"\n"
+            index = text.find(newline)
+            while index >= 0:
+                starts.append(index + 1)
+                index = text.find(newline, index + 1)
+            self._line_starts[path] = starts
+        return self._line_starts[path]
+
+    def segment(self, offset: int):
+        """Return the run containing an offset of the expanded source, None if the map does not cover it."""
+        index = bisect_right(self._starts, offset) - 1
+        if index < 0:
+            return None
+        segment = self.segments[index]
+        if offset >= segment.end and not (offset == segment.end and index == len(self.segments) - 1):
+            return None
+        return segment
+
+    def locate(self, item):
+        """Locate an offset, a token or a slide of the expanded source into its originating file.
+
+        Parameters
+        ----------
+        item: int, Token or object
+          offset of the expanded source, Token or object having a source_span attribute
+
+        Returns
+        -------
+        SourceLocation
+          location of the (start) offset, None if the map does not cover it
+        """
+        if isinstance(item, Token):
+            offset = item.start
+        elif isinstance(item, int):
+            offset = item
+        else:
+            span = getattr(item, "source_span", None)
+            if span is None:
+                return None
+            offset = span[0]
+        segment = self.segment(offset)
+        if segment is None:
+            return None
+        file_offset = segment.offset + offset - segment.start
+        lines = self._lines_of(segment.path)
+        line = bisect_right(lines, file_offset)
+        return SourceLocation(path=segment.path, line=line, column=file_offset - lines[line - 1] + 1)
+
+    def files(self, start: int, end: int) -> list:
+        """Return the files contributing to the [start, end) span of the expanded source.
+
+        Parameters
+        ----------
+        start: int
+        end: int
+
+        Returns
+        -------
+        list
+          paths, in order of first appearance
+        """
+        files = []
+        index = max(bisect_right(self._starts, start) - 1, 0)
+        while index < len(self.segments) and self.segments[index].start < max(end, start + 1):
+            path = self.segments[index].path
+            if self.segments[index].end > start and path not in files:
+                files.append(path)
+            index += 1
+        return files
@@ -3,6 +3,7 @@
 subsection.py, module definition of Subsection class.
 """
 
+from .render_context import CLASS_CONTEXT
 from .slide import Slide
 
 
@@ -23,7 +24,8 @@ class Subsection(object):
         cls.slides_number = 0
         Slide.reset()
 
-    def __init__(self, number, title=None):
+    def __init__(self, number, title=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
         self.number = number
         self.title = title
         self.slides = []
@@ -47,7 +49,7 @@ class Subsection(object):
         ----------
         slide: Slide
         """
-        Subsection.slides_number += 1
+        self.context.next_number(Subsection, "slides_number")
         self.slides.append(slide)
         self.update_toc()
 
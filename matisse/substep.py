@@ -22,6 +22,7 @@ import re
 from yattag import Doc
 
 from .markdown_utils import markdown2html
+from .render_context import CLASS_CONTEXT
 
 
 class Substep:
@@ -47,9 +48,9 @@ class Substep:
         """Reset to default state."""
         cls.substeps_number = 0
 
-    def __init__(self, source=None):
-        Substep.substeps_number += 1
-        self.number = Substep.substeps_number
+    def __init__(self, source=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
+        self.number = self.context.next_number(Substep, "substeps_number")
         self.content = ""
         self.order = None
         if source:
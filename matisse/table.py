@@ -42,22 +42,23 @@ class Table(Box):
         """Reset to default state."""
         cls.tables_number = 0
 
-    def __init__(self, source=None):
+    def __init__(self, source=None, context=None):
         """
         Parameters
         ----------
         source : str, optional
           string (as single stream) containing the source
+        context : RenderContext, optional
+          build context numbering the table, CLASS_CONTEXT if not passed
 
         Attributes
         ----------
         number : int
           number of table
         """
-        super(Table, self).__init__(ctn_type="table")
+        super(Table, self).__init__(ctn_type="table", context=context)
         self.cap_type = "Table"
-        Table.tables_number += 1
-        self.number = Table.tables_number
+        self.number = self.context.next_number(Table, "tables_number")
         if source:
             self.get(source=source)
 
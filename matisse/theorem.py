@@ -32,6 +32,7 @@ import re
 from yattag import Doc
 
 from .markdown_utils import markdown2html
+from .render_context import CLASS_CONTEXT
 
 # Human-readable labels per environment prefix.
 _THEOREM_LABELS = {
@@ -51,8 +52,9 @@ _THEOREM_PREFIXES = "|".join(_THEOREM_LABELS)
 class Theorem:
     """Theorem-like environment with auto-numbering.
 
-    Counters are class-level dicts keyed by prefix (``thm``, ``lem``, …).
-    Call ``Theorem.reset()`` between presentations to clear all counters.
+    Counters are keyed by prefix (``thm``, ``lem``, …) and held by the build
+    ``RenderContext``; theorems created without a context use the class-level
+    ``_counters`` dict, cleared by ``Theorem.reset()``.
     """
 
     regexs = {
@@ -66,7 +68,7 @@ class Theorem:
         )
     }
 
-    # Per-prefix counters; shared across all instances in one presentation.
+    # Per-prefix counters of the theorems created without a context.
     _counters: dict = {}
     theorems_number: int = 0
 
@@ -76,9 +78,9 @@ class Theorem:
         cls._counters = {}
         cls.theorems_number = 0
 
-    def __init__(self, source=None):
-        Theorem.theorems_number += 1
-        self.number = Theorem.theorems_number
+    def __init__(self, source=None, context=None):
+        self.context = CLASS_CONTEXT if context is None else context
+        self.number = self.context.next_number(Theorem, "theorems_number")
         self.prefix = None  # e.g. "thm"
         self.env_id = ""  # e.g. "cauchy"
         self.is_proof = False
@@ -99,10 +101,7 @@ class Theorem:
             self.prefix = m.group("prefix")
             self.env_id = m.group("id") or ""
             # Assign counter
-            if self.prefix not in Theorem._counters:
-                Theorem._counters[self.prefix] = 0
-            Theorem._counters[self.prefix] += 1
-            self.env_number = Theorem._counters[self.prefix]
+            self.env_number = self.context.next_keyed_number(Theorem, "_counters", self.prefix)
         self.title = (m.group("title") or "").strip() or None
         self.content = (m.group("content") or "").strip()
 
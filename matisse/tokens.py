@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+tokens.py, module definition of Token class.
+
+Tokens are created by the thousands for every build (headings, blocks, metadata, environments, codes...), thus they
+are slot-based objects storing only the match offsets and the values of the named groups actually used instead of
+the whole re.Match (that would keep the full source alive).
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+class Token(object):
+    """
+    Token of a MaTiSSe.py source.
+
+    Attributes
+    ----------
+    start: int
+      start offset of the match
+    end: int
+      end offset of the match
+    end_next: int
+      end of the token contents (start of the next token), None if not computed
+    groups: dict
+      values of the kept groups, 0 being the whole match, None if no group has been kept
+    """
+
+    __slots__ = ("start", "end", "end_next", "groups")
+
+    def __init__(self, start: int, end: int, groups: Optional[dict] = None, end_next: Optional[int] = None) -> None:
+        """
+        Parameters
+        ----------
+        start: int
+        end: int
+        groups: dict
+        end_next: int
+        """
+        self.start = start
+        self.end = end
+        self.end_next = end_next
+        self.groups = groups
+
+    def __repr__(self):
+        return f"Token({self.start}, {self.end}, end_next={self.end_next})"
+
+    @classmethod
+    def from_match(cls, match, groups: tuple = ()) -> Token:
+        """Create a token from a re.Match keeping only the given groups.
+
+        Parameters
+        ----------
+        match: re.Match
+        groups: tuple
+          names (or indexes) of the groups to keep, 0 being the whole match
+
+        Returns
+        -------
+        Token
+        """
+        if groups:
+            return cls(match.start(), match.end(), {name: match.group(name) for name in groups})
+        return cls(match.start(), match.end())
+
+    def group(self, name=0):
+        """Return the value of a kept group, re.Match-like.
+
+        Parameters
+        ----------
+        name: str|int
+          group name, 0 (default) for the whole match
+
+        Returns
+        -------
+        str|bytes|None
+        """
+        if self.groups is None or name not in self.groups:
+            raise IndexError(f"group {name!r} has not been kept by the tokenizer")
+        return self.groups[name]
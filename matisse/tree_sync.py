@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+tree_sync.py, module definition of TreeSync class.
+
+A TreeSync brings files (single files or whole directories) into a destination directory transferring only the ones
+missing or changed since the last sync, by a pool of threads if asked to (copies being I/O bound). What has been
+transferred is recorded into a manifest file saved into the destination: for each file the size and the modification
+time of its source (or its contents hash) and the size and the modification time of the copy, thus a copy modified or
+removed by hand is transferred again.
+
+Files are copied, hard-linked, symlinked or reflinked (copy-on-write clones, on filesystems supporting them, e.g. Btrfs
+or XFS); links falling back to copies wherever the filesystem does not allow them. Files are always transferred to a
+temporary name and then renamed, thus a hard-linked copy is replaced, never written through.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+LINK_MODES = ("copy", "hardlink", "symlink", "reflink")
+CHECK_MODES = ("mtime", "hash")
+
+# ioctl request cloning a file on Linux (FICLONE)
+_FICLONE = 0x40049409
+
+_MANIFEST_VERSION = 1
+
+
+def _stat(path: str):
+    """Return [size, modification time] of a file, None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _hash(path: str) -> str:
+    """Return the hex digest of a file contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as stream:
+        for block in iter(lambda: stream.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _reflink(source: str, target: str) -> None:
+    """Clone source into target sharing its blocks (copy on write).
+
+    Raises
+    ------
+    OSError
+      if the platform or the filesystem does not support clones
+    """
+    try:
+        import fcntl
+    except ImportError as error:  # not a POSIX platform
+        raise OSError("reflinks are not supported") from error
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+
+class TreeSync(object):
+    """
+    Manifest-based incremental sync of files into a directory.
+
+    Attributes
+    ----------
+    root: str
+      destination directory
+    manifest: str
+      path of the manifest file
+    link: str
+      how files are transferred: 'copy', 'hardlink', 'symlink' or 'reflink'
+    check: str
+      how changed sources are detected: 'mtime' (size and modification time) or 'hash' (size and contents hash)
+    jobs: int
+      number of threads checking and transferring the files
+    delete: bool
+      remove the files of a synced directory no longer into the source directory
+    transferred: int
+      number of files transferred by the last syncs
+    skipped: int
+      number of files found up to date by the last syncs
+    removed: int
+      number of files removed by the last syncs
+    """
+
+    def __init__(
+        self,
+        root: str,
+        manifest: str = ".matisse-assets.json",
+        link: str = "copy",
+        check: str = "mtime",
+        jobs: int = 1,
+        delete: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        root: str
+          destination directory
+        manifest: str
+          name of the manifest file into root
+        link: str
+          one of LINK_MODES
+        check: str
+          one of CHECK_MODES
+        jobs: int
+        delete: bool
+        """
+        self.root: str = root
+        self.manifest: str = os.path.join(root, manifest)
+        self.link: str = link
+        self.check: str = check
+        self.jobs: int = max(jobs, 1)
+        self.delete: bool = delete
+        self.transferred: int = 0
+        self.skipped: int = 0
+        self.removed: int = 0
+        self._entries: dict = self._load()
+        self._changed = False
+
+    def __repr__(self):
+        return f"TreeSync({self.root}, {self.transferred} transferred, {self.skipped} skipped, {self.removed} removed)"
+
+    def _load(self) -> dict:
+        """Return the manifest entries, none if the manifest is missing, unreadable or outdated."""
+        try:
+            with open(self.manifest) as stream:
+                manifest = json.load(stream)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get("version") != _MANIFEST_VERSION:
+            return {}
+        return manifest.get("files", {})
+
+    def save(self) -> None:
+        """Save the manifest, if the syncs changed it."""
+        if not self._changed:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        temporary = self.manifest + ".tmp"
+        with open(temporary, "w") as stream:
+            json.dump({"version": _MANIFEST_VERSION, "files": self._entries}, stream)
+        os.replace(temporary, self.manifest)
+        self._changed = False
+
+    def sync(self, pairs) -> TreeSync:
+        """Bring files and directories into root, transferring only the missing or changed ones, and save the manifest.
+
+        With delete set, the files of a synced directory which are no longer into the source directory are removed from
+        root, unless they have been modified since they have been transferred; they are forgotten otherwise.
+
+        Parameters
+        ----------
+        pairs: iterable
+          (target, source) pairs: path into root and path of the source file or directory
+
+        Returns
+        -------
+        TreeSync
+          self, for chaining
+
+        Raises
+        ------
+        FileNotFoundError
+          if a source is missing
+        """
+        files = []
+        for target, source in pairs:
+            target = target.replace(os.sep, "/")
+            if os.path.isdir(source):
+                seen = set()
+                for directory, _, names in os.walk(source):
+                    for name in names:
+                        path = os.path.join(directory, name)
+                        relative = os.path.join(target, os.path.relpath(path, source)).replace(os.sep, "/")
+                        seen.add(relative)
+                        files.append((relative, path))
+                self._remove_stale(target.rstrip("/") + "/", seen)
+            elif os.path.exists(source):
+                files.append((target, source))
+            else:
+                raise FileNotFoundError(f"{source} not found")
+        if self.jobs > 1 and len(files) > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(pool.map(self._sync_file, *zip(*files)))
+        else:
+            results = [self._sync_file(target, source) for target, source in files]
+        for (target, _), entry in zip(files, results):
+            if entry is None:
+                self.skipped += 1
+            else:
+                self._entries[target] = entry
+                self._changed = True
+                self.transferred += 1
+        self.save()
+        return self
+
+    def _sync_file(self, target: str, source: str):
+        """Transfer a file, unless its copy is up to date; thread safe, the manifest being updated by the caller.
+
+        Returns
+        -------
+        dict|None
+          the manifest entry of the file transferred, None if it is up to date (or it has been removed meanwhile)
+        """
+        stat = _stat(source)
+        if stat is None:
+            return None
+        entry = self._entries.get(target)
+        destination = os.path.join(self.root, target)
+        if entry is not None and entry["source"][0] == stat[0] and entry["target"] == _stat(destination):
+            if self.check == "mtime" and entry["source"][1] == stat[1]:
+                return None
+            if self.check == "hash" and entry.get("hash") == _hash(source):
+                return None
+        linked = self._transfer(source, destination)
+        entry = {"source": stat, "target": _stat(destination)}
+        if linked is not None:
+            entry["link"] = linked
+        if self.check == "hash":
+            entry["hash"] = _hash(source)
+        return entry
+
+    def _transfer(self, source: str, destination: str):
+        """Copy or link a file, through a temporary file renamed over the destination.
+
+        Returns
+        -------
+        str|None
+          the path the destination is a symbolic link to, None if it is not a symbolic link
+        """
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temporary = destination + ".matisse-tmp"
+        if os.path.lexists(temporary):
+            os.remove(temporary)
+        linked = None
+        try:
+            if self.link == "hardlink":
+                os.link(source, temporary)
+            elif self.link == "symlink":
+                linked = os.path.abspath(source)
+                os.symlink(linked, temporary)
+            elif self.link == "reflink":
+                _reflink(source, temporary)
+            else:
+                shutil.copy2(source, temporary)
+        except OSError:
+            # e.g. another filesystem (hard links), no privilege (symbolic links on Windows), no copy-on-write support
+            linked = None
+            if os.path.lexists(temporary):
+                os.remove(temporary)
+            shutil.copy2(source, temporary)
+        os.replace(temporary, destination)
+        return linked
+
+    def _remove_stale(self, prefix: str, seen: set) -> None:
+        """Forget the files transferred under prefix but not seen by the last sync of their directory, removing them."""
+        for target in [target for target in self._entries if target.startswith(prefix) and target not in seen]:
+            entry = self._entries.pop(target)
+            self._changed = True
+            if not self.delete:
+                continue
+            destination = os.path.join(self.root, target)
+            if "link" in entry:
+                # the link dangles, its source being removed
+                unmodified = os.path.islink(destination) and os.readlink(destination) == entry["link"]
+            else:
+                unmodified = _stat(destination) == entry["target"]
+            if unmodified:
+                os.remove(destination)
+                self.removed += 1
+
+    def write_text(self, target: str, text: str) -> bool:
+        """Write a generated file into root, unless it already has the same contents.
+
+        Parameters
+        ----------
+        target: str
+          path into root
+        text: str
+
+        Returns
+        -------
+        bool
+          True if the file has been written
+        """
+        destination = os.path.join(self.root, target)
+        try:
+            with open(destination) as stream:
+                if stream.read() == text:
+                    self.skipped += 1
+                    return False
+        except (OSError, UnicodeDecodeError):
+            pass
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, "w") as stream:
+            stream.write(text)
+        self.transferred += 1
+        return True
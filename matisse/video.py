@@ -43,19 +43,21 @@ class Video(Box):
         """Reset to default state."""
         cls.videos_number = 0
 
-    def __init__(self, source=None, theme=None):
+    def __init__(self, source=None, theme=None, context=None):
         """
         Parameters
         ----------
         source : str, optional
           string (as single stream) containing the source
+        context : RenderContext, optional
+          build context numbering the video, CLASS_CONTEXT if not passed
 
         Attributes
         ----------
         number : int
           number of video
         """
-        super(Video, self).__init__(ctn_type="video")
+        super(Video, self).__init__(ctn_type="video", context=context)
         self.cap_type = "Video"
         self.controls = False
         self.autoplay = False
@@ -66,8 +68,7 @@ class Video(Box):
                         self.controls = True
                     if "autoplay" in key.lower():
                         self.autoplay = True
-        Video.videos_number += 1
-        self.number = Video.videos_number
+        self.number = self.context.next_number(Video, "videos_number")
         if source:
             self.get(source=source)
 
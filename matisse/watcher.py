@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+watcher.py, module definition of PollingWatcher and InotifyWatcher classes.
+
+A watcher monitors the files a presentation is built from (the input, the files it $includes, the css_overtheme
+files) and the dirs_to_copy trees, returning the paths changed in debounced batches: a batch is returned once no
+further change has been seen for a while, thus an editor saving many files (or a file many times) triggers one
+rebuild. InotifyWatcher uses the kernel inotify events if the inotify_simple package is available, PollingWatcher
+compares the files modification times and sizes at regular intervals otherwise.
+
+watch_presentation builds a presentation and rebuilds it whenever its sources change. When only files of the
+dirs_to_copy trees change, the trees are mirrored again (see MatisseConfig.mirror_dirs) without rebuilding; otherwise
+the presentation is rebuilt through a build cache (see BuildCache), thus a change to an included file renders again
+only the slides it affects.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from .include_resolver import MAIN_SOURCE, IncludeResolver, map_file
+from .parser import Parser
+from .source_map import PRELUDE_SOURCE
+
+try:
+    from inotify_simple import INotify, flags
+
+    __inotify__ = True
+except ImportError:
+    __inotify__ = False
+
+
+def dependencies(presentation, source_path: str) -> tuple:
+    """Return the files and the trees a built presentation depends on.
+
+    Parameters
+    ----------
+    presentation: Presentation
+    source_path: str
+      path of the presentation input file
+
+    Returns
+    -------
+    tuple
+      (files, trees): the input and included files plus the existing css_overtheme files, and the dirs_to_copy
+      directories
+    """
+    files = [source_path]
+    for path in presentation.source_map.sources:
+        # included theme files are removed after the build
+        if path not in (MAIN_SOURCE, PRELUDE_SOURCE) and path not in files and os.path.isfile(path):
+            files.append(path)
+    for path in presentation.metadata["css_overtheme"].value:
+        if path not in files and os.path.isfile(path):
+            files.append(path)
+    trees = [path for path in presentation.metadata["dirs_to_copy"].value if os.path.isdir(path)]
+    return files, trees
+
+
+def _under(path: str, tree: str) -> bool:
+    """Check if an absolute path is tree or is into it."""
+    return path == tree or path.startswith(tree.rstrip(os.sep) + os.sep)
+
+
+class PollingWatcher(object):
+    """
+    Watcher polling the files modification times and sizes.
+
+    Attributes
+    ----------
+    interval: float
+      seconds between two polls
+    debounce: float
+      seconds without changes closing a batch of changes
+    files: set
+      absolute paths of the files watched
+    trees: set
+      absolute paths of the directories watched recursively
+    """
+
+    def __init__(self, interval: float = 0.5, debounce: float = 0.2) -> None:
+        self.interval: float = interval
+        self.debounce: float = debounce
+        self.files: set = set()
+        self.trees: set = set()
+        self._snapshot: dict = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self.files)} files, {len(self.trees)} trees)"
+
+    def watch(self, files, trees=()) -> None:
+        """Set the files and the directories (watched recursively) to watch, replacing the previous ones.
+
+        Parameters
+        ----------
+        files: iterable
+        trees: iterable
+        """
+        self.files = {os.path.abspath(path) for path in files}
+        self.trees = {os.path.abspath(path) for path in trees}
+        self._snapshot = self._scan()
+
+    def watched(self, path: str) -> bool:
+        """Check if an absolute path is watched."""
+        return path in self.files or any(_under(path, tree) for tree in self.trees)
+
+    def _scan(self) -> dict:
+        """Return the modification time and the size of each file watched, None for the missing ones."""
+        snapshot = {}
+        for path in self.files:
+            snapshot[path] = self._stat(path)
+        for tree in self.trees:
+            for directory, _, names in os.walk(tree):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    snapshot[path] = self._stat(path)
+        return snapshot
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _poll(self, timeout) -> set:
+        """Return the paths changed within timeout seconds (None waiting for the first change)."""
+        waited = 0.0
+        while True:
+            pause = self.interval if timeout is None else min(self.interval, max(timeout - waited, 0.0))
+            time.sleep(pause)
+            waited += pause
+            snapshot = self._scan()
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed or (timeout is not None and waited >= timeout):
+                return changed
+
+    def changes(self) -> set:
+        """Wait for changes, returning the paths changed once no further change is seen for debounce seconds.
+
+        Returns
+        -------
+        set
+          absolute paths changed (created, modified or removed)
+        """
+        changed = set()
+        while not changed:
+            changed = self._poll(None)
+        while True:
+            more = self._poll(self.debounce)
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self) -> None:
+        """Stop watching."""
+        self.files = set()
+        self.trees = set()
+        self._snapshot = {}
+
+
+class InotifyWatcher(PollingWatcher):
+    """
+    Watcher receiving the inotify events of the directories containing the watched paths.
+
+    The directories are watched instead of the files since editors often save a file by replacing it.
+    """
+
+    def __init__(self, interval: float = 0.5, debounce: float = 0.2) -> None:
+        super().__init__(interval=interval, debounce=debounce)
+        self._inotify = None
+        self._directories: dict = {}
+        self._mask = flags.CLOSE_WRITE | flags.MODIFY | flags.CREATE | flags.DELETE | flags.MOVED_TO | flags.MOVED_FROM
+
+    def watch(self, files, trees=()) -> None:
+        self.close()
+        self.files = {os.path.abspath(path) for path in files}
+        self.trees = {os.path.abspath(path) for path in trees}
+        self._inotify = INotify()
+        for path in self.files:
+            self._add_directory(os.path.dirname(path))
+        for tree in self.trees:
+            for directory, _, _ in os.walk(tree):
+                self._add_directory(directory)
+
+    def _add_directory(self, directory: str) -> None:
+        if directory in self._directories.values():
+            return
+        try:
+            descriptor = self._inotify.add_watch(directory, self._mask)
+        except OSError:
+            return
+        self._directories[descriptor] = directory
+
+    def _poll(self, timeout) -> set:
+        changed = set()
+        events = self._inotify.read(timeout=None if timeout is None else int(timeout * 1000))
+        for event in events:
+            directory = self._directories.get(event.wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, event.name)
+            if not self.watched(path):
+                continue
+            if event.mask & flags.ISDIR and event.mask & (flags.CREATE | flags.MOVED_TO):
+                for subdirectory, _, _ in os.walk(path):
+                    self._add_directory(subdirectory)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._directories = {}
+        super().close()
+
+
+def make_watcher(interval: float = 0.5, debounce: float = 0.2, polling: bool = False) -> PollingWatcher:
+    """Return an InotifyWatcher if inotify is available (and polling is not forced), a PollingWatcher otherwise."""
+    if __inotify__ and not polling and sys.platform.startswith("linux"):
+        return InotifyWatcher(interval=interval, debounce=debounce)
+    return PollingWatcher(interval=interval, debounce=debounce)
+
+
+def read_source(config, source_path: str):
+    """Return the contents of the input file, memory-mapped if config.mmap_source is set."""
+    if config.mmap_source:
+        return map_file(source_path)
+    with open(source_path) as stream:
+        return stream.read()
+
+
+def watch_presentation(config, source_path: str, output: str, watcher: PollingWatcher = None) -> None:
+    """Build a presentation, then build it again whenever its sources change, until interrupted (Ctrl-C).
+
+    Parameters
+    ----------
+    config : MatisseConfig
+      MaTiSSe configuration; without config.build_cache the rendered slides are cached into a temporary directory
+    source_path : str
+      path of the presentation input file
+    output : str
+      output directory
+    watcher : PollingWatcher, optional
+      watcher to use, by default the one returned by make_watcher
+    """
+    from .matisse import build_presentation
+
+    watcher = make_watcher() if watcher is None else watcher
+    # kept across the builds, thus only the modified included files are read again
+    include_resolver = IncludeResolver(parser=Parser())
+    try:
+        with temporary_build_cache(config):
+            trees = []
+            changed = set()
+            while True:
+                start = time.perf_counter()
+                if changed and trees_only(changed, watcher, trees):
+                    mirror = config.mirror_dirs(output, trees)
+                    print(f"Mirrored {mirror.transferred} changed file(s) into {output}")
+                else:
+                    try:
+                        _, presentation = build_presentation(
+                            config=config,
+                            source=read_source(config, source_path),
+                            output=output,
+                            source_path=source_path,
+                            include_resolver=include_resolver,
+                        )
+                    except (Exception, SystemExit) as error:
+                        # keep watching the last known sources, an edit can fix the error (e.g. a malformed metadata)
+                        sys.stderr.write(
+                            f"Error: build failed ({type(error).__name__}: {error}), waiting for changes\n"
+                        )
+                        if not watcher.files:
+                            watcher.watch(files=[source_path])
+                    else:
+                        files, trees = dependencies(presentation, source_path)
+                        watcher.watch(files=files, trees=trees)
+                        elapsed = time.perf_counter() - start
+                        print(f"Built {output} in {elapsed:.2f}s, watching for changes (Ctrl-C to stop)")
+                changed = watcher.changes()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def trees_only(changed: set, watcher: PollingWatcher, trees: list) -> bool:
+    """Check if the changed paths are all files of the dirs_to_copy trees, none being a source (e.g. an include).
+
+    Parameters
+    ----------
+    changed: set
+      absolute paths changed, as returned by the watcher changes
+    watcher: PollingWatcher
+    trees: list
+      dirs_to_copy directories
+
+    Returns
+    -------
+    bool
+    """
+    if changed & watcher.files:
+        return False
+    return all(any(_under(path, os.path.abspath(tree)) for tree in trees) for path in changed)
+
+
+@contextmanager
+def temporary_build_cache(config):
+    """Context setting config.build_cache to a temporary directory, removed at the exit, if it is not set."""
+    if config.build_cache:
+        yield config.build_cache
+        return
+    temporary = tempfile.mkdtemp(prefix="matisse-cache-")
+    config.build_cache = temporary
+    try:
+        yield temporary
+    finally:
+        shutil.rmtree(temporary, ignore_errors=True)
+        config.build_cache = None
@@ -9,7 +9,10 @@ import os
 
 import pytest
 
+from matisse.backends.impress.renderer import ImpressBackend
+from matisse.backends.reveal.renderer import RevealBackend
 from matisse.matisse_config import MatisseConfig
+from matisse.presentation import Presentation
 
 # ---------------------------------------------------------------------------
 # Locate all integration-test fixture directories (those containing test.md).
@@ -28,6 +31,85 @@ def _find_compare_dirs():
 COMPARE_DIRS = _find_compare_dirs()
 
 
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+
+def touch_file(path, text, offset=10):
+    """Write text into a file, moving its modification time offset seconds ahead so that the change is always seen.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+    text : str
+    offset : float, optional
+    """
+    with open(path, "w") as stream:
+        stream.write(text)
+    stamp = os.stat(path).st_mtime + offset
+    os.utime(path, (stamp, stamp))
+
+
+# ---------------------------------------------------------------------------
+# Test decks
+# ---------------------------------------------------------------------------
+
+
+class Deck(object):
+    """
+    Builder of test presentations, decks repeating the same slides into each chapter.
+    """
+
+    @staticmethod
+    def source(slides, chapters=2, title="Deck", preamble="", chapter="Chapter"):
+        """Return the source of a deck.
+
+        Parameters
+        ----------
+        slides : list
+          contents of the slides of each chapter
+        chapters : int, optional
+          number of chapters, each one with a single section and subsection
+        title : str, optional
+          title metadata, None for no metadata block
+        preamble : str, optional
+          YAML blocks (e.g. theme or reveal options) following the metadata block
+        chapter : str, optional
+          title of the chapters, numbered
+        """
+        parts = [f"---\nmetadata:\n  - title: {title}\n---\n" if title else "", preamble]
+        for c in range(chapters):
+            parts.append(f"# {chapter} {c}\n## Section\n### Subsection\n")
+            for s, contents in enumerate(slides):
+                parts.append(f"#### Slide {c}.{s}\n{contents}\n\n")
+        return "".join(parts)
+
+    @staticmethod
+    def config(**options):
+        """Return a fresh MatisseConfig with options set as its attributes."""
+        config = MatisseConfig()
+        for name, value in options.items():
+            setattr(config, name, value)
+        return config
+
+    @staticmethod
+    def parse(source, **options):
+        """Return the Presentation parsed from source, options being set as into config."""
+        presentation = Presentation()
+        presentation.parse(config=Deck.config(**options), source=source)
+        return presentation
+
+    @staticmethod
+    def render(source, backend="impress", **options):
+        """Return (html, presentation, renderer) of a fresh build of source, options being set as into config."""
+        config = Deck.config(**options)
+        presentation = Presentation()
+        presentation.parse(config=config, source=source)
+        renderer = RevealBackend(config) if backend == "reveal" else ImpressBackend(config)
+        return renderer.render(presentation), presentation, renderer
+
+
 # ---------------------------------------------------------------------------
 # Session-scoped fixtures
 # ---------------------------------------------------------------------------
@@ -43,3 +125,22 @@ def config():
 def compare_dirs():
     """Sorted list of fixture directories that contain a test.md file."""
     return COMPARE_DIRS
+
+
+@pytest.fixture(scope="session")
+def touch():
+    """Writer of files whose modification time always changes, see touch_file."""
+    return touch_file
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Temporary working directory: relative paths (e.g. of $include statements) are resolved into it."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def deck():
+    """Builder of test presentations, see Deck."""
+    return Deck
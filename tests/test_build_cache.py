@@ -0,0 +1,165 @@
+"""
+Unit tests for matisse.build_cache.BuildCache.
+
+Covers: rebuilding an unchanged presentation from the cache, re-rendering
+only the edited slide, counters, labels and TOC changes rippling into other
+slides, the output always equal to an uncached build, parallel builds, and
+pruning of the entries not used by the last build.
+"""
+
+import os
+
+import pytest
+
+from matisse.backends.parallel import parallel_available
+from matisse.build_cache import BuildCache
+from matisse.diagram import MERMAID_CDN_SCRIPT
+
+_SLIDES = [
+    "plain text",
+    "$box\n$content{first box}\n$endbox",
+    "::: {#thm-one}\nFirst.\n:::",
+    "See @thm-one and @fig-plot.",
+    "![Plot](plot.png){#fig-plot}",
+    "$toc",
+    "```{mermaid}\nflowchart LR\n  A --> B\n```",
+    "$box\n$content{second box}\n$endbox",
+]
+
+
+def _entries(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".json")]
+
+
+# ---------------------------------------------------------------------------
+# rebuilds
+# ---------------------------------------------------------------------------
+
+
+class TestRebuild:
+    @pytest.mark.parametrize("backend", ["impress", "reveal"])
+    def test_unchanged_rebuild_is_served_by_the_cache(self, deck, tmp_path, backend):
+        first, _, renderer = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path), backend=backend)
+        assert renderer._build_cache.misses == 2 * len(_SLIDES)
+        second, _, renderer = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path), backend=backend)
+        assert renderer._build_cache.hits == 2 * len(_SLIDES)
+        assert renderer._build_cache.misses == 0
+        assert second == first == deck.render(deck.source(_SLIDES), backend=backend)[0]
+
+    def test_edited_slide_only_is_rendered(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        slides = list(_SLIDES)
+        slides[0] = "plain text, fixed typo"
+        html, _, renderer = deck.render(deck.source(slides), build_cache=str(tmp_path))
+        assert renderer._build_cache.misses == 2
+        assert "fixed typo" in html
+        assert html == deck.render(deck.source(slides))[0]
+
+    def test_edited_overtheme_only_renders_its_slide(self, deck, tmp_path):
+        overtheme = "---\novertheme:\n  slide:\n    background: {color}\n---\nplain text"
+        slides = list(_SLIDES)
+        slides[0] = overtheme.format(color="red")
+        deck.render(deck.source(slides), build_cache=str(tmp_path))
+        slides[0] = overtheme.format(color="blue")
+        html, _, renderer = deck.render(deck.source(slides), build_cache=str(tmp_path))
+        assert renderer._build_cache.misses == 2
+        assert html == deck.render(deck.source(slides))[0]
+
+    def test_bytes_source_shares_the_entries(self, deck, tmp_path):
+        first, _, _ = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        second, _, renderer = deck.render(deck.source(_SLIDES).encode("utf-8"), build_cache=str(tmp_path))
+        assert renderer._build_cache.misses == 0
+        assert second == first
+
+    def test_diagram_flag_restored_from_cache(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        html, _, renderer = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        assert renderer._build_cache.misses == 0
+        assert renderer._build_cache.hits == 2 * len(_SLIDES)
+        assert MERMAID_CDN_SCRIPT.strip().splitlines()[0].strip() in html
+
+
+# ---------------------------------------------------------------------------
+# changes rippling into other slides
+# ---------------------------------------------------------------------------
+
+
+class TestRipple:
+    def test_counters_change_renumbers_following_boxes(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        slides = list(_SLIDES)
+        slides[0] = "$box\n$content{new box}\n$endbox"
+        html, _, renderer = deck.render(deck.source(slides), build_cache=str(tmp_path))
+        # the edited slide and the four boxes after it
+        assert renderer._build_cache.misses == 2 + 4
+        assert html == deck.render(deck.source(slides))[0]
+
+    def test_label_renumbering_rerenders_references(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        slides = list(_SLIDES)
+        slides[0] = "![Other](other.png){#fig-other}"
+        html, _, renderer = deck.render(deck.source(slides), build_cache=str(tmp_path))
+        assert html == deck.render(deck.source(slides))[0]
+        assert "Figure 2</a>" in html
+        # edited slides and the slides referencing @fig-plot
+        assert renderer._build_cache.misses == 2 + 2
+
+    def test_toc_change_rerenders_toc_slides(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        source = deck.source(_SLIDES).replace("# Chapter 1", "# Chapter 1, renamed")
+        html, _, renderer = deck.render(source, build_cache=str(tmp_path))
+        assert html == deck.render(source)[0]
+        assert "renamed" in html
+        # the slides of the renamed chapter and the TOC slide of the other one
+        assert renderer._build_cache.misses == len(_SLIDES) + 1
+
+
+# ---------------------------------------------------------------------------
+# parallel builds
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.skipif(not parallel_available(), reason="fork() is not available")
+class TestParallel:
+    def test_parallel_rebuild_equals_sequential(self, deck, tmp_path):
+        first, _, _ = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path), jobs=3)
+        second, _, _ = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path), jobs=3)
+        assert first == second == deck.render(deck.source(_SLIDES))[0]
+        # the entries used by the workers are journaled, thus kept by the prune
+        assert len(_entries(tmp_path)) == 2 * len(_SLIDES)
+
+
+# ---------------------------------------------------------------------------
+# entries
+# ---------------------------------------------------------------------------
+
+
+class TestEntries:
+    def test_unused_entries_are_pruned(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        assert len(_entries(tmp_path)) == 2 * len(_SLIDES)
+        deck.render(deck.source(_SLIDES, chapter="Part"), build_cache=str(tmp_path))
+        assert len(_entries(tmp_path)) == 2 * len(_SLIDES)
+
+    def test_rebuilds_within_a_second_prune_by_build_number(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        first = set(_entries(tmp_path))
+        deck.render(deck.source(_SLIDES, chapter="Part"), build_cache=str(tmp_path))
+        _, _, renderer = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        assert renderer._build_cache.generation == 3
+        assert set(_entries(tmp_path)) == first
+        assert not [name for name in os.listdir(tmp_path) if name.startswith("used-")]
+
+    def test_unreadable_entry_is_rendered_again(self, deck, tmp_path):
+        deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        for name in _entries(tmp_path):
+            (tmp_path / name).write_text("not json")
+        html, _, renderer = deck.render(deck.source(_SLIDES), build_cache=str(tmp_path))
+        assert renderer._build_cache.misses == 2 * len(_SLIDES)
+        assert html == deck.render(deck.source(_SLIDES))[0]
+
+    def test_version_signature(self):
+        import pygments
+
+        assert BuildCache.version().count("/") == 3
+        assert BuildCache.version().endswith("/" + pygments.__version__)
@@ -5,6 +5,7 @@ test_cli.py — Smoke tests for the Typer-based MaTiSSe.py CLI.
 import os
 import tempfile
 
+import pytest
 from typer.testing import CliRunner
 
 from matisse.cli import app
@@ -78,3 +79,53 @@ def test_sample_generates_file():
         assert os.path.exists(sample_path)
         content = open(sample_path).read()
         assert "First Chapter" in content
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_mmap_build_matches_default_build(tmp_path, monkeypatch, newline):
+    monkeypatch.chdir(tmp_path)
+    source = "---\nmetadata:\n  - title: Talk\n---\n# Ch\n## S\n### SS\n#### Slide\nhéllo\n$include(more.md)\n"
+    (tmp_path / "talk.md").write_text(source, newline=newline)
+    (tmp_path / "more.md").write_text("#### Included\nworld\n", newline=newline)
+    result = runner.invoke(app, ["build", "--input", "talk.md", "--output", "plain"])
+    assert result.exit_code == 0
+    result = runner.invoke(app, ["build", "--input", "talk.md", "--output", "mapped", "--mmap"])
+    assert result.exit_code == 0
+    plain = (tmp_path / "plain" / "index.html").read_bytes()
+    assert (tmp_path / "mapped" / "index.html").read_bytes() == plain
+    assert b"world" in plain and b"<title>Talk</title>" in plain
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_md_cache_persisted_between_builds(tmp_path, monkeypatch, jobs):
+    from matisse.markdown_utils import MARKDOWN_CACHE
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "talk.md").write_text("# Ch\n## S\n### SS\n#### Slide\n*cached* fragment\n#### Other\n*second*\n")
+    MARKDOWN_CACHE.clear()
+    result = runner.invoke(
+        app, ["build", "--input", "talk.md", "--output", "first", "--md-cache", "md.json", "--jobs", jobs]
+    )
+    assert result.exit_code == 0
+    assert (tmp_path / "md.json").exists()
+    MARKDOWN_CACHE.clear()
+    result = runner.invoke(app, ["build", "--input", "talk.md", "--output", "second", "--md-cache", "md.json"])
+    assert result.exit_code == 0
+    assert MARKDOWN_CACHE.misses == 0
+    assert (tmp_path / "second" / "index.html").read_text() == (tmp_path / "first" / "index.html").read_text()
+
+
+def test_minify_writes_smaller_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "talk.md").write_text("# Ch\n## S\n### SS\n#### Slide\n* one\n* two\n\n```python\nx  =  1\n```\n")
+    for output, flags in (("indented", []), ("minified", ["--minify"])):
+        result = runner.invoke(app, ["build", "--input", "talk.md", "--output", output, *flags])
+        assert result.exit_code == 0
+    minified = (tmp_path / "minified" / "index.html").read_text()
+    assert len(minified) < len((tmp_path / "indented" / "index.html").read_text())
+    assert "\n  <" not in minified
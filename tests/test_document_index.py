@@ -0,0 +1,138 @@
+"""
+Unit tests for matisse.document_index.DocumentIndex.
+
+Covers: the single scan of the source, the per-block YAML parsing, the
+merged documents of the concatenated YAML blocks (and their fallback)
+and the presentation parsing reusing the index.
+"""
+
+import pytest
+from yaml import FullLoader, YAMLError, load_all
+
+import matisse.document_index as document_index
+from matisse.document_index import DocumentIndex
+from matisse.matisse_config import MatisseConfig
+from matisse.parser import Parser
+from matisse.presentation import Presentation
+
+
+@pytest.fixture
+def parser():
+    return Parser()
+
+
+def _index(parser, *blocks):
+    source = "".join(f"---\n{block}\n---\n# Chapter\n" for block in blocks)
+    return DocumentIndex(parser=parser, source=source)
+
+
+# ---------------------------------------------------------------------------
+# scan
+# ---------------------------------------------------------------------------
+
+
+class TestScan:
+    def test_blocks_and_headings(self, parser):
+        source = "---\na: 1\n---\n```\n# no\n```\n::: {.note}\nx\n:::\n# Ch\n## S\n"
+        index = DocumentIndex(parser=parser, source=source)
+        assert len(index.yamlblocks) == 1
+        assert len(index.codeblocks) == 1
+        assert len(index.fenceddivs) == 1
+        assert [t.group("expr") for t in index.headings("chapters")] == ["Ch"]
+        assert index.yaml_texts == ["\na: 1\n"]
+
+    def test_yaml_in_codeblock_is_not_indexed(self, parser):
+        index = DocumentIndex(parser=parser, source="```\n---\na: 1\n---\n```\n")
+        assert index.yaml_source == ""
+
+
+# ---------------------------------------------------------------------------
+# YAML
+# ---------------------------------------------------------------------------
+
+
+class TestYaml:
+    def test_blocks_are_parsed_once(self, parser, monkeypatch):
+        calls = []
+
+        def counting_load_all(stream, Loader):
+            calls.append(stream)
+            return load_all(stream, Loader=Loader)
+
+        monkeypatch.setattr(document_index, "load_all", counting_load_all)
+        index = _index(parser, "a: 1", "b: 2")
+        index.yaml_blocks
+        index.yaml_blocks
+        index.yaml_documents
+        assert len(calls) == 2
+
+    def test_block_error_keeps_previous_blocks(self, parser):
+        index = _index(parser, "a: 1", "a: [", "b: 2")
+        assert [documents for documents, _ in index.yaml_blocks] == [[{"a": 1}], [], [{"b": 2}]]
+        assert isinstance(index.yaml_blocks[1][1], YAMLError)
+
+    @pytest.mark.parametrize(
+        "blocks",
+        [
+            ("a: 1\nb: {x: 1}", "b: {y: 2}\nc: 3"),
+            ("# comment\na: 1", "", "a: 2"),
+            ("base: &b {x: 1}", "other:\n  <<: *b"),
+            ("a: 1", "  b: 2"),
+            ("a: 1", "{b: 2}"),
+        ],
+    )
+    def test_documents_match_the_concatenated_blocks(self, parser, blocks):
+        index = _index(parser, *blocks)
+        try:
+            expected = list(load_all(index.yaml_source, Loader=FullLoader))
+        except YAMLError:
+            with pytest.raises(YAMLError):
+                index.yaml_documents
+            return
+        assert index.yaml_documents == expected
+
+
+# ---------------------------------------------------------------------------
+# presentation integration
+# ---------------------------------------------------------------------------
+
+
+class TestPresentation:
+    def test_metadata_from_every_block(self):
+        source = (
+            "---\nmetadata:\n  - title: Talk\n---\n"
+            "---\nmetadata:\n  - subtitle: Sub\n---\n"
+            "# Ch\n## S\n### SS\n#### Slide\ntext\n"
+        )
+        presentation = Presentation()
+        presentation.parse(config=MatisseConfig(), source=source)
+        assert presentation.metadata["title"].value == "Talk"
+        assert presentation.metadata["subtitle"].value == "Sub"
+        assert presentation.document_index.yaml_source == presentation.yaml_source
+
+    def test_overthemes_are_parsed_once(self, monkeypatch):
+        import matisse.backends.impress.theme as impress_theme
+
+        calls = []
+
+        def counting_load_all(stream, Loader):
+            calls.append(stream)
+            return load_all(stream, Loader=Loader)
+
+        def failing_load_all(stream, Loader):
+            raise AssertionError("YAML parsed again by the theme")
+
+        monkeypatch.setattr(document_index, "load_all", counting_load_all)
+        monkeypatch.setattr(impress_theme, "load_all", failing_load_all)
+        source = (
+            "# Ch\n## S\n### SS\n#### One\n---\novertheme:\n  copy-from-theme: true\n---\nfirst\n#### Two\nsecond\n"
+        )
+        presentation = Presentation()
+        presentation.parse(config=MatisseConfig(), source=source)
+        slides = presentation.chapters[0].sections[0].subsections[0].slides
+        assert len(calls) == 1
+        assert slides[0].overtheme.copy_from_theme is True
+        assert slides[0].contents == "\n\nfirst"
+        assert slides[0].raw_overtheme_yaml == "\novertheme:\n  copy-from-theme: true\n"
+        assert slides[1].raw_overtheme_yaml == ""
+        assert slides[1].overtheme_documents is None
@@ -0,0 +1,146 @@
+"""
+Unit tests for matisse.include_resolver.IncludeResolver.
+
+Covers: nested expansion, include graph, cached reads (diamond includes and
+mtime invalidation), cycle detection, the per-file offsets map and the
+memory-mapped (bytes) mode.
+"""
+
+import pytest
+
+from matisse.include_resolver import MAIN_SOURCE, IncludeResolver, map_file
+from matisse.parser import Parser
+
+
+@pytest.fixture
+def resolver():
+    return IncludeResolver(parser=Parser())
+
+
+# ---------------------------------------------------------------------------
+# expansion
+# ---------------------------------------------------------------------------
+
+
+class TestExpansion:
+    def test_nested_includes_are_expanded(self, resolver, workdir, touch):
+        touch("a.md", "A[$include(b.md)]")
+        touch("b.md", "B")
+        source, _ = resolver.resolve(source="<$include(a.md)>")
+        assert source == "<A[B]>"
+
+    def test_include_graph(self, resolver, workdir, touch):
+        touch("a.md", "$include(b.md)$include(c.md)")
+        touch("b.md", "B")
+        touch("c.md", "C")
+        resolver.resolve(source="$include(a.md)")
+        assert resolver.graph == {MAIN_SOURCE: ["a.md"], "a.md": ["b.md", "c.md"], "b.md": [], "c.md": []}
+        assert resolver.files() == ["a.md", "b.md", "c.md"]
+
+    def test_include_inside_codeblock_is_kept(self, resolver, workdir, touch):
+        touch("b.md", "B")
+        source, _ = resolver.resolve(source="```\n$include(b.md)\n```\n$include(b.md)")
+        assert source == "```\n$include(b.md)\n```\nB"
+
+    def test_missing_include_exits(self, resolver, workdir):
+        with pytest.raises(SystemExit):
+            resolver.resolve(source="$include(missing.md)")
+
+
+# ---------------------------------------------------------------------------
+# cache
+# ---------------------------------------------------------------------------
+
+
+class TestCache:
+    def test_diamond_include_is_read_once(self, resolver, workdir, touch):
+        touch("a.md", "$include(c.md)")
+        touch("b.md", "$include(c.md)")
+        touch("c.md", "C")
+        source, _ = resolver.resolve(source="$include(a.md)$include(b.md)$include(c.md)")
+        assert source == "CCC"
+        assert resolver.reads == 3
+
+    def test_unchanged_file_is_not_read_again(self, resolver, workdir, touch):
+        touch("a.md", "A")
+        resolver.resolve(source="$include(a.md)")
+        resolver.resolve(source="$include(a.md)")
+        assert resolver.reads == 1
+
+    def test_modified_file_is_read_again(self, resolver, workdir, touch):
+        touch("a.md", "A")
+        resolver.resolve(source="$include(a.md)")
+        touch("a.md", "AA")
+        source, _ = resolver.resolve(source="$include(a.md)")
+        assert source == "AA"
+        assert resolver.reads == 2
+
+
+# ---------------------------------------------------------------------------
+# cycles
+# ---------------------------------------------------------------------------
+
+
+class TestCycles:
+    def test_self_include_exits(self, resolver, workdir, capsys, touch):
+        touch("a.md", "$include(a.md)")
+        with pytest.raises(SystemExit):
+            resolver.resolve(source="$include(a.md)")
+        assert "cyclic include" in capsys.readouterr().err
+
+    def test_indirect_cycle_exits(self, resolver, workdir, touch):
+        touch("a.md", "$include(b.md)")
+        touch("b.md", "$include(a.md)")
+        with pytest.raises(SystemExit):
+            resolver.resolve(source="$include(a.md)")
+
+
+# ---------------------------------------------------------------------------
+# offsets map
+# ---------------------------------------------------------------------------
+
+
+class TestOffsetsMap:
+    def test_segments_cover_the_expanded_source(self, resolver, workdir, touch):
+        touch("a.md", "aa$include(b.md)aa")
+        touch("b.md", "bbb")
+        source, segments = resolver.resolve(source="xx$include(a.md)yy")
+        assert source == "xxaabbbaayy"
+        assert [(s.start, s.end, s.path, s.offset) for s in segments] == [
+            (0, 2, MAIN_SOURCE, 0),
+            (2, 4, "a.md", 0),
+            (4, 7, "b.md", 0),
+            (7, 9, "a.md", 16),
+            (9, 11, MAIN_SOURCE, 16),
+        ]
+
+
+# ---------------------------------------------------------------------------
+# memory-mapped sources
+# ---------------------------------------------------------------------------
+
+
+class TestMemoryMapped:
+    def test_map_file(self, workdir, touch):
+        touch("a.md", "héllo")
+        assert bytes(map_file("a.md")) == "héllo".encode("utf-8")
+        touch("empty.md", "")
+        assert map_file("empty.md") == b""
+        with open("crlf.md", "wb") as stream:
+            stream.write(b"# One\r\n## Two\rthree\r\n")
+        assert map_file("crlf.md") == b"# One\n## Two\nthree\n"
+
+    def test_source_without_includes_is_not_copied(self, resolver, workdir, touch):
+        touch("a.md", "no includes here")
+        mapped = map_file("a.md")
+        source, _ = resolver.resolve(source=mapped)
+        assert source is mapped
+
+    def test_bytes_expansion_matches_str_expansion(self, resolver, workdir, touch):
+        touch("a.md", "A[$include(b.md)]\n```\n$include(b.md)\n```\n")
+        touch("b.md", "é")
+        text, text_segments = resolver.resolve(source="<$include(a.md)>")
+        touch("main.md", "<$include(a.md)>")
+        data, data_segments = IncludeResolver(parser=Parser()).resolve(source=map_file("main.md"))
+        assert data.decode("utf-8") == text
+        assert [s.path for s in data_segments] == [s.path for s in text_segments]
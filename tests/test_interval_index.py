@@ -0,0 +1,97 @@
+"""
+Unit tests for matisse.interval_index.IntervalIndex.
+
+Covers: construction from tokens and tuples, containment queries on
+disjoint, nested and overlapping ranges, update/union and the tokenizer
+integration.
+"""
+
+from matisse.interval_index import IntervalIndex
+from matisse.parser import Parser
+from matisse.tokens import Token
+
+# ---------------------------------------------------------------------------
+# construction
+# ---------------------------------------------------------------------------
+
+
+class TestConstruction:
+    def test_empty_index_contains_nothing(self):
+        index = IntervalIndex()
+        assert len(index) == 0
+        assert not index.contains(0, 0)
+
+    def test_built_from_tokens(self):
+        index = IntervalIndex([Token(10, 20), Token(0, 5)])
+        assert index.starts == [0, 10]
+        assert index.max_ends == [5, 20]
+
+    def test_built_from_tuples(self):
+        index = IntervalIndex([(3, 4), (1, 2)])
+        assert index.ranges == [(1, 2), (3, 4)]
+
+
+# ---------------------------------------------------------------------------
+# contains
+# ---------------------------------------------------------------------------
+
+
+class TestContains:
+    def test_span_inside_range(self):
+        index = IntervalIndex([(10, 20)])
+        assert index.contains(10, 20)
+        assert index.contains(12, 18)
+
+    def test_span_crossing_range_boundary(self):
+        index = IntervalIndex([(10, 20)])
+        assert not index.contains(5, 15)
+        assert not index.contains(15, 25)
+
+    def test_span_between_disjoint_ranges(self):
+        index = IntervalIndex([(0, 5), (10, 20)])
+        assert not index.contains(6, 9)
+
+    def test_nested_ranges_use_the_widest(self):
+        index = IntervalIndex([(0, 100), (10, 20)])
+        assert index.contains(30, 40)
+
+    def test_overlapping_ranges_are_not_merged(self):
+        # [15, 25] is covered by the union of the two ranges but by none of them
+        index = IntervalIndex([(10, 20), (18, 30)])
+        assert not index.contains(15, 25)
+        assert index.contains(19, 30)
+
+
+# ---------------------------------------------------------------------------
+# update / union
+# ---------------------------------------------------------------------------
+
+
+class TestUpdateUnion:
+    def test_update_adds_ranges(self):
+        index = IntervalIndex([(0, 5)])
+        index.update([(10, 20)])
+        assert index.contains(12, 13)
+
+    def test_union_leaves_operands_untouched(self):
+        first = IntervalIndex([(0, 5)])
+        second = IntervalIndex([(10, 20)])
+        both = first.union(second)
+        assert len(both) == 2
+        assert len(first) == 1
+        assert not first.contains(12, 13)
+
+
+# ---------------------------------------------------------------------------
+# tokenizer integration
+# ---------------------------------------------------------------------------
+
+
+class TestTokenizerExclude:
+    def test_index_and_list_exclusion_are_equivalent(self):
+        parser = Parser()
+        source = "`# a` text ```\n# b\n```\n# c\n"
+        codes = parser.tokenizer(source=source, re_search=parser.regexs["code"])
+        by_list = parser.tokenizer(source=source, re_search=parser.regexs["chapter"], exclude=codes)
+        by_index = parser.tokenizer(source=source, re_search=parser.regexs["chapter"], exclude=IntervalIndex(codes))
+        assert [t.start for t in by_list] == [t.start for t in by_index]
@@ -0,0 +1,149 @@
+"""
+Unit tests for matisse.markdown_utils.ConverterPool and MarkdownCache.
+
+Covers: reuse of the converters per configuration, state reset between
+conversions (footnotes), per-converter conversion counts and concurrent use;
+fragments cache keys, LRU eviction, hit/miss counts and disk persistence.
+"""
+
+import threading
+
+import pytest
+
+from matisse.markdown_utils import (
+    MARKDOWN_CACHE,
+    ConverterPool,
+    MarkdownCache,
+    __mdx_checklist__,
+    _new_converter,
+    markdown2html,
+)
+
+
+@pytest.fixture
+def pool():
+    return ConverterPool()
+
+
+# ---------------------------------------------------------------------------
+# ConverterPool
+# ---------------------------------------------------------------------------
+
+
+class TestConverterPool:
+    def test_converter_reused_per_configuration(self, pool):
+        for _ in range(3):
+            pool.convert("*a*")
+        pool.convert("*a*", code_style="monokai")
+        counts = {style: conversions for (style, _), conversions in pool.conversions.items()}
+        assert counts == {"default": [3], "monokai": [1]}
+
+    def test_output_matches_a_fresh_converter(self, pool):
+        source = "text[^1]\n\n[^1]: note\n\n```python\nx = 1\n```\n"
+        fresh = _new_converter(code_style="default", checklist=__mdx_checklist__).convert(source)
+        pool.convert("other[^1]\n\n[^1]: previous")
+        assert pool.convert(source) == fresh
+
+    def test_state_does_not_leak_between_conversions(self, pool):
+        pool.convert("text[^1]\n\n[^1]: leaked")
+        assert "leaked" not in pool.convert("plain")
+
+    def test_clear_drops_converters(self, pool):
+        pool.convert("a")
+        pool.clear()
+        assert pool.conversions == {}
+        pool.convert("a")
+        assert list(pool.conversions.values()) == [[1]]
+
+    def test_concurrent_conversions(self, pool):
+        results = {}
+
+        def convert(n):
+            results[n] = pool.convert(f"item **{n}**")
+
+        threads = [threading.Thread(target=convert, args=(n,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(results[n] == f"<p>item <strong>{n}</strong></p>" for n in range(16))
+        assert sum(sum(counts) for counts in pool.conversions.values()) == 16
+
+
+# ---------------------------------------------------------------------------
+# MarkdownCache
+# ---------------------------------------------------------------------------
+
+
+class TestMarkdownCache:
+    def test_key_depends_on_source_and_configuration(self):
+        key = MarkdownCache.key("*a*")
+        assert key == MarkdownCache.key("*a*", code_style="default", checklist=False)
+        assert key != MarkdownCache.key("*b*")
+        assert key != MarkdownCache.key("*a*", code_style="monokai")
+        assert key != MarkdownCache.key("*a*", checklist=True)
+
+    def test_hits_and_misses_counted(self):
+        cache = MarkdownCache()
+        assert cache.get("k") is None
+        cache.put("k", "<p>a</p>")
+        assert cache.get("k") == "<p>a</p>"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_least_recently_used_evicted(self):
+        cache = MarkdownCache(maxsize=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        cache.resize(1)
+        assert len(cache) == 1
+
+    def test_zero_size_disables_the_cache(self):
+        cache = MarkdownCache(maxsize=0)
+        cache.put("a", "1")
+        assert len(cache) == 0
+
+    def test_saved_and_loaded(self, tmp_path):
+        path = str(tmp_path / "cache" / "md.json")
+        cache = MarkdownCache()
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.save(path)
+        other = MarkdownCache()
+        assert other.load(path) == 2
+        assert other.get("b") == "2"
+
+    def test_outdated_or_broken_files_ignored(self, tmp_path, monkeypatch):
+        path = tmp_path / "md.json"
+        path.write_text("{not json")
+        assert MarkdownCache().load(str(path)) == 0
+        cache = MarkdownCache()
+        cache.put("a", "1")
+        cache.save(str(path))
+        monkeypatch.setattr(MarkdownCache, "version", staticmethod(lambda: "other"))
+        assert MarkdownCache().load(str(path)) == 0
+
+    def test_pygments_upgrade_outdates_saved_files(self, tmp_path, monkeypatch):
+        import pygments
+
+        path = str(tmp_path / "md.json")
+        cache = MarkdownCache()
+        cache.put("a", "1")
+        cache.save(path)
+        monkeypatch.setattr(pygments, "__version__", "0.0")
+        assert MarkdownCache().load(path) == 0
+
+    def test_markdown2html_served_by_the_cache(self, monkeypatch):
+        MARKDOWN_CACHE.clear()
+        first = markdown2html("*memo*")
+        monkeypatch.setattr(ConverterPool, "convert", lambda *args, **kwargs: pytest.fail("not cached"))
+        assert markdown2html("*memo*") == first
+        assert markdown2html("*memo*", no_p=True) == "<em>memo</em>"
+        assert MARKDOWN_CACHE.hits == 2
+
+
+def test_markdown2html_strips_paragraph():
+    assert markdown2html("*a*", no_p=True) == "<em>a</em>"
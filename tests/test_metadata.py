@@ -2,12 +2,13 @@
 Unit tests for matisse.metadata.Metadata.
 
 Covers: __init__, update_value (string and list), parse (no match / match),
-and the to_html dispatch for plain string metadata.
+parse_all (equivalence with chained parse calls), MetadataTemplate, the TOC
+skeleton and the to_html dispatch for plain string metadata.
 """
 
 import pytest
 
-from matisse.metadata import Metadata
+from matisse.metadata import Metadata, MetadataTemplate
 from matisse.parser import Parser
 
 
@@ -140,6 +141,186 @@ class TestParseWithMatch:
         assert "Bob" in result
 
 
+# ---------------------------------------------------------------------------
+# parse_all — all metadata in one pass
+# ---------------------------------------------------------------------------
+
+
+def _presentation_metadata():
+    from matisse.presentation import Presentation
+
+    metadata = Presentation().metadata
+    metadata["title"].update_value("My Talk")
+    metadata["authors"].update_value(["Alice", "Bob"])
+    metadata["authors_short"].update_value(["A.", "B."])
+    metadata["date"].update_value("today")
+    return metadata
+
+
+def _parse_chained(parser, metadata, source, current=None):
+    for meta in metadata:
+        source = metadata[meta].parse(
+            parser=parser,
+            source=source,
+            toc_depth=metadata["toc_depth"].value,
+            max_time=metadata["max_time"].value,
+            current=current,
+        )
+    return source
+
+
+class TestParseAll:
+    def test_source_without_placeholder_returned_as_is(self, parser):
+        source = "No placeholders, but a $ sign."
+        assert Metadata.parse_all(parser=parser, metadata=_presentation_metadata(), source=source) is source
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "$title[color:red;] by $authors on $date",
+            "$authors_short and $toc_depth keep the chained prefix matching",
+            "$custom-1[value:custom;] $timer[controls] $logo",
+            "```\n$title\n```\n$title",
+        ],
+    )
+    def test_equivalent_to_chained_parse(self, parser, source):
+        metadata = _presentation_metadata()
+        assert Metadata.parse_all(parser=parser, metadata=metadata, source=source) == _parse_chained(
+            parser, metadata, source
+        )
+
+    def test_following_placeholders_into_values_are_substituted(self, parser):
+        metadata = _presentation_metadata()
+        metadata["subtitle"].update_value("held on $date")
+        result = Metadata.parse_all(parser=parser, metadata=metadata, source="$subtitle")
+        assert result == _parse_chained(parser, metadata, "$subtitle")
+        assert "today" in result
+
+    def test_preceding_placeholders_into_values_are_kept(self, parser):
+        metadata = _presentation_metadata()
+        metadata["date"].update_value("after $title")
+        result = Metadata.parse_all(parser=parser, metadata=metadata, source="$date")
+        assert result == _parse_chained(parser, metadata, "$date")
+        assert "$title" in result
+
+
+# ---------------------------------------------------------------------------
+# MetadataTemplate — placeholders compiled once, filled per slide
+# ---------------------------------------------------------------------------
+
+
+class TestMetadataTemplate:
+    def test_constant_metadata_compiled_into_static_html(self, parser):
+        metadata = _presentation_metadata()
+        source = "$title[color:red;] by $authors"
+        template = MetadataTemplate(parser=parser, metadata=metadata, source=source)
+        assert template.slots == []
+        assert template.pieces == [Metadata.parse_all(parser=parser, metadata=metadata, source=source)]
+
+    def test_slide_metadata_filled_per_slide(self, parser):
+        metadata = _presentation_metadata()
+        source = "$title[float:left;]$slidetitle $slidenumber[float:right;]"
+        template = MetadataTemplate(parser=parser, metadata=metadata, source=source)
+        assert [metadata[template.names[n]].name for n, _ in template.slots] == ["slidetitle", "slidenumber"]
+        for number in ("1", "2"):
+            metadata["slidetitle"].update_value("Slide " + number)
+            metadata["slidenumber"].update_value(number)
+            assert template.fill() == Metadata.parse_all(parser=parser, metadata=metadata, source=source)
+
+    def test_toc_filled_with_the_current_slide(self, parser):
+        from matisse.matisse_config import MatisseConfig
+        from matisse.presentation import Presentation
+
+        presentation = Presentation()
+        presentation.parse(
+            config=MatisseConfig(), source="# A\n## B\n### C\n#### D\nd\n#### E\ne\n# F\n## G\n### H\n#### I\ni\n"
+        )
+        source = "$toc[depth:2]"
+        template = MetadataTemplate(parser=presentation.parser, metadata=presentation.metadata, source=source)
+        for current in ([1, 1, 1, 1], [2, 1, 1, 1]):
+            assert template.fill(current=current) == Metadata.parse_all(
+                parser=presentation.parser, metadata=presentation.metadata, source=source, current=current
+            )
+        assert template.fill(current=[1, 1, 1, 1]) != template.fill(current=[2, 1, 1, 1])
+
+    def test_values_with_placeholders_stay_slots(self, parser):
+        metadata = _presentation_metadata()
+        metadata["subtitle"].update_value("slide $slidenumber")
+        template = MetadataTemplate(parser=parser, metadata=metadata, source="$subtitle")
+        metadata["slidenumber"].update_value("7")
+        assert template.fill() == Metadata.parse_all(parser=parser, metadata=metadata, source="$subtitle")
+        assert "7" in template.fill()
+
+    def test_placeholders_into_code_kept(self, parser):
+        metadata = _presentation_metadata()
+        source = "`$slidetitle` $title"
+        template = MetadataTemplate(parser=parser, metadata=metadata, source=source)
+        assert template.fill() == Metadata.parse_all(parser=parser, metadata=metadata, source=source)
+
+
+# ---------------------------------------------------------------------------
+# TOC skeleton — rendered once per style and depth
+# ---------------------------------------------------------------------------
+
+
+def _toc_presentation(source=None):
+    from matisse.matisse_config import MatisseConfig
+    from matisse.presentation import Presentation
+
+    presentation = Presentation()
+    presentation.parse(
+        config=MatisseConfig(),
+        source=source
+        or "# A & <B>\n## S1\n### SS1\n#### D\nd\n#### E\ne\n## S2\n### SS2\n#### F\nf\n# C\n## S3\n### SS3\n#### G\ng\n",
+    )
+    return presentation
+
+
+def _toc_match(style=None):
+    source = "$toc" if style is None else f"$toc[{style}]"
+    return Parser().tokenizer(source=source, re_search=Metadata(name="toc").regex, groups=("style",))[0]
+
+
+class TestTocSkeleton:
+    def test_toc_rendered_once_per_style_and_depth(self):
+        toc = _toc_presentation().metadata["toc"]
+        toc.toc_to_html(match=_toc_match(), current=[1, 1, 1, 1], depth=4)
+        toc.toc_to_html(match=_toc_match(), current=[2, 1, 1, 1], depth=4)
+        toc.toc_to_html(match=_toc_match("depth:1"), current=[1, 1, 1, 1], depth=4)
+        assert sorted(toc._toc_skeletons, key=str) == [("depth:1", 1), (None, 4)]
+
+    def test_current_elements_emphasized(self):
+        toc = _toc_presentation().metadata["toc"]
+        html = toc.toc_to_html(match=_toc_match(), current=[1, 2, 1, 1], depth=4)
+        assert html.count("-emph") == 4
+        assert '<span class="toc-section-emph">  1.2 S2</span>' in html
+        assert '<span class="toc-slide-emph">      1.2.1.1 F</span>' in html
+        assert '<span class="toc-chapter">2 C</span>' in html
+
+    def test_no_current_no_emphasis(self):
+        toc = _toc_presentation().metadata["toc"]
+        assert "-emph" not in toc.toc_to_html(match=_toc_match(), depth=4)
+
+    def test_titles_escaped(self):
+        toc = _toc_presentation().metadata["toc"]
+        html = toc.toc_to_html(match=_toc_match(), current=[1, 1, 1, 1])
+        assert '<span class="toc-chapter-emph">1 A &amp; &lt;B&gt;</span>' in html
+
+    def test_style_put_on_the_toc_div(self):
+        toc = _toc_presentation().metadata["toc"]
+        assert '<div class="toc" style="depth:2;color:red;">' in toc.toc_to_html(match=_toc_match("depth:2;color:red;"))
+
+    def test_skeletons_discarded_when_a_chapter_is_added(self):
+        presentation = _toc_presentation(source="# A\n## S\n### SS\n#### D\nd\n")
+        toc = presentation.metadata["toc"]
+        toc.toc_to_html(match=_toc_match())
+        toc.value["Z"] = {}
+        assert "Z" not in toc.toc_to_html(match=_toc_match())
+        presentation._Presentation__update_toc()
+        assert len(toc._toc_skeletons) == 0
+        assert "Z" in toc.toc_to_html(match=_toc_match())
+
+
 # ---------------------------------------------------------------------------
 # YAML front-matter parsing (via Presentation)
 # ---------------------------------------------------------------------------
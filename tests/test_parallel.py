@@ -0,0 +1,91 @@
+"""
+Unit tests for matisse.backends.parallel.
+
+Covers: parallel slide rendering (--jobs) producing the same HTML, the same
+environments numbering and the same diagram flags as sequential rendering,
+for both backends, the sequential fallback where forking is unsafe and the
+markdown fragments converted by the workers reaching the parent cache.
+"""
+
+import threading
+
+import pytest
+
+from matisse.backends import parallel
+from matisse.backends.parallel import parallel_available, render_fragments
+from matisse.markdown_utils import MARKDOWN_CACHE
+
+pytestmark = pytest.mark.skipif(not parallel_available(), reason="fork() is not available")
+
+_SLIDES = [
+    "plain text",
+    "$box\n$content{first box}\n$endbox",
+    "::: {#thm-one}\nFirst.\n:::\n\n::: {#lem-one}\nLemma.\n:::",
+    "nothing numbered here",
+    "$figure\n$content{a.png}\n$caption{A}\n$endfigure\n\n$box\n$content{second box}\n$endbox",
+    "```{mermaid}\nflowchart LR\n  A --> B\n```",
+    "::: {#thm-two}\nSecond.\n:::\n\n::: {.callout-note}\nNote.\n:::",
+    "$note\n$content{speaker}\n$endnote",
+]
+
+
+def _render(deck, jobs, backend="impress", layout=None):
+    preamble = f"---\nreveal:\n  layout: {layout}\n---\n" if layout else ""
+    html, presentation, _ = deck.render(deck.source(_SLIDES, preamble=preamble), backend=backend, jobs=jobs)
+    return html, presentation.context.snapshot()
+
+
+class TestParallelRendering:
+    @pytest.mark.parametrize("backend, layout", [("impress", None), ("reveal", None), ("reveal", "vertical")])
+    def test_same_output_as_sequential(self, deck, backend, layout):
+        assert _render(deck, 3, backend, layout) == _render(deck, 1, backend, layout)
+
+    def test_numbering_continues_across_slides(self, deck):
+        html, (numbers, keyed_numbers, flags) = _render(deck, jobs=4)
+        assert html.index("Theorem 1") < html.index("Theorem 2") < html.index("Theorem 3")
+        assert numbers["boxes_number"] == 4
+        assert keyed_numbers["_counters"] == {"thm": 4, "lem": 2}
+        assert flags == {"has_mermaid"}
+
+    def test_sequential_fallback_without_fork(self, monkeypatch):
+        monkeypatch.setattr(parallel, "parallel_available", lambda: False)
+        calls = []
+
+        class Backend:
+            def _fragment(self, presentation, item):
+                calls.append(item)
+                return f"<div>{item}</div>"
+
+        assert list(render_fragments(Backend(), None, [1, 2, 3], jobs=4)) == [
+            "<div>1</div>",
+            "<div>2</div>",
+            "<div>3</div>",
+        ]
+        assert calls == [1, 2, 3]
+
+    def test_no_fork_outside_linux(self, monkeypatch):
+        monkeypatch.setattr(parallel.sys, "platform", "darwin")
+        assert not parallel_available()
+
+    def test_no_fork_from_a_threaded_process(self):
+        release = threading.Event()
+        thread = threading.Thread(target=release.wait)
+        thread.start()
+        try:
+            assert not parallel_available()
+            fragments = render_fragments(None, None, [1, 2, 3], jobs=4)
+            assert not isinstance(fragments, list)
+        finally:
+            release.set()
+            thread.join()
+        assert parallel_available()
+
+    def test_worker_fragments_reach_the_parent_cache(self, deck):
+        MARKDOWN_CACHE.clear()
+        _render(deck, jobs=1)
+        sequential = set(MARKDOWN_CACHE._entries)
+        MARKDOWN_CACHE.clear()
+        _render(deck, jobs=3)
+        # slides rendered again from their actual counters add the fragments converted from empty counters
+        assert sequential and sequential <= set(MARKDOWN_CACHE._entries)
+        MARKDOWN_CACHE.clear()
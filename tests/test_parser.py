@@ -1,8 +1,8 @@
 """
 Unit tests for matisse.parser.Parser.
 
-Covers: tokenizer, tokens_end_update, slides_end_update, includes,
-and the full tokenize() pipeline.
+Covers: tokenizer, tokens_end_update, slides_end_update, resolve_boundaries, group_tokens, includes,
+the single-pass scan() and the full tokenize() pipeline.
 """
 
 import os
@@ -11,6 +11,7 @@ import tempfile
 import pytest
 
 from matisse.parser import Parser
+from matisse.tokens import Token
 
 
 @pytest.fixture
@@ -26,9 +27,9 @@ def parser():
 class TestTokenizer:
     def test_finds_chapter_heading(self, parser):
         source = "# My Chapter\nsome content"
-        tokens = parser.tokenizer(source=source, re_search=parser.regexs["chapter"])
+        tokens = parser.tokenizer(source=source, re_search=parser.regexs["chapter"], groups=("expr",))
         assert len(tokens) == 1
-        assert tokens[0]["match"].group("expr").strip() == "My Chapter"
+        assert tokens[0].group("expr").strip() == "My Chapter"
 
     def test_finds_multiple_headings(self, parser):
         source = "# Chapter One\n## Section One\n### Subsection One\n#### Slide One\n"
@@ -44,9 +45,11 @@ class TestTokenizer:
     def test_exclusion_suppresses_match_in_codeblock(self, parser):
         source = "```\n# Not a heading\n```\n# Real heading\n"
         codeblocks = parser.tokenizer(source=source, re_search=parser.regexs["codeblock"])
-        chapters = parser.tokenizer(source=source, re_search=parser.regexs["chapter"], exclude=codeblocks)
+        chapters = parser.tokenizer(
+            source=source, re_search=parser.regexs["chapter"], exclude=codeblocks, groups=("expr",)
+        )
         assert len(chapters) == 1
-        assert "Real heading" in chapters[0]["match"].group("expr")
+        assert "Real heading" in chapters[0].group("expr")
 
     def test_no_match_returns_empty(self, parser):
         source = "no headings here"
@@ -63,8 +66,8 @@ class TestTokenizer:
         source = "# Alpha\n# Beta\n"
         tokens = parser.tokenizer(source=source, re_search=parser.regexs["chapter"])
         assert len(tokens) == 2
-        assert tokens[0]["start"] < tokens[1]["start"]
-        assert tokens[0]["end"] <= tokens[1]["start"]
+        assert tokens[0].start < tokens[1].start
+        assert tokens[0].end <= tokens[1].start
 
 
 # ---------------------------------------------------------------------------
@@ -77,14 +80,14 @@ class TestTokensEndUpdate:
         source = "# Ch1\n# Ch2\n# Ch3\n"
         tokens = parser.tokenizer(source=source, re_search=parser.regexs["chapter"])
         tokens = parser.tokens_end_update(tokens=tokens, end=len(source))
-        assert tokens[0]["end_next"] == tokens[1]["start"]
-        assert tokens[1]["end_next"] == tokens[2]["start"]
+        assert tokens[0].end_next == tokens[1].start
+        assert tokens[1].end_next == tokens[2].start
 
     def test_last_token_end_next_is_source_length(self, parser):
         source = "# Ch1\n# Ch2\n"
         tokens = parser.tokenizer(source=source, re_search=parser.regexs["chapter"])
         tokens = parser.tokens_end_update(tokens=tokens, end=len(source))
-        assert tokens[-1]["end_next"] == len(source)
+        assert tokens[-1].end_next == len(source)
 
     def test_empty_token_list_returns_empty(self, parser):
         result = parser.tokens_end_update(tokens=[], end=100)
@@ -103,16 +106,84 @@ class TestSlidesEndUpdate:
         slides = parser.tokens_end_update(tokens=slides, end=len(source))
         sections = parser.tokenizer(source=source, re_search=parser.regexs["section"])
         slides = parser.slides_end_update(slides=slides, others=sections)
-        assert slides[0]["end_next"] == sections[0]["start"]
+        assert slides[0].end_next == sections[0].start
 
     def test_slide_not_trimmed_when_section_is_before(self, parser):
         source = "## Section\n#### Slide\ncontent\n"
         slides = parser.tokenizer(source=source, re_search=parser.regexs["slide"])
         slides = parser.tokens_end_update(tokens=slides, end=len(source))
-        original_end = slides[0]["end_next"]
+        original_end = slides[0].end_next
         sections = parser.tokenizer(source=source, re_search=parser.regexs["section"])
         slides = parser.slides_end_update(slides=slides, others=sections)
-        assert slides[0]["end_next"] == original_end
+        assert slides[0].end_next == original_end
+
+
+# ---------------------------------------------------------------------------
+# resolve_boundaries
+# ---------------------------------------------------------------------------
+
+
+class TestResolveBoundaries:
+    def test_end_is_the_nearest_following_boundary(self, parser):
+        slides = [Token(0, 0), Token(50, 50)]
+        sections = [Token(30, 30)]
+        subsections = [Token(20, 20), Token(70, 70)]
+        parser.resolve_boundaries(tokens=slides, boundaries=[slides, sections, subsections], end=100)
+        assert [s.end_next for s in slides] == [20, 70]
+
+    def test_end_used_when_no_boundary_follows(self, parser):
+        slides = [Token(10, 10)]
+        parser.resolve_boundaries(tokens=slides, boundaries=[slides, [Token(5, 5)]], end=100)
+        assert slides[0].end_next == 100
+
+    def test_existing_end_is_only_shrunk(self, parser):
+        slides = [Token(0, 0, end_next=10)]
+        parser.resolve_boundaries(tokens=slides, boundaries=[[Token(40, 40)]])
+        assert slides[0].end_next == 10
+
+    def test_equivalent_to_pairwise_update(self, parser):
+        source = "# A\n#### s1\nx\n## B\n#### s2\n### C\ny\n#### s3\n# D\n#### s4\nz\n"
+        tokens = parser.scan(source=source)
+        expected = parser.tokens_end_update(tokens=[Token(t.start, t.end) for t in tokens["slides"]], end=len(source))
+        for kind in ("chapters", "sections", "subsections"):
+            for slide in expected:
+                for other in tokens[kind]:
+                    if slide.start < other.start and slide.end_next >= other.start:
+                        slide.end_next = other.start
+        resolved = parser.resolve_boundaries(
+            tokens=tokens["slides"],
+            boundaries=[tokens["slides"], tokens["chapters"], tokens["sections"], tokens["subsections"]],
+            end=len(source),
+        )
+        assert [s.end_next for s in resolved] == [s.end_next for s in expected]
+
+
+# ---------------------------------------------------------------------------
+# group_tokens
+# ---------------------------------------------------------------------------
+
+
+class TestGroupTokens:
+    def test_children_grouped_by_enclosing_parent(self, parser):
+        source = "# Ch1\n## S1\n## S2\n# Ch2\n## S3\n"
+        chapters = parser.tokens_end_update(
+            tokens=parser.tokenizer(source=source, re_search=parser.regexs["chapter"]), end=len(source)
+        )
+        sections = parser.tokenizer(source=source, re_search=parser.regexs["section"])
+        assert parser.group_tokens(parents=chapters, children=sections) == [[0, 1], [2]]
+
+    def test_children_before_first_parent_are_dropped(self, parser):
+        source = "## S0\n# Ch1\n## S1\n"
+        chapters = parser.tokens_end_update(
+            tokens=parser.tokenizer(source=source, re_search=parser.regexs["chapter"]), end=len(source)
+        )
+        sections = parser.tokenizer(source=source, re_search=parser.regexs["section"])
+        assert parser.group_tokens(parents=chapters, children=sections) == [[1]]
+
+    def test_parent_without_children(self, parser):
+        parents = [Token(0, 0, end_next=10), Token(10, 10, end_next=20)]
+        children = [Token(12, 12)]
+        assert parser.group_tokens(parents=parents, children=children) == [[], [0]]
 
 
 # ---------------------------------------------------------------------------
@@ -141,6 +212,59 @@ class TestIncludes:
         assert "$include" in result
 
 
+# ---------------------------------------------------------------------------
+# scan (single pass)
+# ---------------------------------------------------------------------------
+
+
+class TestScan:
+    def test_headings_are_split_by_level(self, parser):
+        source = "# Chapter\n## Section\n### Subsection\n#### Slide\n##### Not a slide\n"
+        tokens = parser.scan(source=source)
+        assert [t.group("expr") for t in tokens["chapters"]] == ["Chapter"]
+        assert [t.group("expr") for t in tokens["sections"]] == ["Section"]
+        assert [t.group("expr") for t in tokens["subsections"]] == ["Subsection"]
+        assert [t.group("expr") for t in tokens["slides"]] == ["Slide"]
+
+    def test_blocks_are_collected(self, parser):
+        source = "---\nkey: value\n---\n```\ncode\n```\n::: {.callout-note}\nbody\n:::\n"
+        tokens = parser.scan(source=source)
+        assert len(tokens["yamlblocks"]) == 1
+        assert len(tokens["codeblocks"]) == 1
+        assert len(tokens["fenceddivs"]) == 1
+
+    def test_headings_inside_blocks_are_skipped(self, parser):
+        source = "```\n# fake\n```\n---\n## fake\n---\n::: {.proof}\n### fake\n:::\n#### Real\n"
+        tokens = parser.scan(source=source)
+        assert tokens["chapters"] == []
+        assert tokens["sections"] == []
+        assert tokens["subsections"] == []
+        assert [t.group("expr") for t in tokens["slides"]] == ["Real"]
+
+    def test_matches_per_kind_tokenizer(self, parser):
+        source = "# A\ntext\n## B\n```\n## C\n```\n#### D\n# E\n"
+        codeblocks = parser.tokenizer(source=source, re_search=parser.regexs["codeblock"])
+        tokens = parser.scan(source=source)
+        for kind, regex in (("chapters", "chapter"), ("sections", "section"), ("slides", "slide")):
+            expected = parser.tokenizer(source=source, re_search=parser.regexs[regex], exclude=codeblocks)
+            assert [(t.start, t.end) for t in tokens[kind]] == [(t.start, t.end) for t in expected]
+
+    def test_bytes_source_matches_str_source(self, parser):
+        source = "# A\ntext\n## B\n```\n## C\n```\n### Ç\n#### D\n---\nk: v\n---\n"
+        str_tokens = parser.scan(source=source)
+        bytes_tokens = parser.scan(source=source.encode("utf-8"))
+        for kind in str_tokens:
+            assert len(bytes_tokens[kind]) == len(str_tokens[kind])
+        titles = [parser.decode(t.group("expr")) for t in bytes_tokens["subsections"]]
+        assert titles == ["Ç"]
+
+    def test_bytes_twin_regexs_are_cached(self, parser):
+        twin = parser.compiled_for(parser.regexs["slide"], b"")
+        assert isinstance(twin.pattern, bytes)
+        assert parser.compiled_for(parser.regexs["slide"], b"") is twin
+        assert parser.compiled_for(parser.regexs["slide"], "") is parser.regexs["slide"]
+
+
 # ---------------------------------------------------------------------------
 # tokenize (full pipeline)
 # ---------------------------------------------------------------------------
@@ -158,7 +282,7 @@ class TestTokenize:
     def test_codeblock_excluded_from_chapter_tokens(self, parser):
         source = "```\n# fake chapter\n```\n# Real Chapter\n"
         tokens = parser.tokenize(source=source)
-        chapters = [t for t in tokens["chapters"] if "Real Chapter" in t["match"].group("expr")]
+        chapters = [t for t in tokens["chapters"] if "Real Chapter" in t.group("expr")]
         assert len(chapters) == 1
 
     def test_yaml_block_detected(self, parser):
@@ -166,6 +290,18 @@ class TestTokenize:
         tokens = parser.tokenize(source=source)
         assert len(tokens["yamlblocks"]) == 1
 
+    def test_fenced_div_detected(self, parser):
+        source = "# Chapter\n::: {.callout-note}\nBody.\n:::\n"
+        tokens = parser.tokenize(source=source)
+        assert len(tokens["fenceddivs"]) == 1
+
+    def test_missing_sectioning_spans_whole_source(self, parser):
+        source = "#### Slide\ncontent\n"
+        tokens = parser.tokenize(source=source)
+        assert len(tokens["chapters"]) == 1
+        assert tokens["chapters"][0].start == 0
+        assert tokens["chapters"][0].end_next == len(source)
+
     def test_heading_inside_fenced_div_not_parsed_as_section(self, parser):
         # ## inside ::: ... ::: must not become a section token (regression for known_bugs.md)
         source = (
@@ -180,4 +316,4 @@ class TestTokenize:
         )
         tokens = parser.tokenize(source=source)
         assert len(tokens["sections"]) == 1
-        assert tokens["sections"][0]["match"].group("expr").strip() == "Section"
+        assert tokens["sections"][0].group("expr").strip() == "Section"
@@ -0,0 +1,121 @@
+"""
+Unit tests for matisse.presentation.Presentation document tree building.
+
+Covers: chapters/sections/subsections/slides nesting and numbering,
+orphan tokens, titlepage placement and TOC slides insertion.
+"""
+
+import pytest
+
+from matisse.matisse_config import MatisseConfig
+from matisse.presentation import Presentation
+
+
+@pytest.fixture
+def config():
+    return MatisseConfig()
+
+
+def _parse(config, source):
+    presentation = Presentation()
+    presentation.parse(config=config, source=source)
+    return presentation
+
+
+def _slides(presentation):
+    return [
+        slide
+        for chapter in presentation.chapters
+        for section in chapter.sections
+        for subsection in section.subsections
+        for slide in subsection.slides
+    ]
+
+
+_DECK = """\
+# Ch1
+## S1
+### SS1
+#### Slide 1
+one
+#### Slide 2
+two
+### SS2
+#### Slide 3
+three
+# Ch2
+## S2
+### SS3
+#### Slide 4
+four
+"""
+
+
+# ---------------------------------------------------------------------------
+# tree building
+# ---------------------------------------------------------------------------
+
+
+class TestTree:
+    def test_nesting(self, config):
+        presentation = _parse(config, _DECK)
+        assert [c.title for c in presentation.chapters] == ["Ch1", "Ch2"]
+        assert [len(s.subsections) for c in presentation.chapters for s in c.sections] == [2, 1]
+        assert [s.title for s in _slides(presentation)] == ["Slide 1", "Slide 2", "Slide 3", "Slide 4"]
+
+    def test_global_numbering(self, config):
+        presentation = _parse(config, _DECK)
+        assert [s.number for s in _slides(presentation)] == [1, 2, 3, 4]
+        subsections = [ss.number for c in presentation.chapters for s in c.sections for ss in s.subsections]
+        assert subsections == [1, 2, 3]
+
+    def test_slide_contents_end_at_next_heading(self, config):
+        presentation = _parse(config, _DECK)
+        assert _slides(presentation)[1].contents.strip() == "two"
+        assert _slides(presentation)[2].contents.strip() == "three"
+
+    def test_slides_before_first_subsection_are_dropped(self, config):
+        presentation = _parse(config, "#### Orphan\nlost\n" + _DECK)
+        assert "Orphan" not in [s.title for s in _slides(presentation)]
+
+    def test_titlepage_is_first_slide(self, config):
+        presentation = _parse(config, "#### $titlepage\nwelcome\n" + _DECK)
+        slides = _slides(presentation)
+        assert slides[0].title == "titlepage"
+        assert slides[0].number == 0
+        assert [s.number for s in slides[1:]] == [1, 2, 3, 4]
+
+    def test_toc_slides_at_chapter_beginning(self, config):
+        config.toc_at_chap_beginning = "1"
+        try:
+            presentation = _parse(config, _DECK)
+        finally:
+            config.toc_at_chap_beginning = None
+        titles = [s.title for s in _slides(presentation)]
+        assert titles == ["Table of Contents", "Slide 1", "Slide 2", "Slide 3", "Table of Contents", "Slide 4"]
+
+
+# ---------------------------------------------------------------------------
+# bytes (memory-mapped) sources
+# ---------------------------------------------------------------------------
+
+
+class TestBytesSource:
+    def test_tree_matches_str_source(self, config):
+        expected = [(s.number, s.title, s.contents) for s in _slides(_parse(config, _DECK))]
+        presentation = _parse(config, _DECK.encode("utf-8"))
+        assert [(s.number, s.title, s.contents) for s in _slides(presentation)] == expected
+
+    def test_slide_contents_are_decoded_lazily(self, config):
+        presentation = _parse(config, _DECK.encode("utf-8"))
+        slide = _slides(presentation)[0]
+        assert isinstance(slide.raw_contents, memoryview)
+        assert slide.contents.strip() == "one"
+        assert isinstance(slide.raw_contents, str)
+
+    def test_overtheme_and_labels(self, config):
+        source = _DECK.replace("one\n", "---\nslide:\n  slide-number: true\n---\none {#fig-a}\n")
+        presentation = _parse(config, source.encode("utf-8"))
+        assert "slide-number" in _slides(presentation)[0].raw_overtheme_yaml
+        assert "---" not in _slides(presentation)[0].contents
+        assert presentation.label_registry.resolve("fig-a") != "??"
@@ -0,0 +1,122 @@
+"""
+Unit tests for matisse.render_context.RenderContext.
+
+Covers: counters, keyed counters and flags, snapshot/restore, the
+class-attributes fallback of standalone environments, and concurrent builds
+of several presentations in threads.
+"""
+
+import threading
+
+from matisse.box import Box
+from matisse.diagram import Diagram
+from matisse.presentation import Presentation
+from matisse.render_context import CLASS_CONTEXT, RenderContext
+from matisse.theorem import Theorem
+
+# ---------------------------------------------------------------------------
+# RenderContext
+# ---------------------------------------------------------------------------
+
+
+class TestRenderContext:
+    def test_counters_advance_independently(self):
+        context = RenderContext()
+        assert context.next_number(Box, "boxes_number") == 1
+        assert context.next_number(Box, "boxes_number") == 2
+        assert context.next_number(Diagram, "diagrams_number") == 1
+        assert context.number(Box, "boxes_number") == 2
+
+    def test_keyed_counters(self):
+        context = RenderContext()
+        context.next_keyed_number(Theorem, "_counters", "thm")
+        assert context.next_keyed_number(Theorem, "_counters", "thm") == 2
+        assert context.next_keyed_number(Theorem, "_counters", "lem") == 1
+
+    def test_flags(self):
+        context = RenderContext()
+        assert not context.flag(Diagram, "has_mermaid")
+        context.set_flag(Diagram, "has_mermaid")
+        assert context.flag(Diagram, "has_mermaid")
+
+    def test_snapshot_and_restore(self):
+        context = RenderContext()
+        context.next_keyed_number(Theorem, "_counters", "thm")
+        state = context.snapshot()
+        context.next_keyed_number(Theorem, "_counters", "thm")
+        context.set_flag(Diagram, "has_graphviz")
+        context.restore(state)
+        assert context.keyed_numbers == {"_counters": {"thm": 1}}
+        assert context.flags == set()
+
+
+# ---------------------------------------------------------------------------
+# environments
+# ---------------------------------------------------------------------------
+
+
+class TestEnvironmentsContext:
+    def test_standalone_environments_use_class_attributes(self):
+        Box.reset()
+        box = Box(source="$box\n$content{a}\n$endbox")
+        assert box.context is CLASS_CONTEXT
+        assert box.number == Box.boxes_number == 1
+
+    def test_environments_numbered_by_their_context(self):
+        Box.reset()
+        Theorem.reset()
+        context = RenderContext()
+        Box(source="$box\n$content{a}\n$endbox", context=context)
+        theorem = Theorem(source="::: {#thm-a}\nA.\n:::", context=context)
+        diagram = Diagram(source="```{dot}\ndigraph { a -> b }\n```", context=context)
+        assert context.number(Box, "boxes_number") == 1
+        assert theorem.env_number == 1
+        assert diagram.number == 1
+        assert context.flag(Diagram, "has_graphviz")
+        assert Box.boxes_number == 0
+        assert Theorem._counters == {}
+
+
+# ---------------------------------------------------------------------------
+# concurrent builds
+# ---------------------------------------------------------------------------
+
+
+def _build(deck, n):
+    slides = [f"$box\n$content{{box {n}.{s}}}\n$endbox\n\n::: {{#thm-t{s}}}\nT.\n:::" for s in range(n)]
+    html, presentation, _ = deck.render(deck.source(slides, chapters=1))
+    return presentation, html
+
+
+class TestConcurrentBuilds:
+    def test_new_presentation_keeps_the_class_state(self):
+        Box.reset()
+        Theorem.reset()
+        Box(source="$box\n$content{a}\n$endbox")
+        Theorem(source="::: {#thm-a}\nA.\n:::")
+        Presentation()
+        assert Box.boxes_number == 1
+        assert Theorem._counters == {"thm": 1}
+
+    def test_presentation_numbering_into_its_context(self, deck):
+        presentation, _ = _build(deck, 3)
+        assert presentation.context.number(Presentation, "chapters_number") == 1
+        assert presentation.metadata["total_slides_number"].value == "3"
+        assert presentation.context.number(Box, "boxes_number") == 3
+        assert presentation.context.keyed_numbers["_counters"] == {"thm": 3}
+
+    def test_threads_do_not_corrupt_each_other(self, deck):
+        expected = {n: _build(deck, n)[1] for n in (2, 5, 8)}
+        results = {}
+
+        def build(n):
+            for _ in range(3):
+                results.setdefault(n, []).append(_build(deck, n)[1])
+
+        threads = [threading.Thread(target=build, args=(n,)) for n in expected]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for n, html in expected.items():
+            assert results[n] == [html] * 3
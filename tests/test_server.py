@@ -0,0 +1,209 @@
+"""
+Unit tests for matisse.server.
+
+Covers: building a presentation into memory (index.html with the reload
+script, generated CSS, assets and dirs_to_copy served from where they are),
+the HTTP server (files, 404, no way out of the served directories), the
+Server-Sent Events reload stream, and the serve loop writing nothing to disk.
+"""
+
+import http.client
+import threading
+
+import pytest
+
+from matisse.matisse_config import MatisseConfig
+from matisse.server import EVENTS_PATH, RELOAD_SCRIPT, MemoryBuild, make_server, serve_presentation
+from matisse.watcher import PollingWatcher
+
+_TALK = """---
+metadata:
+  - dirs_to_copy: [images]
+---
+# Ch
+## S
+### SS
+#### First
+first slide
+"""
+
+
+@pytest.fixture
+def workdir(workdir):
+    """Presentation sources into the temporary working directory."""
+    (workdir / "talk.md").write_text(_TALK)
+    (workdir / "images").mkdir()
+    (workdir / "images" / "a.png").write_bytes(b"png")
+    (workdir / "secret.txt").write_text("secret")
+    return workdir
+
+
+@pytest.fixture
+def served(workdir):
+    """A MemoryBuild of talk.md served on a free port, yielding (build, port)."""
+    build = MemoryBuild(config=MatisseConfig(), source_path="talk.md")
+    build.build()
+    server = make_server(build, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield build, server.server_address[1]
+    server.closing = True
+    with build.changed:
+        build.changed.notify_all()
+    server.shutdown()
+    server.server_close()
+
+
+def _get(port, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return response.status, response.getheader("Content-Type"), response.read()
+
+
+# ---------------------------------------------------------------------------
+# in-memory build
+# ---------------------------------------------------------------------------
+
+
+class TestMemoryBuild:
+    def test_index_has_reload_script_before_body_end(self, workdir):
+        build = MemoryBuild(config=MatisseConfig(), source_path="talk.md")
+        build.build()
+        index = build.lookup("/").decode("utf-8")
+        assert "first slide" in index
+        assert index.index(RELOAD_SCRIPT) < index.rindex("</body>")
+        assert build.version == 1
+
+    def test_generated_css_and_assets(self, workdir):
+        build = MemoryBuild(config=MatisseConfig(), source_path="talk.md")
+        build.build()
+        assert isinstance(build.lookup("/css/theme.css"), bytes)
+        assert isinstance(build.lookup("/css/pygments.css"), bytes)
+        assert build.lookup("/js/countDown.js").endswith("countDown.js")
+        assert build.lookup("/images/a.png").endswith("a.png")
+        assert build.lookup("/images/missing.png") is None
+
+    def test_nothing_written_to_disk(self, workdir):
+        build = MemoryBuild(config=MatisseConfig(), source_path="talk.md")
+        build.build()
+        assert sorted(path.name for path in workdir.iterdir()) == ["images", "secret.txt", "talk.md"]
+
+    def test_unchanged_includes_are_not_read_again(self, workdir, touch):
+        (workdir / "more.md").write_text("#### Included\nincluded slide\n")
+        (workdir / "talk.md").write_text(_TALK + "$include(more.md)\n")
+        build = MemoryBuild(config=MatisseConfig(), source_path="talk.md")
+        build.build()
+        build.build()
+        assert build.include_resolver.reads == 1
+        touch(workdir / "more.md", "#### Included\nedited included slide\n")
+        build.build()
+        assert build.include_resolver.reads == 2
+        assert b"edited included slide" in build.lookup("/index.html")
+
+    def test_failed_build_keeps_the_previous_one(self, workdir):
+        build = MemoryBuild(config=MatisseConfig(), source_path="talk.md")
+        build.build()
+        (workdir / "talk.md").write_text(_TALK + "$include(missing.md)\n")
+        with pytest.raises(SystemExit):
+            build.build()
+        assert b"first slide" in build.lookup("/index.html")
+        assert build.version == 1
+
+
+# ---------------------------------------------------------------------------
+# http server
+# ---------------------------------------------------------------------------
+
+
+class TestServer:
+    def test_files_are_served(self, served):
+        _, port = served
+        status, kind, body = _get(port, "/")
+        assert status == 200
+        assert kind == "text/html; charset=utf-8"
+        assert b"first slide" in body
+        status, kind, body = _get(port, "/images/a.png")
+        assert (status, kind, body) == (200, "image/png", b"png")
+
+    def test_missing_and_outside_paths_are_not_found(self, served):
+        _, port = served
+        assert _get(port, "/nothing.html")[0] == 404
+        assert _get(port, "/images/../secret.txt")[0] == 404
+        assert _get(port, "/images/%2e%2e/secret.txt")[0] == 404
+
+    def test_builtin_theme_files_are_served(self, workdir):
+        config = MatisseConfig()
+        config.set_theme("matisse")
+        build = MemoryBuild(config=config, source_path="talk.md")
+        build.build()
+        assert not (workdir / "theme-matisse").exists()
+        server = make_server(build, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            port = server.server_address[1]
+            status, kind, _ = _get(port, "/theme-matisse/css/table.css")
+            assert (status, kind) == (200, "text/css")
+            status, kind, body = _get(port, "/theme-matisse/logo/logo.png")
+            assert (status, kind) == (200, "image/png")
+            assert body.startswith(b"\x89PNG")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_reload_event_is_pushed(self, served):
+        build, port = served
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("GET", EVENTS_PATH)
+        response = connection.getresponse()
+        assert response.getheader("Content-Type") == "text/event-stream"
+        assert response.readline() == b"retry: 1000\n"
+        response.readline()
+        threading.Timer(0.05, build.reload).start()
+        assert response.readline() == b"event: reload\n"
+        assert response.readline() == f"data: {build.version}\n".encode("utf-8")
+        connection.close()
+
+
+# ---------------------------------------------------------------------------
+# serve loop
+# ---------------------------------------------------------------------------
+
+
+class _ScriptedWatcher(PollingWatcher):
+    """Watcher applying a scripted change at each call of changes, interrupting once the script is over."""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+
+    def changes(self):
+        if not self.script:
+            raise KeyboardInterrupt
+        path, text = self.script.pop(0)
+        path.write_text(text)
+        return {str(path)}
+
+
+class TestServePresentation:
+    def test_rebuilds_in_memory(self, workdir, capsys):
+        watcher = _ScriptedWatcher([(workdir / "talk.md", _TALK.replace("first slide", "edited"))])
+        config = MatisseConfig()
+        serve_presentation(config=config, source_path="talk.md", port=0, watcher=watcher)
+        output = capsys.readouterr().out
+        assert "Serving talk.md at http://127.0.0.1:" in output
+        assert output.count("Built talk.md") == 2
+        assert sorted(path.name for path in workdir.iterdir()) == ["images", "secret.txt", "talk.md"]
+        assert config.build_cache is None
+
+    def test_source_error_keeps_serving_the_last_build(self, workdir, capsys, monkeypatch):
+        malformed = _TALK.replace("metadata:\n  - dirs_to_copy: [images]", "metadata: 5")
+        watcher = _ScriptedWatcher([(workdir / "talk.md", malformed)])
+        builds = []
+        original = MemoryBuild.build
+        monkeypatch.setattr(MemoryBuild, "build", lambda self: builds.append(self) or original(self))
+        serve_presentation(config=MatisseConfig(), source_path="talk.md", port=0, watcher=watcher)
+        assert "build failed (TypeError" in capsys.readouterr().err
+        assert len(builds) == 2
+        assert b"first slide" in builds[-1].lookup("/index.html")
+        assert builds[-1].version == 1
@@ -0,0 +1,98 @@
+"""
+Unit tests for matisse.slide.Slide environments expansion.
+
+Covers: the single-dispatch expander (only the environments whose opener is
+present are expanded, in the historical order), its equivalence with the
+one-pass-per-environment expansion and the exclusion of codes.
+"""
+
+import pytest
+
+import matisse.slide as slide_module
+from matisse.parser import Parser
+from matisse.slide import _ENVIRONMENTS, Slide
+from matisse.theme import Theme
+
+
+@pytest.fixture
+def parser():
+    return Parser()
+
+
+def _reset_environments():
+    for Env, _, _ in _ENVIRONMENTS:
+        if hasattr(Env, "reset"):
+            Env.reset()
+
+
+def _expand(parser, source):
+    _reset_environments()
+    return Slide(number=1, contents=source)._parse_envs(parser=parser, theme=Theme(), source=source)
+
+
+def _expand_each(parser, source):
+    _reset_environments()
+    slide = Slide(number=1, contents=source)
+    for Env, re_search, _ in _ENVIRONMENTS:
+        source = slide._parse_env(parser=parser, theme=Theme(), Env=Env, re_search=re_search, source=source)
+    return source
+
+
+class TestParseEnvs:
+    def test_source_without_environments_is_untouched(self, parser, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("no environment should be expanded")
+
+        monkeypatch.setattr(Slide, "_parse_env", fail)
+        source = "plain **markdown**, no environment\n"
+        assert _expand(parser, source) is source
+
+    def test_only_present_environments_are_expanded(self, parser, monkeypatch):
+        expanded = []
+        original = Slide._parse_env
+
+        def spy(self, Env, **kwargs):
+            expanded.append(Env.__name__)
+            return original(self, Env=Env, **kwargs)
+
+        monkeypatch.setattr(Slide, "_parse_env", spy)
+        _expand(parser, "$note\n$content{remember}\n$endnote\n")
+        assert expanded == ["Note"]
+
+    def test_figure_group_runs_before_figure(self, parser):
+        source = (
+            "::: {#fig-group}\n"
+            "$figure\n$content[width:50%]{a.png}\n$caption{A}\n$endfigure\n"
+            "$figure\n$content[width:50%]{b.png}\n$caption{B}\n$endfigure\n"
+            ":::\n"
+        )
+        assert _expand(parser, source) == _expand_each(parser, source)
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "$box\n$content{inner}\n$endbox\n$note\n$content{note}\n$endnote\n",
+            "$columns\n$column[width:50%]\n$figure\n$content{a.png}\n$endfigure\n$endcolumns\n",
+            "::: {.callout-tip}\ntip\n:::\n\n::: {.incremental}\n- a\n- b\n:::\n",
+            "`$box`\n```\n$note\nx\n$endnote\n```\n$note\n$content{real}\n$endnote\n",
+        ],
+    )
+    def test_equivalent_to_one_pass_per_environment(self, parser, source):
+        assert _expand(parser, source) == _expand_each(parser, source)
+
+    def test_openers_into_codes_are_left_alone(self, parser):
+        source = "`$box` and\n```\n$note\nx\n$endnote\n```\n"
+        assert _expand(parser, source) == source
+
+    def test_openers_scanned_once_when_nothing_changes(self, parser, monkeypatch):
+        scans = []
+        original = slide_module._ENV_OPENERS
+
+        class Spy:
+            def finditer(self, source):
+                scans.append(source)
+                return original.finditer(source)
+
+        monkeypatch.setattr(slide_module, "_ENV_OPENERS", Spy())
+        _expand(parser, "text ::: not a fenced div\n")
+        assert len(scans) == 1
@@ -0,0 +1,97 @@
+"""
+Unit tests for matisse.source_map.SourceMap.
+
+Covers: offsets to file/line/column lookups across included files, tokens
+and slides lookups, prelude stripping and the files of a span.
+"""
+
+from matisse.include_resolver import MAIN_SOURCE, IncludeResolver
+from matisse.matisse_config import MatisseConfig
+from matisse.parser import Parser
+from matisse.presentation import Presentation
+from matisse.source_map import PRELUDE_SOURCE, SourceLocation, SourceMap
+
+
+def _map(source, origin=MAIN_SOURCE):
+    resolver = IncludeResolver(parser=Parser())
+    expanded, segments = resolver.resolve(source=source, origin=origin)
+    return expanded, SourceMap(segments=segments, sources=resolver.sources)
+
+
+# ---------------------------------------------------------------------------
+# locate
+# ---------------------------------------------------------------------------
+
+
+class TestLocate:
+    def test_main_source_lines_and_columns(self):
+        expanded, source_map = _map("ab\ncd\n")
+        assert source_map.locate(0) == SourceLocation(MAIN_SOURCE, 1, 1)
+        assert source_map.locate(expanded.index("d")) == SourceLocation(MAIN_SOURCE, 2, 2)
+
+    def test_included_file_locations(self, workdir, touch):
+        touch("inc.md", "x\ny\n")
+        expanded, source_map = _map("a\n$include(inc.md)\nb\n", origin="main.md")
+        assert expanded == "a\nx\ny\n\nb\n"
+        assert source_map.locate(expanded.index("y")) == SourceLocation("inc.md", 2, 1)
+        assert source_map.locate(expanded.index("b")) == SourceLocation("main.md", 3, 1)
+
+    def test_end_of_source_is_located(self):
+        expanded, source_map = _map("ab")
+        assert source_map.locate(len(expanded)) == SourceLocation(MAIN_SOURCE, 1, 3)
+
+    def test_uncovered_offset(self):
+        assert SourceMap().locate(3) is None
+
+    def test_token_lookup(self):
+        source = "text\n#### Slide\n"
+        _, source_map = _map(source)
+        parser = Parser()
+        token = parser.tokenizer(source=source, re_search=parser.regexs["slide"], groups=(0,))[0]
+        assert source_map.locate(token) == SourceLocation(MAIN_SOURCE, 1, 5)
+        assert source_map.locate(parser.heading_start(token)) == SourceLocation(MAIN_SOURCE, 2, 1)
+
+    def test_str(self):
+        assert str(SourceLocation("a.md", 3, 4)) == "a.md:3:4"
+
+
+# ---------------------------------------------------------------------------
+# prelude / files
+# ---------------------------------------------------------------------------
+
+
+class TestPreludeFiles:
+    def test_strip_prelude(self):
+        expanded, source_map = _map("PRE\nab\ncd\n", origin="main.md")
+        source_map.strip_prelude(path="main.md", length=4)
+        assert source_map.locate(0).path == PRELUDE_SOURCE
+        assert source_map.locate(expanded.index("c")) == SourceLocation("main.md", 2, 1)
+
+    def test_files_of_span(self, workdir, touch):
+        touch("inc.md", "x\n")
+        expanded, source_map = _map("a\n$include(inc.md)b\n", origin="main.md")
+        assert source_map.files(0, 1) == ["main.md"]
+        assert source_map.files(0, len(expanded)) == ["main.md", "inc.md"]
+        assert source_map.files(expanded.index("x"), expanded.index("x") + 1) == ["inc.md"]
+
+
+# ---------------------------------------------------------------------------
+# presentation integration
+# ---------------------------------------------------------------------------
+
+
+class TestPresentation:
+    def test_slides_are_located_into_included_files(self, workdir, touch):
+        touch("slides.md", "#### Slide 2\ntwo\n")
+        source = "# Ch\n## S\n### SS\n#### Slide 1\none\n$include(slides.md)"
+        presentation = Presentation()
+        presentation.parse(config=MatisseConfig(), source=source, source_path="talk.md")
+        slides = presentation.chapters[0].sections[0].subsections[0].slides
+        assert str(presentation.source_map.locate(slides[0])) == "talk.md:4:1"
+        assert str(presentation.source_map.locate(slides[1])) == "slides.md:1:1"
+
+    def test_bad_sectioning_warning_has_location(self, capsys):
+        source = "#### Orphan\ntext\n# Ch\n## S\n### SS\n#### Slide\n"
+        presentation = Presentation()
+        presentation.parse(config=MatisseConfig(), source=source, source_path="talk.md")
+        assert "at talk.md:1:1" in capsys.readouterr().out
@@ -0,0 +1,239 @@
+"""
+Unit tests for the streaming HTML writer of the backends.
+
+Covers: HtmlIndenter (chunked indentation equal to indent_html, <pre>
+blocks, head/tail of a document around SLIDES_SLOT, output equal to
+yattag.indent), minify_html (and its size and timing against indent_html),
+AbstractBackend.write streaming slide by slide for both backends (rendering
+the document once, the deferred markup after the slides) and
+Presentation.save with and without indentation.
+"""
+
+import io
+import os
+import re
+import time
+
+import pytest
+import yattag
+
+from matisse.backends.base import DEFERRED_SLOT, SLIDES_SLOT, HtmlIndenter, indent_html, minify_html
+from matisse.backends.impress.renderer import ImpressBackend
+from matisse.backends.reveal.renderer import RevealBackend
+from matisse.diagram import MERMAID_CDN_SCRIPT
+from matisse.matisse_config import MatisseConfig
+
+_THEME = """---
+theme:
+  layout:
+    header-1:
+      height: 5%
+      metadata:
+        slidetitle:
+          float: left
+---
+"""
+
+_SLIDES = [
+    "Some *text* and a list:\n\n* one\n* two",
+    "```python\nx = 1\ny = 2\n```",
+    "$box\n$content{a box}\n$endbox",
+    "plain",
+]
+
+
+@pytest.fixture
+def source(deck):
+    """Source of a themed deck of two chapters."""
+    return deck.source(_SLIDES, preamble=_THEME)
+
+
+class _Sink(io.StringIO):
+    """StringIO counting the writes."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+# ---------------------------------------------------------------------------
+# HtmlIndenter
+# ---------------------------------------------------------------------------
+
+
+class TestHtmlIndenter:
+    def test_chunks_indented_as_the_whole_document(self):
+        document = f'<html><body><div id="a">{SLIDES_SLOT}</div><script>x</script></body></html>'
+        slides = ["<div><p>one <b>bold</b></p><ul><li>a</li></ul></div>", "<div><br/><span>two</span></div>"]
+        indenter = HtmlIndenter()
+        chunks = [indenter.indent(document, part="head")]
+        chunks += [indenter.indent(slide) for slide in slides]
+        chunks.append(indenter.indent(document, part="tail"))
+        assert "".join(chunks) == indent_html(document.replace(SLIDES_SLOT, "".join(slides)))
+
+    def test_no_slides(self):
+        document = f"<html><body><div>{SLIDES_SLOT}</div></body></html>"
+        indenter = HtmlIndenter()
+        html = indenter.indent(document, part="head") + indenter.indent(document, part="tail")
+        assert html == indent_html(document.replace(SLIDES_SLOT, ""))
+
+    @pytest.mark.parametrize(
+        "html",
+        [
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>T</title></head><body></body></html>',
+            "<div><!-- a comment --><p>text <em>inline</em> tail</p><br/><img src='a.png' /></div>",
+            "<div><script>if (a < b) {}</script><style>p > b {}</style><![CDATA[x < y]]></div>",
+            '<DIV class="a"><p>unclosed<span>x</span></DIV><p>stray</b></p>',
+            "<?xml version='1.0'?><svg><g><path d=\"M 0 0\"/></g></svg>",
+        ],
+    )
+    def test_equal_to_yattag_indent(self, html):
+        assert HtmlIndenter().indent(html) == yattag.indent(html)
+
+    def test_rendered_document_equal_to_yattag_indent(self, deck, source):
+        source = source.replace("```python\nx = 1\ny = 2\n```", "$box\n$content{code}\n$endbox")
+        html = deck.render(source)[0]
+        assert "<pre" not in html
+        assert HtmlIndenter().indent(html) == yattag.indent(html)
+
+    def test_pre_blocks_kept_verbatim(self):
+        html = "<div><pre><code><span>a</span>\n<span>b</span></code></pre><pre>c</pre></div>"
+        indented = HtmlIndenter().indent(html)
+        assert "<pre><code><span>a</span>\n<span>b</span></code></pre>" in indented
+        assert indented == indent_html(html)
+
+
+# ---------------------------------------------------------------------------
+# minify_html
+# ---------------------------------------------------------------------------
+
+
+def _best_time(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestMinifyHtml:
+    def test_whitespace_runs_collapsed(self):
+        assert minify_html("<p>a   b\n\n   c</p>\n   <p>d</p>") == "<p>a b\nc</p>\n<p>d</p>"
+
+    def test_non_breaking_spaces_kept(self):
+        assert minify_html("<p>a\xa0\xa0b</p>") == "<p>a\xa0\xa0b</p>"
+
+    @pytest.mark.parametrize(
+        "verbatim",
+        [
+            '<pre class="mermaid">graph LR\n  A --> B</pre>',
+            "<pre><code>x  =  1\n    y</code></pre>",
+            "<script>\n  var a = 1\n  var b = 2\n</script>",
+            "<style>\n  p {  color: red; }\n</style>",
+            '<div class="graphviz">digraph {\n  // comment\n  a -> b\n}</div>',
+        ],
+    )
+    def test_verbatim_elements_kept(self, verbatim):
+        assert verbatim in minify_html(f"<div>\n    {verbatim}\n    </div>")
+
+    def test_empty_class_and_style_dropped(self):
+        html = '<div class="" style="" id="a"><img alt="" src="x.png"/></div> text class=""'
+        assert minify_html(html) == '<div id="a"><img alt="" src="x.png"/></div> text class=""'
+
+    def test_smaller_and_faster_than_indented(self, deck):
+        slides = [
+            f"Some *text* {n}\n\n* one\n* two\n\n```python\nx = {n}\n```\n\n$box\n$content{{b}}\n$endbox"
+            for n in range(60)
+        ]
+        sink = io.StringIO()
+        ImpressBackend(MatisseConfig()).write(deck.parse(deck.source(slides, chapters=1)), sink, indent=False)
+        html = sink.getvalue()
+        indented, minified = indent_html(html), minify_html(html)
+        assert len(minified.encode()) < len(indented.encode())
+        assert _best_time(minify_html, html) < _best_time(indent_html, html)
+        # same markup, whitespace aside
+        assert re.sub(r"\s+", "", minified) == re.sub(r"\s+", "", indented)
+
+
+# ---------------------------------------------------------------------------
+# AbstractBackend.write
+# ---------------------------------------------------------------------------
+
+
+class TestBackendWrite:
+    @pytest.mark.parametrize("backend", [ImpressBackend, RevealBackend])
+    def test_streamed_html_equals_rendered(self, deck, source, backend):
+        config = MatisseConfig()
+        expected = backend(config).render(deck.parse(source))
+        sink = _Sink()
+        backend(config).write(deck.parse(source), sink)
+        assert sink.getvalue() == expected
+        # head, each slide (or chapter group) and tail
+        assert sink.writes >= 4
+
+    @pytest.mark.parametrize("backend", [ImpressBackend, RevealBackend])
+    def test_document_rendered_once(self, deck, source, backend, monkeypatch):
+        documents = []
+        original = backend._document
+        monkeypatch.setattr(backend, "_document", lambda self, p: documents.append(1) or original(self, p))
+        source += "#### Diagram\n```{mermaid}\nflowchart LR\n  A --> B\n```\n"
+        sink = io.StringIO()
+        backend(MatisseConfig()).write(deck.parse(source), sink)
+        assert len(documents) == 1
+        # the diagram scripts, depending on the slides, are written into the tail
+        html = sink.getvalue()
+        assert MERMAID_CDN_SCRIPT.strip().splitlines()[0].strip() in html
+        assert DEFERRED_SLOT not in html
+
+    def test_vertical_layout_streamed_by_chapter(self, deck, source):
+        source = source.replace("theme:\n  layout:", "reveal:\n  layout: vertical\ntheme:\n  layout:")
+        config = MatisseConfig()
+        expected = RevealBackend(config).render(deck.parse(source))
+        sink = _Sink()
+        RevealBackend(config).write(deck.parse(source), sink)
+        assert sink.getvalue() == expected
+        assert sink.writes == 4
+
+    def test_not_indented(self, deck, source):
+        sink = io.StringIO()
+        ImpressBackend(MatisseConfig()).write(deck.parse(source), sink, indent=False)
+        assert "\n  <head>" not in sink.getvalue()
+        assert indent_html(sink.getvalue()) == deck.render(source)[0]
+
+
+# ---------------------------------------------------------------------------
+# Presentation.save
+# ---------------------------------------------------------------------------
+
+
+class TestSave:
+    def test_index_minified(self, deck, source, tmp_path):
+        config = MatisseConfig()
+        config.minify = True
+        output = str(tmp_path / "out")
+        config.make_output_tree(output=output)
+        deck.parse(source).save(config=config, output=output)
+        with open(os.path.join(output, "index.html")) as index:
+            html = index.read()
+        expected = deck.parse(source).to_html(config=config)
+        assert len(html) < len(expected)
+        assert re.sub(r"\s+", "", html) == re.sub(r"\s+", "", expected)
+
+    @pytest.mark.parametrize("indent", [True, False])
+    def test_index_written(self, deck, source, tmp_path, indent):
+        config = MatisseConfig()
+        config.indent = indent
+        output = str(tmp_path / "out")
+        config.make_output_tree(output=output)
+        deck.parse(source).save(config=config, output=output)
+        with open(os.path.join(output, "index.html")) as index:
+            html = index.read()
+        expected = deck.parse(source).to_html(config=config)
+        assert (html == expected) is indent
+        assert indent_html(html) == expected
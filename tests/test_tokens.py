@@ -0,0 +1,43 @@
+"""
+Unit tests for matisse.tokens.Token.
+
+Covers: creation from matches keeping only the requested groups, the
+re.Match-like group accessor and the slot-based layout.
+"""
+
+import re
+
+import pytest
+
+from matisse.parser import Parser
+from matisse.tokens import Token
+
+
+class TestToken:
+    def test_from_match_keeps_offsets_only_by_default(self):
+        match = re.search(r"b(?P<x>c)", "abcd")
+        token = Token.from_match(match)
+        assert (token.start, token.end, token.end_next) == (1, 3, None)
+        assert token.groups is None
+
+    def test_from_match_keeps_requested_groups(self):
+        match = re.search(r"b(?P<x>c)", "abcd")
+        token = Token.from_match(match, (0, "x"))
+        assert token.group() == "bc"
+        assert token.group("x") == "c"
+
+    def test_group_not_kept_raises(self):
+        token = Token.from_match(re.search(r"b(?P<x>c)", "abcd"), ("x",))
+        with pytest.raises(IndexError):
+            token.group()
+
+    def test_slots(self):
+        token = Token(0, 1)
+        assert not hasattr(token, "__dict__")
+        with pytest.raises(AttributeError):
+            token.match = None
+
+    def test_tokenizer_does_not_keep_matches(self):
+        parser = Parser()
+        tokens = parser.tokenizer(source="`a` `b`", re_search=parser.regexs["code"])
+        assert all(isinstance(token, Token) and token.groups is None for token in tokens)
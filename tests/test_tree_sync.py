@@ -0,0 +1,239 @@
+"""
+Unit tests for matisse.tree_sync.
+
+Covers: transferring only missing or changed files (by size and modification
+time or by contents hash), copies modified or removed by hand, stale files
+of synced directories, hard links and reflinks (with their copy fallback),
+the threaded mirror (optionally deleting removed files, symbolic links),
+generated files written only when changed, the incremental assets sync of
+MatisseConfig.make_output_tree and the dirs_to_copy mirror of a build.
+"""
+
+import os
+from argparse import Namespace
+
+import pytest
+
+from matisse import tree_sync
+from matisse.matisse_config import MatisseConfig
+from matisse.tree_sync import TreeSync
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A source directory with a nested file, plus a single file."""
+    tree = tmp_path / "assets"
+    (tree / "sub").mkdir(parents=True)
+    (tree / "a.js").write_text("a")
+    (tree / "sub" / "b.js").write_text("b")
+    (tmp_path / "single.css").write_text("css")
+    return tmp_path
+
+
+def _pairs(source):
+    return [("js/assets", str(source / "assets")), ("css/single.css", str(source / "single.css"))]
+
+
+# ---------------------------------------------------------------------------
+# sync
+# ---------------------------------------------------------------------------
+
+
+class TestSync:
+    def test_second_sync_transfers_nothing(self, source, tmp_path):
+        out = tmp_path / "out"
+        first = TreeSync(str(out)).sync(_pairs(source))
+        assert first.transferred == 3
+        assert (out / "js" / "assets" / "sub" / "b.js").read_text() == "b"
+        assert (out / "css" / "single.css").read_text() == "css"
+        second = TreeSync(str(out)).sync(_pairs(source))
+        assert (second.transferred, second.skipped) == (0, 3)
+
+    def test_changed_source_is_transferred(self, source, tmp_path, touch):
+        out = tmp_path / "out"
+        TreeSync(str(out)).sync(_pairs(source))
+        touch(source / "assets" / "a.js", "A")
+        sync = TreeSync(str(out)).sync(_pairs(source))
+        assert (sync.transferred, sync.skipped) == (1, 2)
+        assert (out / "js" / "assets" / "a.js").read_text() == "A"
+
+    def test_copy_modified_or_removed_by_hand_is_transferred(self, source, tmp_path, touch):
+        out = tmp_path / "out"
+        TreeSync(str(out)).sync(_pairs(source))
+        touch(out / "css" / "single.css", "edited")
+        (out / "js" / "assets" / "a.js").unlink()
+        sync = TreeSync(str(out)).sync(_pairs(source))
+        assert sync.transferred == 2
+        assert (out / "css" / "single.css").read_text() == "css"
+        assert (out / "js" / "assets" / "a.js").read_text() == "a"
+
+    def test_stale_files_are_removed_unless_modified(self, source, tmp_path, touch):
+        out = tmp_path / "out"
+        TreeSync(str(out)).sync(_pairs(source))
+        (source / "assets" / "a.js").unlink()
+        (source / "assets" / "sub" / "b.js").unlink()
+        touch(out / "js" / "assets" / "sub" / "b.js", "edited")
+        sync = TreeSync(str(out)).sync(_pairs(source))
+        assert sync.removed == 1
+        assert not (out / "js" / "assets" / "a.js").exists()
+        assert (out / "js" / "assets" / "sub" / "b.js").read_text() == "edited"
+
+    def test_hash_check_skips_touched_but_unchanged_sources(self, source, tmp_path, touch):
+        out = tmp_path / "out"
+        TreeSync(str(out), check="hash").sync(_pairs(source))
+        touch(source / "assets" / "a.js", "a")
+        touch(source / "single.css", "CSS")
+        sync = TreeSync(str(out), check="hash").sync(_pairs(source))
+        assert (sync.transferred, sync.skipped) == (1, 2)
+        assert (out / "css" / "single.css").read_text() == "CSS"
+
+    def test_unreadable_manifest_transfers_everything(self, source, tmp_path):
+        out = tmp_path / "out"
+        TreeSync(str(out)).sync(_pairs(source))
+        (out / ".matisse-assets.json").write_text("{not json")
+        assert TreeSync(str(out)).sync(_pairs(source)).transferred == 3
+
+
+# ---------------------------------------------------------------------------
+# links
+# ---------------------------------------------------------------------------
+
+
+class TestLinks:
+    def test_hardlink_shares_the_inode_and_is_relinked(self, source, tmp_path):
+        out = tmp_path / "out"
+        TreeSync(str(out), link="hardlink").sync(_pairs(source))
+        assert os.path.samefile(out / "css" / "single.css", source / "single.css")
+        # a source replaced (as editors and installers do) is linked again
+        (source / "new.css").write_text("new")
+        os.replace(source / "new.css", source / "single.css")
+        sync = TreeSync(str(out), link="hardlink").sync(_pairs(source))
+        assert sync.transferred == 1
+        assert os.path.samefile(out / "css" / "single.css", source / "single.css")
+
+    def test_reflink_falls_back_to_copy(self, source, tmp_path, monkeypatch):
+        def unsupported(src, dst):
+            open(dst, "wb").close()
+            raise OSError("not supported")
+
+        monkeypatch.setattr(tree_sync, "_reflink", unsupported)
+        out = tmp_path / "out"
+        sync = TreeSync(str(out), link="reflink").sync(_pairs(source))
+        assert sync.transferred == 3
+        assert (out / "js" / "assets" / "a.js").read_text() == "a"
+        assert not os.path.samefile(out / "js" / "assets" / "a.js", source / "assets" / "a.js")
+        assert not [name for name in os.listdir(out / "css") if name.endswith(".matisse-tmp")]
+
+
+# ---------------------------------------------------------------------------
+# mirror
+# ---------------------------------------------------------------------------
+
+
+class TestMirror:
+    def test_threads_transfer_as_sequential_sync(self, source, tmp_path, touch):
+        for index in range(20):
+            (source / "assets" / f"media-{index}.bin").write_bytes(bytes([index]) * 1000)
+        out = tmp_path / "out"
+        sync = TreeSync(str(out), jobs=4).sync(_pairs(source))
+        assert sync.transferred == 23
+        assert (out / "js" / "assets" / "media-7.bin").read_bytes() == bytes([7]) * 1000
+        touch(source / "assets" / "a.js", "A")
+        sync = TreeSync(str(out), jobs=4).sync(_pairs(source))
+        assert (sync.transferred, sync.skipped) == (1, 22)
+
+    def test_removed_files_are_kept_without_delete(self, source, tmp_path):
+        out = tmp_path / "out"
+        TreeSync(str(out), delete=False).sync(_pairs(source))
+        (source / "assets" / "a.js").unlink()
+        sync = TreeSync(str(out), delete=False).sync(_pairs(source))
+        assert sync.removed == 0
+        assert (out / "js" / "assets" / "a.js").exists()
+        # forgotten by the manifest: a later sync with delete does not remove it either
+        assert TreeSync(str(out)).sync(_pairs(source)).removed == 0
+
+    def test_symlinks_and_their_removal(self, source, tmp_path):
+        out = tmp_path / "out"
+        TreeSync(str(out), link="symlink").sync(_pairs(source))
+        link = out / "js" / "assets" / "a.js"
+        assert link.is_symlink()
+        assert os.readlink(link) == str(source / "assets" / "a.js")
+        assert TreeSync(str(out), link="symlink").sync(_pairs(source)).transferred == 0
+        (source / "assets" / "a.js").unlink()
+        sync = TreeSync(str(out), link="symlink").sync(_pairs(source))
+        assert sync.removed == 1
+        assert not os.path.lexists(link)
+
+    def test_missing_source_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            TreeSync(str(tmp_path / "out")).sync([("media", str(tmp_path / "missing"))])
+
+
+# ---------------------------------------------------------------------------
+# generated files
+# ---------------------------------------------------------------------------
+
+
+class TestWriteText:
+    def test_written_only_when_changed(self, tmp_path):
+        sync = TreeSync(str(tmp_path))
+        assert sync.write_text(os.path.join("css", "pygments.css"), "body {}")
+        assert not sync.write_text(os.path.join("css", "pygments.css"), "body {}")
+        assert sync.write_text(os.path.join("css", "pygments.css"), "pre {}")
+        assert (tmp_path / "css" / "pygments.css").read_text() == "pre {}"
+
+
+# ---------------------------------------------------------------------------
+# output tree
+# ---------------------------------------------------------------------------
+
+
+class TestMakeOutputTree:
+    def test_offline_rebuild_transfers_nothing(self, tmp_path, capsys):
+        config = MatisseConfig()
+        config.offline = True
+        config.verbose = True
+        config.make_output_tree(output=str(tmp_path))
+        first = capsys.readouterr().out
+        assert (tmp_path / "js" / "MathJax").is_dir()
+        assert (tmp_path / "js" / "impress.js").is_file()
+        config.make_output_tree(output=str(tmp_path))
+        second = capsys.readouterr().out
+        assert "0 removed" in first
+        assert "Assets: 0 transferred" in second
+
+    def test_invalid_modes_fall_back(self, capsys):
+        cliargs = Namespace(
+            verbose=False,
+            theme=None,
+            toc_at_chap_beginning=None,
+            toc_at_sec_beginning=None,
+            toc_at_subsec_beginning=None,
+            pdf=False,
+            print_parsed_source=False,
+            asset_link="softlink",
+            asset_check="size",
+        )
+        config = MatisseConfig(cliargs=cliargs)
+        assert (config.asset_link, config.asset_check) == ("copy", "mtime")
+        err = capsys.readouterr().err
+        assert "unknown asset link mode 'softlink'" in err
+        assert "unknown asset check mode 'size'" in err
+
+    def test_presentation_mirrors_dirs_to_copy(self, tmp_path, monkeypatch, capsys):
+        from matisse.matisse import build_presentation
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "media").mkdir()
+        (tmp_path / "media" / "a.png").write_bytes(b"png")
+        (tmp_path / "media" / "b.png").write_bytes(b"png")
+        source = "---\nmetadata:\n  - dirs_to_copy: [media]\n---\n# Ch\n## S\n### SS\n#### First\nslide\n"
+        config = MatisseConfig()
+        config.mirror_delete = True
+        build_presentation(config=config, source=source, output="out", source_path="talk.md")
+        assert (tmp_path / "out" / "media" / "a.png").read_bytes() == b"png"
+        (tmp_path / "media" / "b.png").unlink()
+        config.verbose = True
+        build_presentation(config=config, source=source, output="out", source_path="talk.md")
+        assert "dirs_to_copy: 0 transferred, 1 up to date, 1 removed" in capsys.readouterr().out
+        assert not (tmp_path / "out" / "media" / "b.png").exists()
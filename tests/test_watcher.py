@@ -0,0 +1,214 @@
+"""
+Unit tests for matisse.watcher.
+
+Covers: the dependencies of a built presentation, the polling watcher
+(modified, created and removed files, debounced batches), the inotify
+watcher when inotify_simple is installed, and the watch loop rebuilding on
+sources changes and copying only the changed files of dirs_to_copy.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from matisse.matisse import build_presentation
+from matisse.matisse_config import MatisseConfig
+from matisse.watcher import PollingWatcher, __inotify__, dependencies, read_source, watch_presentation
+
+_TALK = """---
+metadata:
+  - dirs_to_copy: [images]
+---
+# Ch
+## S
+### SS
+#### First
+first slide
+$include(more.md)
+"""
+
+
+@pytest.fixture
+def workdir(workdir):
+    """Presentation sources into the temporary working directory."""
+    (workdir / "talk.md").write_text(_TALK)
+    (workdir / "more.md").write_text("#### Included\nincluded slide\n")
+    (workdir / "images").mkdir()
+    (workdir / "images" / "a.png").write_bytes(b"png")
+    return workdir
+
+
+# ---------------------------------------------------------------------------
+# dependencies
+# ---------------------------------------------------------------------------
+
+
+class TestDependencies:
+    def test_input_includes_and_trees(self, workdir):
+        config = MatisseConfig()
+        _, presentation = build_presentation(
+            config=config, source=read_source(config, "talk.md"), output="out", source_path="talk.md"
+        )
+        files, trees = dependencies(presentation, "talk.md")
+        assert files == ["talk.md", "more.md"]
+        assert trees == ["images"]
+        assert (workdir / "out" / "images" / "a.png").exists()
+
+
+# ---------------------------------------------------------------------------
+# watchers
+# ---------------------------------------------------------------------------
+
+
+def _changes_after(watcher, action):
+    """Return the batch of changes seen by watcher after action runs (in another thread)."""
+    timer = threading.Timer(0.05, action)
+    timer.start()
+    try:
+        return watcher.changes()
+    finally:
+        timer.join()
+
+
+class TestPollingWatcher:
+    def test_modified_file(self, workdir, touch):
+        watcher = PollingWatcher(interval=0.02, debounce=0.05)
+        watcher.watch(files=["talk.md", "more.md"])
+        changed = _changes_after(watcher, lambda: touch(workdir / "more.md", "#### Changed\n"))
+        assert changed == {str(workdir / "more.md")}
+
+    def test_created_and_removed_files_into_trees(self, workdir):
+        watcher = PollingWatcher(interval=0.02, debounce=0.05)
+        watcher.watch(files=["talk.md"], trees=["images"])
+
+        def action():
+            (workdir / "images" / "b.png").write_bytes(b"new")
+            (workdir / "images" / "a.png").unlink()
+
+        changed = _changes_after(watcher, action)
+        assert changed == {str(workdir / "images" / "a.png"), str(workdir / "images" / "b.png")}
+
+    def test_changes_are_debounced_into_one_batch(self, workdir, touch):
+        watcher = PollingWatcher(interval=0.02, debounce=0.2)
+        watcher.watch(files=["talk.md", "more.md"])
+
+        def action():
+            touch(workdir / "talk.md", _TALK + "\n")
+            time.sleep(0.08)
+            touch(workdir / "more.md", "#### Changed\n")
+
+        changed = _changes_after(watcher, action)
+        assert changed == {str(workdir / "talk.md"), str(workdir / "more.md")}
+
+    def test_unwatched_files_are_ignored(self, workdir, touch):
+        watcher = PollingWatcher(interval=0.02, debounce=0.05)
+        watcher.watch(files=["more.md"])
+
+        def action():
+            (workdir / "other.md").write_text("not watched")
+            time.sleep(0.05)
+            touch(workdir / "more.md", "#### Changed\n")
+
+        assert _changes_after(watcher, action) == {str(workdir / "more.md")}
+
+
+@pytest.mark.skipif(not __inotify__, reason="inotify_simple is not installed")
+class TestInotifyWatcher:
+    def test_replaced_file(self, workdir):
+        from matisse.watcher import InotifyWatcher
+
+        watcher = InotifyWatcher(debounce=0.05)
+        watcher.watch(files=["talk.md", "more.md"], trees=["images"])
+
+        def action():
+            (workdir / "more.md.tmp").write_text("#### Changed\n")
+            os.replace(workdir / "more.md.tmp", workdir / "more.md")
+            (workdir / "images" / "b.png").write_bytes(b"new")
+
+        try:
+            changed = _changes_after(watcher, action)
+        finally:
+            watcher.close()
+        assert changed == {str(workdir / "more.md"), str(workdir / "images" / "b.png")}
+
+
+# ---------------------------------------------------------------------------
+# watch loop
+# ---------------------------------------------------------------------------
+
+
+class _ScriptedWatcher(PollingWatcher):
+    """Watcher applying a scripted change at each call of changes, interrupting once the script is over."""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.batches = []
+
+    def changes(self):
+        if not self.script:
+            raise KeyboardInterrupt
+        path, text = self.script.pop(0)
+        path.write_bytes(text) if isinstance(text, bytes) else path.write_text(text)
+        self.batches.append(sorted(self.files))
+        return {str(path)}
+
+
+class TestWatchPresentation:
+    def test_rebuilds_and_copies(self, workdir, monkeypatch):
+        watcher = _ScriptedWatcher(
+            [
+                (workdir / "more.md", "#### Included\nedited slide\n"),
+                (workdir / "images" / "a.png", b"changed png"),
+            ]
+        )
+        builds = []
+        import matisse.matisse
+
+        original = matisse.matisse.build_presentation
+        monkeypatch.setattr(matisse.matisse, "build_presentation", lambda **kw: builds.append(1) or original(**kw))
+        config = MatisseConfig()
+        watch_presentation(config=config, source_path="talk.md", output="out", watcher=watcher)
+        # the first build and the one after the include change, not after the image change
+        assert len(builds) == 2
+        assert "edited slide" in (workdir / "out" / "index.html").read_text()
+        assert (workdir / "out" / "images" / "a.png").read_bytes() == b"changed png"
+        assert watcher.batches[0] == sorted([str(workdir / "talk.md"), str(workdir / "more.md")])
+        # the temporary build cache is removed
+        assert config.build_cache is None
+
+    def test_failed_build_keeps_watching(self, workdir, capsys):
+        (workdir / "more.md").unlink()
+        watcher = _ScriptedWatcher([(workdir / "more.md", "#### Included\nback\n")])
+        watch_presentation(config=MatisseConfig(), source_path="talk.md", output="out", watcher=watcher)
+        assert "build failed" in capsys.readouterr().err
+        assert "back" in (workdir / "out" / "index.html").read_text()
+
+    def test_source_error_keeps_watching(self, workdir, capsys):
+        # a front matter parsed as YAML but not as metadata raises a TypeError
+        malformed = _TALK.replace("metadata:\n  - dirs_to_copy: [images]", "metadata: 5")
+        watcher = _ScriptedWatcher(
+            [(workdir / "talk.md", malformed), (workdir / "talk.md", _TALK.replace("first", "fixed"))]
+        )
+        watch_presentation(config=MatisseConfig(), source_path="talk.md", output="out", watcher=watcher)
+        assert "build failed (TypeError" in capsys.readouterr().err
+        assert "fixed slide" in (workdir / "out" / "index.html").read_text()
+
+    def test_unchanged_includes_are_not_read_again(self, workdir, monkeypatch):
+        from matisse.include_resolver import IncludeResolver
+
+        resolvers = []
+        original = IncludeResolver.__init__
+
+        def init(self, parser):
+            original(self, parser)
+            resolvers.append(self)
+
+        monkeypatch.setattr(IncludeResolver, "__init__", init)
+        watcher = _ScriptedWatcher([(workdir / "talk.md", _TALK.replace("first", "edited"))])
+        watch_presentation(config=MatisseConfig(), source_path="talk.md", output="out", watcher=watcher)
+        assert "edited slide" in (workdir / "out" / "index.html").read_text()
+        # more.md is read by the first build only
+        assert sum(resolver.reads for resolver in resolvers) == 1